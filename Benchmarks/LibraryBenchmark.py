@@ -0,0 +1,408 @@
+"""
+Benchmark suite of the Library classes, runs without Allplan using the stand-in modules in StandIns
+
+The stand-ins (NemAll_Python_Geometry, NemAll_Python_BaseElements, NemAll_Python_IFW_Input, the palette services...)
+only do the bookkeeping, hence the suite measures the Python overhead of the Library, not the time Allplan needs.
+With --allplan the real modules are used where they can be imported, so it has to be run with the Allplan Python interpreter.
+The Interactor benchmarks always use a synthetic building element and coordinate input.
+
+Benchmarks:
+    builder         PolyhedronBuilder scaling from 10^2 to 10^6 elements, per-call API against the bulk API
+    faces           create_face() loop resolution against add_faces() and add_face_loops()
+    mesh_check      PolyhedronMesh.check() on n-gon prisms, whose two caps are single faces with n vertices
+    topology_file   named add_vertex()/add_edge()/create_face() build against PolyhedronBuilder.load() of a saved topology
+    pyp             pyp compile, descriptor cache hits and the dispatch setup of the Interactor for large palettes
+    modify          modify_element_property() round trips of the Interactor, with and without tracing
+    startup         import of the Interactor module in a new interpreter, and the time to the first palette
+                    of the Interactor with eager and lazy startup
+    drawing_files   DrawingFileContext enter and exit with many loaded drawing files
+
+The results are written as JSON with --json. With --baseline the results are compared to an earlier JSON file,
+and the script exits with 1 if any case got slower than --threshold times the baseline.
+
+Usage:
+    python Benchmarks/LibraryBenchmark.py [--benchmarks builder pyp ...] [--quick] [--json results.json]
+                                          [--baseline old.json] [--threshold 1.25] [--allplan]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+BENCHMARK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+BENCHMARKS = ["builder", "faces", "mesh_check", "topology_file", "pyp", "modify", "startup", "drawing_files"]
+
+
+class Results:
+    """
+    Collects the measured cases and prints them as they come
+    """
+
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+
+    def add(self, benchmark: str, case: str, size: int, seconds: float, **extra: Any) -> None:
+        record = {"benchmark": benchmark, "case": case, "size": size, "seconds": seconds, **extra}
+        self.records.append(record)
+        extra_text = " ".join(f"{key}={value}" for key, value in extra.items())
+        print(f"{benchmark:>14} {case:>22} {size:>9} {seconds * 1000:12.3f} ms  {extra_text}")
+
+
+def measure(function: Callable[[], Any], repeat: int) -> float:
+    """
+    Best time of several runs
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_builder(results: Results, quick: bool) -> None:
+    from PolyhedronBuilderBenchmark import build_bulk, build_per_call, torus_grid
+
+    sizes = [10**2, 10**3, 10**4] if quick else [10**2, 10**3, 10**4, 10**5, 10**6]
+    for size in sizes:
+        coordinates, edges, faces = torus_grid(size)
+        elements = len(coordinates) // 3 + len(edges) // 2 + len(faces)
+        repeat = 3 if size <= 10**4 else 1
+        results.add("builder", "bulk", elements, measure(lambda: build_bulk(coordinates, edges, faces), repeat))
+        if size <= 10**5:
+            results.add("builder", "per_call", elements, measure(lambda: build_per_call(coordinates, edges, faces), repeat))
+
+
+def bench_faces(results: Results, quick: bool) -> None:
+    from PolyhedronBuilderBenchmark import torus_grid
+    from Library.PolyhedronBuilder import PolyhedronBuilder
+
+    size = 10**3 if quick else 10**4
+    coordinates, edges, faces = torus_grid(size)
+    edge_names = [f"e{index}" for index in range(len(edges) // 2)]
+    named_faces = [[edge_names[index] for index in loop] for loop in faces]
+    vertex_loops = [vertex_loop(loop, edges) for loop in faces]
+
+    def prepared() -> PolyhedronBuilder:
+        builder = PolyhedronBuilder(vertices=len(coordinates) // 3, edges=len(edges) // 2, faces=len(faces))
+        builder.add_vertices(coordinates)
+        return builder
+
+    def named():
+        builder = prepared()
+        builder.add_edges(edges, edge_names)
+        for loop in named_faces:
+            builder.create_face(loop)
+
+    def indexed():
+        builder = prepared()
+        builder.add_edges(edges)
+        builder.add_faces(faces)
+
+    def loops():
+        builder = prepared()
+        builder.add_face_loops(vertex_loops)
+        builder.create()
+
+    for case, function in (("create_face", named), ("add_faces", indexed), ("add_face_loops", loops)):
+        results.add("faces", case, len(faces), measure(function, 3))
+
+
+def vertex_loop(loop: List[int], edges) -> List[int]:
+    """
+    Converts a loop of edge indexes into a loop of vertex indexes
+    """
+    first, last = loop[0], loop[-1]
+    vertex = edges[2 * first] if edges[2 * first] in (edges[2 * last], edges[2 * last + 1]) else edges[2 * first + 1]
+    vertices = []
+    for index in loop:
+        vertices.append(vertex)
+        vertex = edges[2 * index + 1] if edges[2 * index] == vertex else edges[2 * index]
+    return vertices
+
+
+def bench_mesh_check(results: Results, quick: bool) -> None:
+    from PrimitivesBenchmark import vertex_loops
+    from Library.PolyhedronMesh import PolyhedronMesh
+    from Library.Primitives import ngon_prism
+
+    sizes = [1000, 4000] if quick else [1000, 4000, 16000, 64000]
+    for size in sizes:
+        topology = ngon_prism(size, 1000, 100)
+        mesh = PolyhedronMesh(topology.coordinates, list(vertex_loops(topology)))
+        if mesh.check():
+            raise RuntimeError(f"The {size}-gon prism is reported as invalid!")
+        # The checks are linear, so the time per side has to stay about the same for larger caps
+        seconds = measure(mesh.check, 3)
+        results.add("mesh_check", "ngon_prism", size, seconds, per_side_us=round(1e6 * seconds / size, 3))
+
+
+def bench_topology_file(results: Results, quick: bool) -> None:
+    from PolyhedronBuilderBenchmark import torus_grid
+    from Library.PolyhedronBuilder import PolyhedronBuilder
+    from Library.TopologyFile import load_topology
+
+    sizes = [10**3, 10**4] if quick else [10**3, 10**4, 10**5]
+    for size in sizes:
+        coordinates, edges, faces = torus_grid(size)
+        vertex_names = [f"v{index}" for index in range(len(coordinates) // 3)]
+        edge_names = [f"e{index}" for index in range(len(edges) // 2)]
+        named_faces = [[edge_names[index] for index in loop] for loop in faces]
+
+        def named() -> PolyhedronBuilder:
+            builder = PolyhedronBuilder()
+            for index, name in enumerate(vertex_names):
+                builder.add_vertex(name, *coordinates[3 * index:3 * index + 3])
+            for index, name in enumerate(edge_names):
+                builder.add_edge(name, vertex_names[edges[2 * index]], vertex_names[edges[2 * index + 1]])
+            for loop in named_faces:
+                builder.create_face(loop)
+            return builder
+
+        repeat = 3 if size <= 10**4 else 1
+        results.add("topology_file", "named", len(faces), measure(named, repeat))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "part.topology")
+            builder = named()
+            results.add("topology_file", "save", len(faces), measure(lambda: builder.save(path), repeat),
+                        bytes=os.path.getsize(path))
+            # Only the file, without filling the polyhedron
+            results.add("topology_file", "read", len(faces), measure(lambda: load_topology(path), repeat))
+            results.add("topology_file", "load", len(faces), measure(lambda: PolyhedronBuilder.load(path), repeat))
+            results.add("topology_file", "load_without_names", len(faces),
+                        measure(lambda: PolyhedronBuilder.load(path, names=False), repeat))
+            results.add("topology_file", "load_scaled", len(faces),
+                        measure(lambda: PolyhedronBuilder.load(path, transform=(1.5, 1.5, 2)), repeat))
+
+
+def bench_pyp(results: Results, quick: bool) -> None:
+    from PypDescriptorBenchmark import write_pyp
+    from Library import PypDescriptor
+
+    sizes = [100, 1000] if quick else [100, 1000, 5000, 20000]
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            pyp = write_pyp(directory, size)
+            cache = os.path.join(directory, "cache")
+
+            results.add("pyp", "compile", size, measure(lambda: PypDescriptor.compile_descriptor(pyp), 3))
+            PypDescriptor.load_descriptor(pyp, cache)
+
+            def disk_hit():
+                PypDescriptor._memory_cache.clear()
+                PypDescriptor.load_descriptor(pyp, cache)
+            results.add("pyp", "disk_hit", size, measure(disk_hit, 3))
+            results.add("pyp", "memory_hit", size, measure(lambda: PypDescriptor.load_descriptor(pyp, cache), 3))
+            results.add("pyp", "interactor_setup", size, measure(lambda: make_interactor(directory, size, cache), 3))
+            PypDescriptor._memory_cache.clear()
+
+
+class SyntheticProperty:
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class SyntheticElement:
+    """
+    Building element with a property for every value, as the framework creates it from the pyp file
+    """
+
+    def __init__(self, values: Dict[str, Any]):
+        for name, value in values.items():
+            setattr(self, name, SyntheticProperty(value))
+
+
+class SyntheticInput:
+    """
+    Coordinate input without a document
+    """
+
+    def GetInputViewDocument(self):
+        return None
+
+    def InitFirstElementInput(self, hint) -> None:
+        pass
+
+
+def make_interactor(directory: str, parameters: int, cache: Optional[str], lazy_startup: bool=False):
+    """
+    Creates an Interactor for the pyp file written by write_pyp(), with a function for every button
+    and a handler for every tenth value
+    """
+    from Library.Interactor import Interactor
+
+    def button(self, build_ele, doc):
+        return True
+
+    def handler(self, page, name, value):
+        return None
+
+    methods = {f"button_{index}": button for index in range(0, parameters, 10)}
+    methods.update({f"value_{index}": handler for index in range(1, parameters, 10)})
+    interactor_class = type("SyntheticInteractor", (Interactor,), methods)
+
+    build_ele = SyntheticElement({f"value_{index}": float(index) for index in range(parameters) if index % 10})
+    return interactor_class("Synthetic", SyntheticInput(), directory, None, [build_ele], None, [], [], cache,
+                            lazy_startup=lazy_startup)
+
+
+def bench_modify(results: Results, quick: bool) -> None:
+    from PypDescriptorBenchmark import write_pyp
+
+    parameters = 1000
+    calls = 1000 if quick else 10000
+    with tempfile.TemporaryDirectory() as directory:
+        write_pyp(directory, parameters)
+        interactor = make_interactor(directory, parameters, None)
+        names = [f"value_{index}" for index in range(parameters) if index % 10]
+        random.seed(0)
+        sequence = [(random.choice(names), random.random() * 1000) for _ in range(calls)]
+
+        def round_trips():
+            for name, value in sequence:
+                interactor.modify_element_property(0, name, value)
+
+        seconds = measure(round_trips, 3)
+        results.add("modify", "modify_element_property", calls, seconds, per_call_us=round(1e6 * seconds / calls, 3))
+
+        # The same round trips with the tracing enabled
+        interactor.tracer.enable()
+        seconds = measure(round_trips, 3)
+        interactor.tracer.disable()
+        results.add("modify", "traced", calls, seconds, per_call_us=round(1e6 * seconds / calls, 3))
+
+
+def import_seconds(module: str) -> float:
+    """
+    Time to import the module in a new interpreter, with the same module search path as this process
+    """
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    process = subprocess.run([sys.executable, "-c", code], env=environment, capture_output=True, text=True, check=True)
+    return float(process.stdout)
+
+
+def bench_startup(results: Results, quick: bool) -> None:
+    from PypDescriptorBenchmark import write_pyp
+    from Library import PypDescriptor
+
+    # Cold import, including the Allplan modules (or the stand-ins) imported by the Interactor module
+    results.add("startup", "import", 1, min(import_seconds("Library.Interactor") for _ in range(3 if quick else 10)))
+
+    sizes = [100, 1000] if quick else [100, 1000, 5000, 20000]
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            write_pyp(directory, size)
+            cache = os.path.join(directory, "cache")
+            make_interactor(directory, size, cache)
+
+            for case, cached, lazy_startup in (("eager_cold", None, False), ("lazy_cold", None, True),
+                                               ("eager_disk_hit", cache, False), ("lazy_disk_hit", cache, True)):
+                interactors = []
+
+                def first_palette():
+                    # Cold open, the descriptor is compiled again or read from the disk cache
+                    PypDescriptor._memory_cache.clear()
+                    interactors.append(make_interactor(directory, size, cached, lazy_startup))
+
+                measure(first_palette, 3)
+                stats = [interactor.startup_stats() for interactor in interactors]
+                seconds = min(stat["first_palette"] for stat in stats)
+                # With lazy startup the binding is done by the first event
+                interactors[-1].modify_element_property(0, "value_1", 1.0)
+                extra = {"first_event_bind_ms": round(1000 * interactors[-1].startup_stats()["bind"], 3)} if lazy_startup else {}
+                results.add("startup", case, size, seconds, **extra)
+
+
+def bench_drawing_files(results: Results, quick: bool) -> None:
+    import NemAll_Python_BaseElements as AllplanBaseElements
+    from Library.DrawingFileContext import DrawingFileContext
+
+    sizes = [10, 100] if quick else [10, 100, 1000]
+    doc = object()
+    for size in sizes:
+        service = AllplanBaseElements.DrawingFileService()
+        loaded = {index: AllplanBaseElements.DrawingFileLoadState.ActiveBackground for index in range(1, size + 1)}
+        loaded[1] = AllplanBaseElements.DrawingFileLoadState.ActiveForeground
+
+        for case, unload in (("unload_all", True), ("restore_changes", False)):
+            contexts = []
+
+            def enter_exit():
+                service.state.clear()
+                service.state.update(loaded)
+                context = DrawingFileContext(doc, unload, service)
+                with context as df_service:
+                    df_service.LoadFile(doc, size + 1, AllplanBaseElements.DrawingFileLoadState.ActiveForeground)
+                    df_service.LoadFile(doc, size + 2, AllplanBaseElements.DrawingFileLoadState.ActiveBackground)
+                contexts.append(context)
+
+            seconds = measure(enter_exit, 5)
+            results.add("drawing_files", case, size, seconds, service_calls=contexts[-1].stats()["total"])
+
+
+def compare(records: List[Dict[str, Any]], baseline_path: str, threshold: float) -> bool:
+    """
+    Compares the results with a baseline JSON file written with --json
+
+    Returns:
+        True if no case is slower than threshold times the baseline
+    """
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = {(record["benchmark"], record["case"], record["size"]): record["seconds"]
+                    for record in json.load(file)["results"]}
+    ok = True
+    for record in records:
+        old = baseline.get((record["benchmark"], record["case"], record["size"]))
+        if not old:
+            continue
+        ratio = record["seconds"] / old
+        if ratio > threshold:
+            ok = False
+            print(f"Regression: {record['benchmark']} {record['case']} {record['size']} is {ratio:.2f}x slower than the baseline")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--benchmarks", nargs="+", default=BENCHMARKS, choices=BENCHMARKS)
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes, e.g. for a check on every commit")
+    parser.add_argument("--json", default=None, help="Path of the JSON file for the results")
+    parser.add_argument("--baseline", default=None, help="JSON file of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Allowed slowdown against the baseline")
+    parser.add_argument("--allplan", action="store_true", help="Use the real Allplan modules instead of the stand-ins")
+    args = parser.parse_args()
+
+    # With --allplan the stand-ins are only used for the modules that can not be imported
+    if args.allplan:
+        sys.path.append(os.path.join(BENCHMARK_DIRECTORY, "StandIns"))
+    else:
+        sys.path.insert(0, os.path.join(BENCHMARK_DIRECTORY, "StandIns"))
+    sys.path.insert(0, BENCHMARK_DIRECTORY)
+    sys.path.insert(0, os.path.dirname(BENCHMARK_DIRECTORY))
+
+    results = Results()
+    print(f"{'benchmark':>14} {'case':>22} {'size':>9} {'time':>15}")
+    for name in args.benchmarks:
+        globals()[f"bench_{name}"](results, args.quick)
+
+    if args.json is not None:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"python": platform.python_version(), "platform": platform.platform(), "stand_ins": not args.allplan,
+                       "quick": args.quick, "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results.records},
+                      file, indent=1)
+    if args.baseline is not None and not compare(results.records, args.baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark of the streaming mesh importers
+
+Synthetic closed triangle meshes (triangulated torus grids) are written as binary STL, ASCII STL, OBJ,
+ASCII PLY and binary PLY files, and imported into a welding PolyhedronMesh.
+The throughput is reported in MB/s and faces/s. With --memory every file is imported a second time
+with tracemalloc running, to report the peak memory of the import (tracemalloc slows the import down a lot).
+
+The PolyhedronMesh does not need Allplan, hence this benchmark runs with any Python interpreter.
+
+Usage:
+    python Benchmarks/MeshImportBenchmark.py [--sizes 10000 100000 ...] [--formats stl obj ...] [--directory DIR] [--memory]
+"""
+
+import argparse
+import math
+import os
+import struct
+import sys
+import tempfile
+import tracemalloc
+from typing import Iterator, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Library.MeshImport import import_mesh
+from Library.PolyhedronMesh import PolyhedronMesh
+
+FORMATS = ["stl", "ascii.stl", "obj", "ply", "ascii.ply"]
+
+
+def torus_triangles(triangles: int) -> Tuple[int, int]:
+    """
+    Grid size of a triangulated torus with approximately the given number of triangles
+    """
+    u = max(3, int(math.sqrt(triangles / 2)))
+    v = max(3, triangles // (2 * u))
+    return u, v
+
+
+def torus_vertices(u: int, v: int) -> Iterator[Tuple[float, float, float]]:
+    for i in range(u):
+        a = 2 * math.pi * i / u
+        for j in range(v):
+            b = 2 * math.pi * j / v
+            r = 1000 + 300 * math.cos(b)
+            yield r * math.cos(a), r * math.sin(a), 300 * math.sin(b)
+
+
+def torus_faces(u: int, v: int) -> Iterator[Tuple[int, int, int]]:
+    for i in range(u):
+        for j in range(v):
+            k, right, up = i * v + j, ((i + 1) % u) * v + j, i * v + (j + 1) % v
+            diagonal = ((i + 1) % u) * v + (j + 1) % v
+            yield k, right, diagonal
+            yield k, diagonal, up
+
+
+def write_file(path: str, file_format: str, u: int, v: int) -> None:
+    vertices = list(torus_vertices(u, v))
+
+    if file_format == "stl":
+        with open(path, "wb") as file:
+            file.write(b"\0" * 80 + struct.pack("<I", 2 * u * v))
+            record = struct.Struct("<12fH")
+            for a, b, c in torus_faces(u, v):
+                file.write(record.pack(0, 0, 0, *vertices[a], *vertices[b], *vertices[c], 0))
+
+    elif file_format == "ascii.stl":
+        with open(path, "w") as file:
+            file.write("solid torus\n")
+            for face in torus_faces(u, v):
+                file.write("facet normal 0 0 0\nouter loop\n")
+                for index in face:
+                    file.write("vertex {:.6f} {:.6f} {:.6f}\n".format(*vertices[index]))
+                file.write("endloop\nendfacet\n")
+            file.write("endsolid torus\n")
+
+    elif file_format == "obj":
+        with open(path, "w") as file:
+            for vertex in vertices:
+                file.write("v {:.6f} {:.6f} {:.6f}\n".format(*vertex))
+            for a, b, c in torus_faces(u, v):
+                file.write(f"f {a + 1} {b + 1} {c + 1}\n")
+
+    else:
+        binary = file_format == "ply"
+        with open(path, "wb") as file:
+            header = ["ply", "format binary_little_endian 1.0" if binary else "format ascii 1.0",
+                      f"element vertex {len(vertices)}", "property float x", "property float y", "property float z",
+                      f"element face {2 * u * v}", "property list uchar int vertex_indices", "end_header", ""]
+            file.write("\n".join(header).encode("ascii"))
+            if binary:
+                for vertex in vertices:
+                    file.write(struct.pack("<3f", *vertex))
+                for face in torus_faces(u, v):
+                    file.write(struct.pack("<B3i", 3, *face))
+            else:
+                for vertex in vertices:
+                    file.write("{:.6f} {:.6f} {:.6f}\n".format(*vertex).encode("ascii"))
+                for face in torus_faces(u, v):
+                    file.write("3 {} {} {}\n".format(*face).encode("ascii"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**4, 10**5, 10**6], help="Number of triangles, up to 10**7")
+    parser.add_argument("--formats", nargs="+", default=FORMATS, choices=FORMATS)
+    parser.add_argument("--chunk-size", type=int, default=65536)
+    parser.add_argument("--memory", action="store_true", help="Measure the peak memory in a second import")
+    parser.add_argument("--directory", default=None, help="Directory for the synthetic files, default is a temporary directory")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        print(f"{'format':>10} {'triangles':>10} {'size [MB]':>10} {'time [s]':>9} {'MB/s':>8} {'faces/s':>10} {'vertices':>9} {'peak [MB]':>10}")
+        for size in args.sizes:
+            u, v = torus_triangles(size)
+            for file_format in args.formats:
+                path = os.path.join(directory, f"torus_{size}.{file_format}")
+                write_file(path, file_format, u, v)
+
+                mesh = PolyhedronMesh(weld_epsilon=0.01)
+                stats = import_mesh(path, mesh, args.chunk_size)
+
+                peak_text = f"{'-':>10}"
+                if args.memory:
+                    tracemalloc.start()
+                    import_mesh(path, PolyhedronMesh(weld_epsilon=0.01), args.chunk_size)
+                    peak_text = f"{tracemalloc.get_traced_memory()[1] / 2**20:10.1f}"
+                    tracemalloc.stop()
+
+                megabytes = stats.bytes / 2**20
+                print(f"{file_format:>10} {stats.faces:>10} {megabytes:10.1f} {stats.seconds:9.2f} {megabytes / stats.seconds:8.2f} "
+                      f"{stats.faces / stats.seconds:10.0f} {mesh.vertex_count:>9} {peak_text}")
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark of the parallel topology build against the number of worker processes
+
+An array of shafts (closed cylinders with a tessellated mantle) is built with ParallelBuild.build_topologies(),
+once in this process and once with every given number of workers, in a pool from ParallelBuild.create_pool()
+(spawned worker processes, as in Allplan). The speedup is reported against
+the build in this process, together with the size of the transferred topologies.
+
+Only the topologies are built, the Allplan polyhedra are not created, hence this benchmark runs with any Python interpreter.
+
+Usage:
+    python Benchmarks/ParallelBuildBenchmark.py [--shafts 200] [--segments 256] [--workers 1 2 4 8]
+"""
+
+import argparse
+import math
+import os
+import pickle
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Library.ParallelBuild import build_topologies, create_pool
+from Library.PolyhedronMesh import PolyhedronMesh
+
+
+def shaft(x: float, y: float, radius: float, depth: float, segments: int) -> PolyhedronMesh:
+    """
+    Closed cylinder with the given number of segments, split into rings of segments along the depth
+    """
+    rings = max(2, segments // 8)
+    mesh = PolyhedronMesh()
+    for ring in range(rings):
+        z = -depth * ring / (rings - 1)
+        for i in range(segments):
+            a = 2 * math.pi * i / segments
+            mesh.add_vertex(x + radius * math.cos(a), y + radius * math.sin(a), z)
+
+    for ring in range(rings - 1):
+        top, bottom = ring * segments, (ring + 1) * segments
+        mesh.add_faces([top + i, top + (i + 1) % segments, bottom + (i + 1) % segments, bottom + i] for i in range(segments))
+    mesh.add_face(range(segments - 1, -1, -1))
+    mesh.add_face(range((rings - 1) * segments, rings * segments))
+    return mesh
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shafts", type=int, default=200, help="Number of solids")
+    parser.add_argument("--segments", type=int, default=256, help="Segments of every shaft")
+    parser.add_argument("--workers", type=int, nargs="+", default=None, help="Numbers of worker processes, default 1, 2, 4 ... CPUs")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    workers = args.workers or sorted({2**i for i in range(cpus.bit_length())} | {cpus})
+    jobs = [(1500.0 * (i % 20), 1500.0 * (i // 20), 400.0, 2500.0, args.segments) for i in range(args.shafts)]
+
+    start = time.perf_counter()
+    topologies = build_topologies(shaft, jobs, max_workers=1)
+    serial = time.perf_counter() - start
+
+    vertices = sum(len(topology.coordinates) // 3 for topology in topologies)
+    megabytes = len(pickle.dumps(topologies, pickle.HIGHEST_PROTOCOL)) / 2**20
+    print(f"{args.shafts} shafts, {vertices} vertices, {megabytes:.1f} MB pickled topologies, {cpus} CPUs")
+    print(f"{'workers':>8} {'time [s]':>9} {'speedup':>8} {'solids/s':>9}")
+    print(f"{'serial':>8} {serial:9.2f} {1:8.2f} {args.shafts / serial:9.0f}")
+
+    for count in workers:
+        # The pool is created as by build_topologies() and started before the measurement,
+        # so the process start up is not included
+        pool = create_pool(count)
+        if pool is None:
+            print("No Python interpreter found to start the worker processes")
+            return
+        with pool:
+            list(pool.map(abs, range(count)))
+            start = time.perf_counter()
+            build_topologies(shaft, jobs, max_workers=count, executor=pool)
+            seconds = time.perf_counter() - start
+        print(f"{count:>8} {seconds:9.2f} {serial / seconds:8.2f} {args.shafts / seconds:9.0f}")
+
+
+if __name__ == "__main__":
+    main()
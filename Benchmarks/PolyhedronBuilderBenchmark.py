@@ -0,0 +1,106 @@
+"""
+Benchmark of the PolyhedronBuilder per-call API against the bulk API
+
+A closed torus grid with n vertices, 2n edges and n quad faces is built once with
+named add_vertex/add_edge/create_face calls and once with PolyhedronBuilder.from_arrays()
+
+Usage:
+    python Benchmarks/PolyhedronBuilderBenchmark.py [--sizes 100 1000 ...] [--max-per-call N]
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from array import array
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Library.PolyhedronBuilder import PolyhedronBuilder
+
+
+def torus_grid(vertices: int) -> Tuple[array, array, List[List[int]]]:
+    """
+    Creates a closed quad torus with approximately the given number of vertices
+
+    Parameters:
+        vertices: int   Expected number of vertices
+    Returns:
+        Flat coordinates, flat edge pairs and faces as loops of edge indexes
+    """
+    u = max(3, int(math.sqrt(vertices)))
+    v = max(3, vertices // u)
+
+    coordinates = array("d")
+    for i in range(u):
+        a = 2 * math.pi * i / u
+        for j in range(v):
+            b = 2 * math.pi * j / v
+            r = 1000 + 300 * math.cos(b)
+            coordinates.extend((r * math.cos(a), r * math.sin(a), 300 * math.sin(b)))
+
+    # Edge 2 * k goes along u, edge 2 * k + 1 goes along v, starting in vertex k
+    edges = array("i")
+    for i in range(u):
+        for j in range(v):
+            k = i * v + j
+            edges.extend((k, ((i + 1) % u) * v + j, k, i * v + (j + 1) % v))
+
+    faces = []
+    for i in range(u):
+        for j in range(v):
+            k = i * v + j
+            right = ((i + 1) % u) * v + j
+            up    = i * v + (j + 1) % v
+            faces.append([2 * k, 2 * right + 1, 2 * up, 2 * k + 1])
+    return coordinates, edges, faces
+
+
+def build_per_call(coordinates: array, edges: array, faces: List[List[int]]) -> PolyhedronBuilder:
+    builder = PolyhedronBuilder()
+    for i in range(len(coordinates) // 3):
+        builder.add_vertex(f"v{i}", coordinates[3 * i], coordinates[3 * i + 1], coordinates[3 * i + 2])
+    for i in range(len(edges) // 2):
+        builder.add_edge(f"e{i}", f"v{edges[2 * i]}", f"v{edges[2 * i + 1]}")
+    for loop in faces:
+        builder.create_face([f"e{index}" for index in loop])
+    builder.create()
+    return builder
+
+
+def build_bulk(coordinates: array, edges: array, faces: List[List[int]]) -> PolyhedronBuilder:
+    builder = PolyhedronBuilder.from_arrays(coordinates, edges, faces)
+    builder.create()
+    return builder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**2, 10**3, 10**4, 10**5, 10**6])
+    parser.add_argument("--max-per-call", type=int, default=10**6, help="Largest size measured with the per-call API")
+    args = parser.parse_args()
+
+    print(f"{'vertices':>10} {'elements':>10} {'per-call [s]':>13} {'bulk [s]':>10} {'bulk [elem/s]':>14} {'speedup':>8}")
+    for size in args.sizes:
+        coordinates, edges, faces = torus_grid(size)
+        elements = len(coordinates) // 3 + len(edges) // 2 + len(faces)
+
+        start = time.perf_counter()
+        build_bulk(coordinates, edges, faces)
+        bulk = time.perf_counter() - start
+
+        per_call = None
+        if size <= args.max_per_call:
+            start = time.perf_counter()
+            build_per_call(coordinates, edges, faces)
+            per_call = time.perf_counter() - start
+
+        per_call_text = f"{per_call:13.3f}" if per_call is not None else f"{'-':>13}"
+        speedup_text  = f"{per_call / bulk:8.2f}" if per_call is not None else f"{'-':>8}"
+        print(f"{len(coordinates) // 3:>10} {elements:>10} {per_call_text} {bulk:10.3f} {elements / bulk:14.0f} {speedup_text}")
+
+
+if __name__ == "__main__":
+    main()
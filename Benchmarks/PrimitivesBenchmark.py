@@ -0,0 +1,53 @@
+"""
+Benchmark of the primitive generators against building the same body from vertex loops
+
+A revolved profile (a cone on a cylindrical foot) is generated with Primitives.revolve() for every number of segments,
+and the same vertices and faces are given as vertex loops to a PolyhedronMesh, whose topology is created
+with edge sharing and orientation by to_topology(). Both results can be passed to PolyhedronBuilder.from_topology().
+
+Only the topologies are built, the Allplan polyhedra are not created, hence this benchmark runs with any Python interpreter.
+
+Usage:
+    python Benchmarks/PrimitivesBenchmark.py [--segments 256 1024 4096 ...]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Library.PolyhedronMesh import PolyhedronMesh
+from Library.Primitives import revolve
+
+PROFILE = [(0, 0), (400, 0), (400, 300), (350, 320), (350, 600), (200, 900), (100, 1100), (0, 1200)]
+
+
+def vertex_loops(topology):
+    for face in range(len(topology.face_offsets) - 1):
+        entries = topology.face_edges[topology.face_offsets[face]:topology.face_offsets[face + 1]]
+        yield [topology.edge_start[entry] if entry >= 0 else topology.edge_end[~entry] for entry in entries]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, nargs="+", default=[256, 1024, 4096, 16384])
+    args = parser.parse_args()
+
+    print(f"{'segments':>9} {'faces':>8} {'revolve [ms]':>13} {'loops [ms]':>11} {'speedup':>8}")
+    for segments in args.segments:
+        start = time.perf_counter()
+        topology = revolve(PROFILE, segments)
+        generated = time.perf_counter() - start
+
+        loops = list(vertex_loops(topology))
+        start = time.perf_counter()
+        PolyhedronMesh(topology.coordinates, loops).to_topology()
+        from_loops = time.perf_counter() - start
+
+        print(f"{segments:>9} {len(loops):>8} {1000 * generated:13.1f} {1000 * from_loops:11.1f} {from_loops / generated:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
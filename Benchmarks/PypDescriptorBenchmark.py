@@ -0,0 +1,117 @@
+"""
+Benchmark of the pyp file handling at the start of an Interactor
+
+A synthetic pyp file with the given number of parameters (every tenth one a button) is written,
+with half of the pages in an #include file. Then it is measured how long it takes to:
+    - parse:        ET.parse and walk all the parameters (what the Interactor did before the descriptor cache)
+    - compile:      compile the descriptor (reading the includes and the pal file)
+    - disk hit:     load the compiled descriptor from the cache directory (first open after a restart)
+    - memory hit:   get the descriptor from memory (every further open)
+
+Only the pyp handling is measured, hence this benchmark runs with any Python interpreter.
+
+Usage:
+    python Benchmarks/PypDescriptorBenchmark.py [--sizes 100 1000 ...] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Library import PypDescriptor
+
+
+def write_pyp(directory: str, parameters: int) -> str:
+    """
+    Writes a pyp file with the given number of parameters, the second half of the pages is in an include file
+
+    Returns:
+        Path to the pyp file
+    """
+    def page(number: int, first: int, count: int) -> str:
+        lines = [f"    <Page>", f"        <Name>Page{number}</Name>", f"        <Text>Page {number}</Text>"]
+        for index in range(first, first + count):
+            if index % 10 == 0:
+                lines += ["        <Parameter>", f"            <Name>button_{index}</Name>", "            <Text>Click</Text>",
+                          "            <ValueType>Button</ValueType>", f"            <EventId>{index}</EventId>", "        </Parameter>"]
+            else:
+                lines += ["        <Parameter>", f"            <Name>value_{index}</Name>", f"            <Text>Value {index}</Text>",
+                          f"            <Value>{index}.0</Value>", "            <ValueType>Length</ValueType>", "        </Parameter>"]
+        lines.append("    </Page>")
+        return "\n".join(lines) + "\n"
+
+    per_page = 50
+    pages = [(number, first, min(per_page, parameters - first)) for number, first in enumerate(range(0, parameters, per_page))]
+    half = len(pages) // 2
+
+    with open(os.path.join(directory, "Included.incpyp"), "w", encoding="utf-8") as file:
+        file.write("".join(page(*item) for item in pages[half:]))
+
+    path = os.path.join(directory, "Synthetic.pyp")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write('<?xml version="1.0" encoding="utf-8"?>\n<Element>\n    <Script>\n        <Name>Synthetic.py</Name>\n'
+                   '        <Title>Synthetic</Title>\n        <Interactor>True</Interactor>\n    </Script>\n')
+        file.write("".join(page(*item) for item in pages[:half]))
+        file.write("#include Included.incpyp\n</Element>\n")
+    return path
+
+
+def parse_tree(path: str) -> int:
+    """
+    What the Interactor did before: parse the pyp file and walk all the parameters
+    (the #include line is removed, as ElementTree can't handle it)
+    """
+    with open(path, "rb") as file:
+        content = file.read().replace(b"#include Included.incpyp", b"")
+    count = 0
+    for child in ET.fromstring(content).iter("Parameter"):
+        if child.find("ValueType").text in ["Button", "PictureButton", "PictureResourceButton"]:
+            int(child.find("EventId").text)
+        child.find("Name")
+        count += 1
+    return count
+
+
+def measure(function, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'parameters':>10} {'parse [ms]':>11} {'compile [ms]':>13} {'disk hit [ms]':>14} {'memory hit [ms]':>16}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            pyp = write_pyp(directory, size)
+            cache = os.path.join(directory, "cache")
+
+            parse = measure(lambda: parse_tree(pyp), args.repeat)
+            compiled = measure(lambda: PypDescriptor.compile_descriptor(pyp), args.repeat)
+
+            PypDescriptor.load_descriptor(pyp, cache)
+
+            def disk_hit():
+                PypDescriptor._memory_cache.clear()
+                PypDescriptor.load_descriptor(pyp, cache)
+            disk = measure(disk_hit, args.repeat)
+            memory = measure(lambda: PypDescriptor.load_descriptor(pyp, cache), args.repeat)
+            PypDescriptor._memory_cache.clear()
+
+        print(f"{size:>10} {parse * 1000:11.2f} {compiled * 1000:13.2f} {disk * 1000:14.2f} {memory * 1000:16.3f}")
+
+
+if __name__ == "__main__":
+    main()
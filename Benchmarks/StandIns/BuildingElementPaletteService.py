@@ -0,0 +1,28 @@
+"""
+Pure Python stand-in for the BuildingElementPaletteService of the PythonParts framework, for benchmarks without Allplan
+
+The palette only sets the modified values on the building element and counts the palette updates.
+"""
+
+from typing import Any
+
+
+class BuildingElementPaletteService:
+    def __init__(self, build_ele_list, build_ele_composite, name: str, control_props_list, pyp_file: str):
+        self.build_ele_list = build_ele_list
+        self.updates = 0
+
+    def show_palette(self, pyp_file: str) -> None:
+        self.updates += 1
+
+    def update_palette(self, page: int, update_all: bool) -> None:
+        self.updates += 1
+
+    def modify_element_property(self, page: int, name: str, value: Any) -> bool:
+        prop = getattr(self.build_ele_list[0], name, None)
+        if prop is not None:
+            prop.value = value
+        return False
+
+    def close_palette(self) -> None:
+        pass
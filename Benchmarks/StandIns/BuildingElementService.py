@@ -0,0 +1,7 @@
+"""
+Pure Python stand-in for the BuildingElementService of the PythonParts framework, for benchmarks without Allplan
+"""
+
+
+class BuildingElementService:
+    pass
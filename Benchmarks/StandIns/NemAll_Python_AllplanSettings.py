@@ -0,0 +1,11 @@
+"""
+Pure Python stand-in for the parts of NemAll_Python_AllplanSettings used by the Library, for benchmarks without Allplan
+"""
+
+import tempfile
+
+
+class AllplanPaths:
+    @staticmethod
+    def GetUsrPath() -> str:
+        return tempfile.gettempdir()
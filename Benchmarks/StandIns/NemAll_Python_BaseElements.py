@@ -0,0 +1,50 @@
+"""
+Pure Python stand-in for the parts of NemAll_Python_BaseElements used by the Library, for benchmarks without Allplan
+
+The DrawingFileService keeps the load state of the drawing files in memory and counts its calls.
+"""
+
+from collections import Counter
+
+
+class DrawingFileLoadState:
+    ActiveForeground = 1
+    ActiveBackground = 2
+    PassiveBackground = 3
+    values = {1: ActiveForeground, 2: ActiveBackground, 3: PassiveBackground}
+
+
+class DrawingFileService:
+    # Drawing file index -> state of the loaded files, shared by all instances like the drawing files in Allplan
+    state = {1: DrawingFileLoadState.ActiveForeground}
+    calls = Counter()
+
+    def GetFileState(self):
+        self.calls["GetFileState"] += 1
+        return list(self.state.items())
+
+    def LoadFile(self, doc, index: int, state: int) -> None:
+        self.calls["LoadFile"] += 1
+        if state == DrawingFileLoadState.ActiveForeground:
+            for other, other_state in self.state.items():
+                if other_state == state:
+                    self.state[other] = DrawingFileLoadState.ActiveBackground
+        self.state[index] = state
+
+    def UnloadFile(self, doc, index: int) -> None:
+        self.calls["UnloadFile"] += 1
+        self.state.pop(index, None)
+
+    def UnloadAll(self, doc) -> None:
+        self.calls["UnloadAll"] += 1
+        self.state.clear()
+
+    def ExportDWG(self, doc, path: str, config: str, version: float) -> None:
+        self.calls["ExportDWG"] += 1
+        foreground = [index for index, state in self.state.items() if state == DrawingFileLoadState.ActiveForeground]
+        with open(path, "w") as file:
+            file.write(f"DWG {version} of the drawing files {foreground}\n")
+
+
+def DrawElementPreview(doc, matrix, elements, direct_draw: bool, ref_ele) -> None:
+    pass
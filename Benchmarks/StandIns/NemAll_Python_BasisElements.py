@@ -0,0 +1,13 @@
+"""
+Pure Python stand-in for the parts of NemAll_Python_BasisElements used by the Library, for benchmarks without Allplan
+"""
+
+
+class CommonProperties:
+    pass
+
+
+class ModelElement3D:
+    def __init__(self, common_properties, geometry):
+        self.common_properties = common_properties
+        self.geometry = geometry
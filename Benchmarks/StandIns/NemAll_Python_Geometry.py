@@ -0,0 +1,119 @@
+"""
+Pure Python stand-in for the parts of NemAll_Python_Geometry used by the Library, for benchmarks without Allplan
+
+Only the bookkeeping is done (vertices, edges and faces are stored in lists), no geometry is computed,
+hence the measured times are the Python overhead of the Library and not the time Allplan needs.
+"""
+
+
+class eGeometryErrorCode:
+    eOK = 0
+    eError = 1
+
+
+eOK = eGeometryErrorCode.eOK
+
+
+class PolyhedronType:
+    tVertices = 0
+    tEdges = 1
+    tFaces = 2
+    tVolume = 3
+
+    # Types by their value, as in the Boost.Python enums of Allplan
+    values = {0: tVertices, 1: tEdges, 2: tFaces, 3: tVolume}
+
+
+class Point3D:
+    __slots__ = ("X", "Y", "Z")
+
+    def __init__(self, x: float=0, y: float=0, z: float=0):
+        self.X, self.Y, self.Z = x, y, z
+
+
+class Vector3D(Point3D):
+    __slots__ = ()
+
+
+class Matrix3D:
+    pass
+
+
+class MinMax3D:
+    def __init__(self, low: Point3D=None, high: Point3D=None):
+        self.Min = low if low is not None else Point3D()
+        self.Max = high if high is not None else Point3D()
+
+
+class GeometryEdge:
+    __slots__ = ("start", "end")
+
+    def __init__(self, start: int, end: int):
+        self.start, self.end = start, end
+
+    def GetStartIndex(self) -> int:
+        return self.start
+
+    def GetEndIndex(self) -> int:
+        return self.end
+
+
+class OrientedEdge:
+    __slots__ = ("index", "positive")
+
+    def __init__(self, index: int, positive: bool):
+        self.index, self.positive = index, positive
+
+
+class PolyhedronFace:
+    __slots__ = ("edges",)
+
+    def __init__(self):
+        self.edges = []
+
+    def AppendEdge(self, edge: OrientedEdge) -> None:
+        self.edges.append(edge)
+
+
+class Polyhedron3D:
+    def __init__(self, p_type: int=PolyhedronType.tVolume, vertices: int=0, edges: int=0, faces: int=0, allocate: bool=False):
+        self.p_type = p_type
+        self.vertices = []
+        self.edges = []
+        self.faces = []
+        self.completed = False
+
+    def AppendEdge(self, edge: GeometryEdge) -> int:
+        if not (0 <= edge.start < len(self.vertices) and 0 <= edge.end < len(self.vertices)):
+            return eGeometryErrorCode.eError
+        self.edges.append(edge)
+        return eOK
+
+    def CreateFace(self, edges: int) -> PolyhedronFace:
+        face = PolyhedronFace()
+        self.faces.append(face)
+        return face
+
+    def GetVerticesCount(self) -> int:
+        return len(self.vertices)
+
+    def GetEdgesCount(self) -> int:
+        return len(self.edges)
+
+    def GetFacesCount(self) -> int:
+        return len(self.faces)
+
+    def IsValid(self) -> bool:
+        return self.completed and bool(self.vertices)
+
+
+class Polyhedron3DBuilder:
+    def __init__(self, polyhedron: Polyhedron3D):
+        self.polyhedron = polyhedron
+
+    def AppendVertex(self, point: Point3D):
+        self.polyhedron.vertices.append(point)
+        return eOK, len(self.polyhedron.vertices) - 1
+
+    def Complete(self) -> None:
+        self.polyhedron.completed = True
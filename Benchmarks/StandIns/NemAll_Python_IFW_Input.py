@@ -0,0 +1,9 @@
+"""
+Pure Python stand-in for the parts of NemAll_Python_IFW_Input used by the Library, for benchmarks without Allplan
+"""
+
+
+class InputStringConvert:
+    def __init__(self, text: str):
+        self.text = text
+
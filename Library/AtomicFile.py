@@ -0,0 +1,38 @@
+import os
+from contextlib import contextmanager, suppress
+from typing import IO, ContextManager, Iterator
+
+
+@contextmanager
+def atomic_write(path: str, binary: bool=False) -> Iterator[IO]:
+    """
+    Opens a file for writing, which replaces the file at the path only when the block ends without an exception
+
+    The data is written to a temporary file next to the path first, so a crash never leaves a half written file behind.
+    If the block raises, the temporary file is removed and an existing file at the path is kept.
+
+    Usage example:
+        with atomic_write(path) as file:
+            json.dump(data, file)
+
+    Parameters:
+        path: str       Path of the file, an existing file is replaced
+        binary: bool    Open the file in binary mode, otherwise as UTF-8 text, default = False
+    """
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with (open(temporary, "wb") if binary else open(temporary, "w", encoding="utf-8")) as file:
+            yield file
+        os.replace(temporary, path)
+    except BaseException:
+        with suppress(OSError):
+            os.remove(temporary)
+        raise
+
+
+def ignore_cache_errors() -> ContextManager:
+    """
+    Context manager ignoring the errors of writing a disk cache, e.g. a read-only folder or a full disk
+    The cache is only an optimization, the cached value was computed anyway and is used without being saved
+    """
+    return suppress(OSError)
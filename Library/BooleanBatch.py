@@ -0,0 +1,405 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+
+# Axis aligned bounding box (min x, min y, min z, max x, max y, max z)
+Box = Tuple[float, float, float, float, float, float]
+
+
+class BooleanError(Exception):
+    """
+    Error class for the batch boolean operations
+    """
+
+    def __init__(self, message: str, error_code=None):
+        self.message = message
+        self.error_code = error_code
+        super().__init__(self.message)
+
+
+class BooleanNode(NamedTuple):
+    """
+    Node of a boolean plan, created by plan_union() and plan_subtraction()
+
+    Attributes:
+        operation: str      "solid", "union" or "subtract"
+        index: int          Index of the solid for "solid" nodes (-1 is the target of a subtraction), otherwise -1
+        left, right         Operands of "union" and "subtract" nodes
+        box: Box            Bounding box of the result
+        solids: int         Number of solids in the subtree
+    """
+    operation: str
+    index: int
+    left: Optional["BooleanNode"]
+    right: Optional["BooleanNode"]
+    box: Box
+    solids: int
+
+    @property
+    def depth(self) -> int:
+        """
+        Number of operations on the longest path from a solid to the result
+        """
+        if self.operation == "solid":
+            return 0
+        return 1 + max(self.left.depth, self.right.depth)
+
+    @property
+    def operations(self) -> int:
+        """
+        Number of boolean operations in the plan
+        """
+        if self.operation == "solid":
+            return 0
+        return 1 + self.left.operations + self.right.operations
+
+
+def box_from_minmax(minmax) -> Box:
+    """
+    Converts an AllplanGeo.MinMax3D (e.g. the drawing_minmax of the Interactor) into a box
+    """
+    low, high = minmax.Min, minmax.Max
+    return low.X, low.Y, low.Z, high.X, high.Y, high.Z
+
+
+def box_from_coordinates(coordinates: Sequence[float]) -> Box:
+    """
+    Bounding box of flat x, y, z coordinates, e.g. of a PolyhedronTopology or a PolyhedronMesh
+    """
+    xs, ys, zs = coordinates[0::3], coordinates[1::3], coordinates[2::3]
+    return min(xs), min(ys), min(zs), max(xs), max(ys), max(zs)
+
+
+def boxes_overlap(a: Box, b: Box, tolerance: float=0) -> bool:
+    """
+    Checks if two boxes overlap, boxes touching within the tolerance overlap
+    """
+    return (a[0] <= b[3] + tolerance and b[0] <= a[3] + tolerance and
+            a[1] <= b[4] + tolerance and b[1] <= a[4] + tolerance and
+            a[2] <= b[5] + tolerance and b[2] <= a[5] + tolerance)
+
+
+def merge_boxes(a: Box, b: Box) -> Box:
+    """
+    Smallest box containing both boxes
+    """
+    return min(a[0], b[0]), min(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3]), max(a[4], b[4]), max(a[5], b[5])
+
+
+def cluster_boxes(boxes: Sequence[Box], tolerance: float=0) -> List[List[int]]:
+    """
+    Groups the boxes into clusters of (transitively) overlapping boxes
+    The overlapping pairs are found by sorting the boxes along x and sweeping, so disjoint boxes are rarely compared
+
+    Parameters:
+        boxes: Sequence[Box]    Bounding boxes
+        tolerance: float        Boxes closer than the tolerance overlap
+    Returns:
+        Clusters as lists of box indexes, the clusters and their members ordered by the minimum x
+    """
+    parent = list(range(len(boxes)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    order = sorted(range(len(boxes)), key=lambda index: boxes[index][0])
+    active: List[int] = []
+    for index in order:
+        box = boxes[index]
+        # Boxes ending before this one starts along x can not overlap any of the following boxes
+        active = [other for other in active if boxes[other][3] + tolerance >= box[0]]
+        for other in active:
+            if boxes_overlap(box, boxes[other], tolerance):
+                parent[find(other)] = find(index)
+        active.append(index)
+
+    clusters: Dict[int, List[int]] = {}
+    for index in order:
+        clusters.setdefault(find(index), []).append(index)
+    return list(clusters.values())
+
+
+def _balanced(nodes: List[BooleanNode]) -> BooleanNode:
+    # Neighbours are united level by level, so every solid takes part in about log2(n) operations
+    while len(nodes) > 1:
+        paired = [BooleanNode("union", -1, left, right, merge_boxes(left.box, right.box), left.solids + right.solids)
+                  for left, right in zip(nodes[0::2], nodes[1::2])]
+        if len(nodes) % 2:
+            paired.append(nodes[-1])
+        nodes = paired
+    return nodes[0]
+
+
+def plan_union(boxes: Sequence[Box], tolerance: float=0, indexes: Optional[Sequence[int]]=None) -> Optional[BooleanNode]:
+    """
+    Plans the union of many solids as a balanced tree
+
+    The overlapping solids are clustered and every cluster is united first, so the intermediate results stay small,
+    then the clusters are united with each other. Solids and clusters are paired with their neighbours along x.
+
+    Parameters:
+        boxes: Sequence[Box]        Bounding box of every solid
+        tolerance: float            Boxes closer than the tolerance overlap
+        indexes: Sequence[int]      Solid indexes of the boxes, default = 0, 1, 2...
+    Returns:
+        Root node of the plan, None if there are no boxes
+    """
+    if not boxes:
+        return None
+    if indexes is None:
+        indexes = range(len(boxes))
+    clusters = [_balanced([BooleanNode("solid", indexes[index], None, None, boxes[index], 1) for index in cluster])
+                for cluster in cluster_boxes(boxes, tolerance)]
+    return _balanced(clusters)
+
+
+def plan_subtraction(target_box: Box, tool_boxes: Sequence[Box], tolerance: float=0) -> Tuple[BooleanNode, List[int]]:
+    """
+    Plans the subtraction of many tools (e.g. openings) from one target
+
+    Tools whose boxes do not overlap the target are skipped. The rest is united as in plan_union(),
+    and the union is subtracted from the target in one operation, instead of subtracting the tools
+    one after another from the growing result.
+
+    Parameters:
+        target_box: Box                 Bounding box of the target
+        tool_boxes: Sequence[Box]       Bounding box of every tool
+        tolerance: float                Boxes closer than the tolerance overlap
+    Returns:
+        Root node of the plan (the target itself if no tool overlaps it) and the indexes of the skipped tools
+    """
+    target = BooleanNode("solid", -1, None, None, target_box, 1)
+    used = [index for index, box in enumerate(tool_boxes) if boxes_overlap(target_box, box, tolerance)]
+    skipped = [index for index, box in enumerate(tool_boxes) if not boxes_overlap(target_box, box, tolerance)]
+    if not used:
+        return target, skipped
+    tools = plan_union([tool_boxes[index] for index in used], tolerance, used)
+    return BooleanNode("subtract", -1, target, tools, target_box, 1 + tools.solids), skipped
+
+
+class GeometryBackend:
+    """
+    Geometry operations used by BatchBoolean, override them to run the plans against another geometry kernel
+    (e.g. a stand-in for testing without Allplan)
+    """
+
+    def union(self, a: Any, b: Any) -> Any:
+        raise NotImplementedError
+
+    def subtract(self, a: Any, b: Any) -> Any:
+        raise NotImplementedError
+
+    def box(self, solid: Any) -> Box:
+        raise NotImplementedError
+
+    def is_brep(self, solid: Any) -> bool:
+        return False
+
+    def to_brep(self, solid: Any) -> Any:
+        return solid
+
+    def from_brep(self, solid: Any) -> Any:
+        return solid
+
+
+class AllplanBackend(GeometryBackend):
+    """
+    Boolean operations of Allplan, for Polyhedron3D and BRep3D
+    """
+
+    def __init__(self, approximation: float=0.9):
+        """
+        Constructor for the AllplanBackend class
+
+        Parameters:
+            approximation: float    Tesselation precision when converting breps back to polyhedra,
+                                    in the range [0, 1], 0 is more precise
+        """
+        # Imported here, so the planning can be used without Allplan
+        import NemAll_Python_Geometry as AllplanGeo
+        self.geo = AllplanGeo
+        self.approximation = approximation
+
+    def union(self, a: Any, b: Any) -> Any:
+        err, result = self.geo.MakeUnion(a, b)
+        return self._check(err, result, "union")
+
+    def subtract(self, a: Any, b: Any) -> Any:
+        err, result = self.geo.MakeSubtraction(a, b)
+        return self._check(err, result, "subtraction")
+
+    def box(self, solid: Any) -> Box:
+        minmax = self.geo.CalcMinMax(solid)
+        if isinstance(minmax, tuple):
+            minmax = next(value for value in minmax if isinstance(value, self.geo.MinMax3D))
+        return box_from_minmax(minmax)
+
+    def is_brep(self, solid: Any) -> bool:
+        return isinstance(solid, self.geo.BRep3D)
+
+    def to_brep(self, solid: Any) -> Any:
+        if isinstance(solid, self.geo.BRep3D):
+            return solid
+        err, brep = self.geo.CreateBRep3D(solid)
+        return self._check(err, brep, "conversion to brep")
+
+    def from_brep(self, solid: Any) -> Any:
+        if not isinstance(solid, self.geo.BRep3D):
+            return solid
+        settings = self.geo.ApproximationSettings(self.geo.ASET_BREP_TESSELATION, self.approximation)
+        err, polyhedron = self.geo.CreatePolyhedron(solid, settings)
+        return self._check(err, polyhedron, "conversion to polyhedron")
+
+    def _check(self, err, result: Any, operation: str) -> Any:
+        if err != self.geo.eOK:
+            raise BooleanError(f"The {operation} failed!", err)
+        return result
+
+
+class BatchBoolean:
+    """
+    Boolean operations on many solids at once.
+
+    Instead of uniting or subtracting the solids one after another against the growing result, the operations are
+    planned from the bounding boxes of the solids: tools that do not touch the target are skipped, overlapping solids
+    are clustered and the solids are merged in a balanced tree. With many solids the operands are converted
+    to breps first, which are faster for boolean operations, and the result is converted back (unless the operands
+    already were breps).
+
+    The planning functions (plan_union(), plan_subtraction(), cluster_boxes()) only work with boxes and do not need
+    Allplan. The geometry is handled by a GeometryBackend, by default the Allplan one.
+
+    Usage example:
+        batch = BatchBoolean(brep_threshold=16)
+        wall = batch.subtract(wall, openings)
+        print(batch.stats())
+
+        # Boxes that are already known (e.g. from the topologies the solids were built from) save the CalcMinMax calls
+        wall = batch.subtract(wall, openings, boxes=[box_from_coordinates(t.coordinates) for t in topologies],
+                              target_box=box_from_minmax(self.drawing_minmax))
+    """
+
+    def __init__(self, backend: Optional[GeometryBackend]=None, tolerance: float=0, brep_threshold: Optional[int]=None):
+        """
+        Constructor for the BatchBoolean class
+
+        Parameters:
+            backend: GeometryBackend    Geometry operations, default = AllplanBackend()
+            tolerance: float            Boxes closer than the tolerance overlap
+            brep_threshold: int         Convert the operands to breps if a plan has at least this many solids,
+                                        default = None (never)
+        """
+        self.backend = backend if backend is not None else AllplanBackend()
+        self.tolerance = tolerance
+        self.brep_threshold = brep_threshold
+
+        # Counters
+        self.operations: int  = 0
+        self.skipped: int     = 0
+        self.conversions: int = 0
+        self.max_depth: int   = 0
+
+    def union(self, solids: Sequence[Any], boxes: Optional[Sequence[Box]]=None) -> Any:
+        """
+        Unites all the solids
+
+        Parameters:
+            solids: Sequence            Solids of the same type (polyhedra or breps)
+            boxes: Sequence[Box]        Optional bounding box of every solid, computed by the backend if not given
+        Throws:
+            BooleanError:       No solids were given, or any of the operations failed
+        Returns:
+            United solid
+        """
+        if not solids:
+            raise BooleanError("There are no solids to unite!")
+        boxes = self._boxes(solids, boxes)
+        return self.execute(plan_union(boxes, self.tolerance), solids)
+
+    def subtract(self, target: Any, tools: Sequence[Any], boxes: Optional[Sequence[Box]]=None,
+                 target_box: Optional[Box]=None) -> Any:
+        """
+        Subtracts all the tools from the target
+
+        Parameters:
+            target                      Solid the tools are subtracted from
+            tools: Sequence             Solids of the same type as the target
+            boxes: Sequence[Box]        Optional bounding box of every tool, computed by the backend if not given
+            target_box: Box             Optional bounding box of the target
+        Throws:
+            BooleanError:       Any of the operations failed
+        Returns:
+            Target without the tools, the target itself if no tool touches it
+        """
+        boxes = self._boxes(tools, boxes)
+        if target_box is None:
+            target_box = self.backend.box(target)
+        plan, skipped = plan_subtraction(target_box, boxes, self.tolerance)
+        self.skipped += len(skipped)
+        return self.execute(plan, tools, target)
+
+    def execute(self, plan: BooleanNode, solids: Sequence[Any], target: Any=None) -> Any:
+        """
+        Runs a plan created by plan_union() or plan_subtraction()
+
+        Parameters:
+            plan: BooleanNode       Root node of the plan
+            solids: Sequence        Solids referenced by the solid nodes
+            target: Any             Solid of the node with the index -1
+        Throws:
+            BooleanError:       Any of the operations failed
+        Returns:
+            Result of the plan
+        """
+        brep = self.brep_threshold is not None and plan.solids >= self.brep_threshold and plan.operation != "solid"
+        backend = self.backend
+        self.max_depth = max(self.max_depth, plan.depth)
+        # The result is only converted back if any of the operands was converted, breps stay breps
+        converted = False
+
+        def solid(index: int) -> Any:
+            nonlocal converted
+            value = target if index < 0 else solids[index]
+            if brep and not backend.is_brep(value):
+                self.conversions += 1
+                converted = True
+                value = backend.to_brep(value)
+            return value
+
+        def run(node: BooleanNode) -> Any:
+            if node.operation == "solid":
+                return solid(node.index)
+            left, right = run(node.left), run(node.right)
+            self.operations += 1
+            if node.operation == "union":
+                return backend.union(left, right)
+            return backend.subtract(left, right)
+
+        result = run(plan)
+        if converted:
+            self.conversions += 1
+            result = backend.from_brep(result)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the counters of all the operations done so far
+
+        Returns:
+            Dictionary with operations, skipped (tools not touching the target), conversions and max_depth
+        """
+        return {
+            "operations": self.operations,
+            "skipped": self.skipped,
+            "conversions": self.conversions,
+            "max_depth": self.max_depth,
+        }
+
+    def _boxes(self, solids: Sequence[Any], boxes: Optional[Sequence[Box]]) -> List[Box]:
+        if boxes is None:
+            return [self.backend.box(solid) for solid in solids]
+        if len(boxes) != len(solids):
+            raise BooleanError(f"Got {len(boxes)} boxes for {len(solids)} solids!")
+        return list(boxes)
@@ -0,0 +1,301 @@
+import threading
+import time
+from concurrent.futures import CancelledError, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+
+class BuildCancelled(Exception):
+    """
+    Raised by check_cancelled() inside a build that was superseded or cancelled
+    """
+
+    def __init__(self, message: str="The build was cancelled"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class BuildResult(NamedTuple):
+    """
+    Result of a finished build
+
+    Attributes:
+        generation: int     Number of the build, newer builds have higher numbers
+        value: Any          Value returned by the build function
+        context: Any        Context passed to submit(), e.g. the function finishing the result on the main thread
+        latency: float      Seconds from submitting the build until its result was available
+    """
+    generation: int
+    value: Any
+    context: Any
+    latency: float
+
+
+class _Job:
+    __slots__ = ("generation", "context", "submitted", "cancelled", "future")
+
+    def __init__(self, generation: int, context: Any):
+        self.generation = generation
+        self.context    = context
+        self.submitted  = time.perf_counter()
+        self.cancelled  = threading.Event()
+        self.future: Optional[Future] = None
+
+
+_current = threading.local()
+
+
+def check_cancelled() -> None:
+    """
+    Call regularly inside long builds, e.g. once per generated solid
+    Raises BuildCancelled if a newer build was submitted or the scheduler was cancelled, so the worker is freed early.
+    Outside of a build scheduled on a thread (e.g. in a process pool) it does nothing.
+
+    Throws:
+        BuildCancelled:     The running build is no longer needed
+    """
+    job = getattr(_current, "job", None)
+    if job is not None and job.cancelled.is_set():
+        raise BuildCancelled()
+
+
+def _run(job: _Job, function: Callable, args: tuple) -> Any:
+    if job.cancelled.is_set():
+        raise BuildCancelled()
+    _current.job = job
+    try:
+        return function(*args)
+    finally:
+        _current.job = None
+
+
+class BuildScheduler:
+    """
+    Runs the pure Python part of geometry builds in the background, independent of Allplan.
+
+    Every submitted build supersedes all older ones: builds that have not started yet are dropped, running builds are
+    asked to stop (see check_cancelled()) and their results are ignored. Only the result of the newest build is handed
+    back, so dragging a slider never queues up a backlog of full rebuilds.
+
+    The build function must not create Allplan objects, as they are not thread safe. It should return plain Python
+    data (e.g. a PolyhedronTopology or flat arrays), which is turned into model elements on the main thread.
+    With a ProcessPoolExecutor the function and its arguments have to be picklable, and running builds can't be
+    stopped early (their results are still dropped).
+
+    Counters:
+        submitted, completed    Number of submitted builds and builds whose result was handed back
+        superseded              Number of builds dropped or ignored because a newer build was submitted
+        failed                  Number of builds that raised an exception
+        max_queue_depth         Largest number of builds in flight at once
+        time_to_latest          Seconds from submitting the newest build until its result was available
+
+    Usage example:
+        scheduler = BuildScheduler()
+        scheduler.submit(build_topology, width, height)     # e.g. on every slider change
+        ...
+        result = scheduler.poll()                           # newest finished result, or None (does not block)
+        result = scheduler.wait()                           # waits for the newest build
+        scheduler.shutdown()
+    """
+
+    def __init__(self, executor: Optional[Executor]=None, max_workers: int=1):
+        """
+        Constructor for the BuildScheduler class
+
+        Parameters:
+            executor: Executor  Optional executor running the builds, by default a ThreadPoolExecutor is created
+            max_workers: int    Number of worker threads of the created executor, default = 1
+        """
+        self._own_executor = executor is None
+        self.executor: Executor = ThreadPoolExecutor(max_workers, "BuildScheduler") if executor is None else executor
+        self._pass_job = not isinstance(self.executor, ProcessPoolExecutor)
+
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._generation: int = 0
+        self._jobs: Dict[int, _Job] = {}
+        # Newest finished result that was not handed back yet, and its generation
+        self._latest: Optional[BuildResult] = None
+        self._latest_error: Optional[BaseException] = None
+        self._finished_generation: int = 0
+
+        # Counters
+        self.submitted: int         = 0
+        self.completed: int         = 0
+        self.superseded: int        = 0
+        self.failed: int            = 0
+        self.max_queue_depth: int   = 0
+        self.time_to_latest: Optional[float] = None
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        Number of builds that are queued or running, including superseded builds that are still running
+        """
+        with self._lock:
+            return len(self._jobs)
+
+    @property
+    def generation(self) -> int:
+        """
+        Number of the newest submitted build
+        """
+        return self._generation
+
+    @property
+    def busy(self) -> bool:
+        """
+        Is the newest build still queued or running
+        """
+        with self._lock:
+            return self._generation in self._jobs
+
+    def submit(self, function: Callable, *args: Any, context: Any=None) -> int:
+        """
+        Submits a build and supersedes all older builds
+
+        Parameters:
+            function: Callable  Build function, called with args in a worker
+            args: Any           Arguments of the function
+            context: Any        Anything needed to finish the result, returned in the BuildResult
+        Returns:
+            Generation of the submitted build
+        """
+        with self._lock:
+            cancelled = self._cancel_jobs()
+            self._generation += 1
+            job = _Job(self._generation, context)
+            self._jobs[job.generation] = job
+            self.submitted += 1
+            self.max_queue_depth = max(self.max_queue_depth, len(self._jobs))
+        self._cancel_futures(cancelled)
+
+        if self._pass_job:
+            job.future = self.executor.submit(_run, job, function, args)
+        else:
+            job.future = self.executor.submit(function, *args)
+        job.future.add_done_callback(lambda future: self._finished(job, future))
+        return job.generation
+
+    def poll(self) -> Optional[BuildResult]:
+        """
+        Get the newest finished result, without waiting
+        Every result is handed back only once, and never a result older than one already handed back
+
+        Throws:
+            Exception:  The exception raised by the newest finished build
+        Returns:
+            Newest finished result, None if there is no new result
+        """
+        with self._lock:
+            return self._take()
+
+    def wait(self, timeout: Optional[float]=None) -> Optional[BuildResult]:
+        """
+        Waits for the newest submitted build and gets its result
+
+        Parameters:
+            timeout: float      Maximal number of seconds to wait, None waits until the build is finished
+        Throws:
+            Exception:  The exception raised by the newest build
+        Returns:
+            Result of the newest build, None if there is no new result (nothing submitted, already handed back,
+            cancelled or timed out)
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._generation not in self._jobs, timeout)
+            if self._latest is not None and self._latest.generation != self._generation:
+                return None
+            return self._take()
+
+    def cancel(self) -> int:
+        """
+        Cancels all builds and drops the results that were not handed back yet
+
+        Returns:
+            Number of cancelled builds
+        """
+        with self._condition:
+            cancelled = self._cancel_jobs()
+            self._latest = None
+            self._latest_error = None
+            # Results of the cancelled builds are never handed back
+            self._finished_generation = self._generation
+            self._condition.notify_all()
+        self._cancel_futures(cancelled)
+        return len(cancelled)
+
+    def shutdown(self, wait: bool=False) -> None:
+        """
+        Cancels all builds and shuts down the executor, if it was created by the scheduler
+
+        Parameters:
+            wait: bool  Wait until the running builds are stopped
+        """
+        self.cancel()
+        if self._own_executor:
+            self.executor.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the counters of the scheduler
+
+        Returns:
+            Dictionary with submitted, completed, superseded, failed, queue_depth, max_queue_depth and time_to_latest
+        """
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "superseded": self.superseded,
+            "failed": self.failed,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "time_to_latest": self.time_to_latest,
+        }
+
+    def _cancel_jobs(self) -> List[_Job]:
+        # Has to be called with the lock held
+        cancelled = []
+        for job in self._jobs.values():
+            if not job.cancelled.is_set():
+                job.cancelled.set()
+                cancelled.append(job)
+        self.superseded += len(cancelled)
+        return cancelled
+
+    @staticmethod
+    def _cancel_futures(jobs: List[_Job]) -> None:
+        # Has to be called without the lock, as cancelling a queued future calls _finished() immediately
+        for job in jobs:
+            if job.future is not None:
+                job.future.cancel()
+
+    def _take(self) -> Optional[BuildResult]:
+        # Has to be called with the lock held
+        result, error = self._latest, self._latest_error
+        self._latest, self._latest_error = None, None
+        if error is not None:
+            raise error
+        if result is not None:
+            self.completed += 1
+        return result
+
+    def _finished(self, job: _Job, future: Future) -> None:
+        latency = time.perf_counter() - job.submitted
+        with self._condition:
+            self._jobs.pop(job.generation, None)
+            # Results of superseded builds and builds older than the handed back result are dropped
+            if not job.cancelled.is_set() and job.generation > self._finished_generation:
+                try:
+                    value = future.result()
+                except (BuildCancelled, CancelledError):
+                    pass
+                except Exception as err:
+                    self.failed += 1
+                    self._finished_generation = job.generation
+                    self._latest, self._latest_error = None, err
+                else:
+                    self._finished_generation = job.generation
+                    self._latest = BuildResult(job.generation, value, job.context, latency)
+                    self._latest_error = None
+                    self.time_to_latest = latency
+            self._condition.notify_all()
@@ -0,0 +1,203 @@
+from collections import deque
+from typing import Any, Callable, Dict, List, NamedTuple, Set, Tuple
+
+
+class DependencyError(Exception):
+    """
+    Error class for the DependencyGraph
+    """
+
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+
+class Dependencies(NamedTuple):
+    """
+    Dependencies declared by the depends_on decorator
+
+    Attributes:
+        names: Tuple[str]   Names of the parameters and other nodes the node depends on
+        output: bool        Is the result of the node a part of the created elements or only an intermediate stage
+    """
+    names: Tuple[str, ...]
+    output: bool
+
+
+def depends_on(*names: str, output: bool=True) -> Callable:
+    """
+    Decorator declaring on which palette parameters (and other nodes) a method depends
+    The Interactor builds a DependencyGraph from all the decorated methods, and when a parameter changes
+    only the methods depending on it (directly or through other nodes) are called again
+
+    Usage example:
+        class MyInteractor(Interactor):
+            # Intermediate stage, its result can be fetched with self.stage("profile")
+            @depends_on("width", "height", output=False)
+            def profile(self):
+                return make_profile(self.get_value("width"), self.get_value("height"))
+
+            # Output node, returns a list of model elements, or a tuple of model elements and handles
+            @depends_on("profile", "length")
+            def body(self):
+                return [AllplanBasisElements.ModelElement3D(self.com_prop, extrude(self.stage("profile"), self.get_value("length")))]
+
+    Parameters:
+        names: str      Names of the parameters and nodes
+        output: bool    True if the node returns elements that are created, False for intermediate stages
+    """
+    def decorator(function: Callable) -> Callable:
+        function._depends_on = Dependencies(tuple(names), output)
+        return function
+    return decorator
+
+
+class DependencyGraph:
+    """
+    Graph of nodes (functions without arguments) and the names they depend on, independent of Allplan.
+    The result of every node is kept until one of its dependencies is invalidated, so only the dirty nodes are evaluated.
+
+    Counters:
+        rebuilt, reused             Number of nodes evaluated / not evaluated in the last evaluate_outputs()
+        total_rebuilt, total_reused Sums over all the calls of evaluate_outputs()
+    """
+
+    def __init__(self):
+        self._functions: Dict[str, Callable[[], Any]]   = {}
+        self._dependencies: Dict[str, Tuple[str, ...]]  = {}
+        # Parameter or node name -> nodes that depend on it
+        self._dependents: Dict[str, List[str]]          = {}
+        self._results: Dict[str, Any]                   = {}
+        self._dirty: Set[str]                           = set()
+        self._evaluating: List[str]                     = []
+        self.outputs: List[str]                         = []
+
+        self.rebuilt: int       = 0
+        self.reused: int        = 0
+        self.total_rebuilt: int = 0
+        self.total_reused: int  = 0
+
+    @classmethod
+    def from_object(cls, obj: Any) -> "DependencyGraph":
+        """
+        Creates a graph from all the methods of the object decorated with depends_on
+        The output nodes are ordered as they are defined, base classes first
+        """
+        graph = cls()
+        seen = set()
+        for klass in reversed(type(obj).__mro__):
+            for name, function in vars(klass).items():
+                dependencies = getattr(function, "_depends_on", None)
+                if isinstance(dependencies, Dependencies) and name not in seen:
+                    seen.add(name)
+                    graph.add(name, getattr(obj, name), dependencies.names, dependencies.output)
+        return graph
+
+    def __len__(self) -> int:
+        return len(self._functions)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._functions
+
+    def add(self, name: str, function: Callable[[], Any], dependencies: Tuple[str, ...]=(), output: bool=True) -> None:
+        """
+        Adds a node, which is dirty until it is evaluated for the first time
+
+        Parameters:
+            name: str                   Name of the node
+            function: Callable          Function without arguments computing the result of the node
+            dependencies: Tuple[str]    Names of the parameters and nodes the node depends on
+            output: bool                Is the node an output, see evaluate_outputs()
+        Throws:
+            DependencyError:    A node with the same name already exists
+        """
+        if name in self._functions:
+            raise DependencyError(f"Node {name} already exists!")
+        self._functions[name] = function
+        self._dependencies[name] = tuple(dependencies)
+        for dependency in dependencies:
+            self._dependents.setdefault(dependency, []).append(name)
+        self._dirty.add(name)
+        if output:
+            self.outputs.append(name)
+
+    def invalidate(self, name: str) -> int:
+        """
+        Marks all the nodes depending (directly or indirectly) on the name as dirty
+
+        Parameters:
+            name: str   Name of a parameter or node
+        Returns:
+            Number of nodes that became dirty
+        """
+        count = 0
+        if name in self._functions and name not in self._dirty:
+            self._dirty.add(name)
+            count += 1
+        queue = deque(self._dependents.get(name, ()))
+        while queue:
+            node = queue.popleft()
+            if node in self._dirty:
+                continue
+            self._dirty.add(node)
+            count += 1
+            queue.extend(self._dependents.get(node, ()))
+        return count
+
+    def invalidate_all(self) -> None:
+        """
+        Marks all nodes as dirty
+        """
+        self._dirty.update(self._functions)
+
+    def is_dirty(self, name: str) -> bool:
+        return name in self._dirty
+
+    def get(self, name: str) -> Any:
+        """
+        Get the result of the node, the node is evaluated only if it is dirty
+
+        Parameters:
+            name: str   Name of the node
+        Throws:
+            DependencyError:    The node does not exist or depends on itself
+        Returns:
+            Result of the node
+        """
+        if name not in self._dirty:
+            try:
+                return self._results[name]
+            except KeyError:
+                raise DependencyError(f"Node {name} does not exist!") from None
+
+        if name in self._evaluating:
+            raise DependencyError(f"Node {name} depends on itself: {' -> '.join(self._evaluating + [name])}")
+        # Dirty node dependencies are evaluated first, so a failing node does not leave its inputs dirty
+        self._evaluating.append(name)
+        try:
+            for dependency in self._dependencies[name]:
+                if dependency in self._dirty:
+                    self.get(dependency)
+            result = self._functions[name]()
+        finally:
+            self._evaluating.pop()
+
+        self._results[name] = result
+        self._dirty.discard(name)
+        self.rebuilt += 1
+        return result
+
+    def evaluate_outputs(self) -> List[Any]:
+        """
+        Get the results of all output nodes, evaluating only the dirty ones (and the dirty stages they use)
+        The rebuilt and reused counters are set for this call
+
+        Returns:
+            Results of the output nodes, in the order they were added
+        """
+        self.rebuilt = 0
+        results = [self.get(name) for name in self.outputs]
+        self.reused = len(self._functions) - self.rebuilt
+        self.total_rebuilt += self.rebuilt
+        self.total_reused += self.reused
+        return results
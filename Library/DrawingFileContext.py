@@ -4,42 +4,197 @@
 #                                      #
 ########################################
 
+from collections import Counter
+from typing import Any, Dict, Optional
+
 import NemAll_Python_BaseElements as AllplanBaseElements
 
+
+class DrawingFileContextError(Exception):
+    """
+    Error class for the DrawingFileContext
+    """
+
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+
+class TrackedDrawingFileService:
+    """
+    Wrapper of a DrawingFileService, returned by DrawingFileContext
+
+    Keeps track of the load state of the drawing files changed with LoadFile, UnloadFile and UnloadAll,
+    so the context only has to restore the differences. All other attributes are taken from the wrapped service.
+    Every call of a service function is counted in calls.
+    """
+
+    def __init__(self, service, state: Dict[int, Any]) -> None:
+        """
+        Constructor for the TrackedDrawingFileService class
+
+        Parameters:
+            service: DrawingFileService     Wrapped service
+            state: Dict[int, Any]           Drawing file index -> DrawingFileLoadState of the loaded files,
+                                            None if the state is not known
+        """
+        self.service = service
+        self.state   = state
+        self.calls   = Counter()
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.service, name)
+        if not callable(attribute):
+            return attribute
+
+        def counted(*args, **kwargs):
+            self.calls[name] += 1
+            return attribute(*args, **kwargs)
+        return counted
+
+    def GetFileState(self):
+        self.calls["GetFileState"] += 1
+        return self.service.GetFileState()
+
+    def LoadFile(self, doc, index: int, state) -> None:
+        self.calls["LoadFile"] += 1
+        self.service.LoadFile(doc, index, state)
+        # Loading a file in the foreground can change the state of the file that was in the foreground before
+        if state == AllplanBaseElements.DrawingFileLoadState.ActiveForeground:
+            for other, other_state in self.state.items():
+                if other_state == state:
+                    self.state[other] = None
+        self.state[index] = state
+
+    def UnloadFile(self, doc, index: int) -> None:
+        self.calls["UnloadFile"] += 1
+        self.service.UnloadFile(doc, index)
+        self.state.pop(index, None)
+
+    def UnloadAll(self, doc) -> None:
+        self.calls["UnloadAll"] += 1
+        self.service.UnloadAll(doc)
+        self.state.clear()
+
+    def restore(self, doc, target: Dict[int, Any]) -> None:
+        """
+        Restores the load state of the drawing files with as few service calls as possible
+
+        Files with a different state are loaded first and the files not in the target are unloaded afterwards,
+        so at least one file stays loaded. If that needs more calls than unloading all and loading the target,
+        the latter is done.
+
+        Parameters:
+            doc: DocumentAdapter            Document adapter
+            target: Dict[int, Any]          Drawing file index -> DrawingFileLoadState
+        """
+        loads   = [(index, state) for index, state in target.items() if self.state.get(index) != state]
+        unloads = [index for index in self.state if index not in target]
+
+        if len(loads) + len(unloads) > 1 + len(target):
+            self.UnloadAll(doc)
+            loads, unloads = list(target.items()), []
+        for index, state in loads:
+            self.LoadFile(doc, index, state)
+        for index in unloads:
+            self.UnloadFile(doc, index)
+
+
+class _Shared:
+    """
+    Tracked service of the outermost DrawingFileContext, shared by the nested contexts
+    """
+
+    def __init__(self, service: TrackedDrawingFileService) -> None:
+        self.service = service
+        self.count   = 0
+
+
 class DrawingFileContext:
     """
     Class for saving the current context of the drawing files.
 
     Arguments:
         doc: DocumentAdapter    Document adapter from the program that is calling the initializer
+        unload: bool            Should all drawing files be unloaded on entering, default = True
+        df_service:             Optional DrawingFileService to use, default = a new AllplanBaseElements.DrawingFileService()
+                                Nested contexts use the service of the outermost one, another service can't be passed
 
     Documentation available on github
     """
 
-    def __init__(self, doc) -> None:
+    # Document -> tracked service of the outermost context, the document is kept until the outermost context exits
+    _shared: Dict[Any, _Shared] = {}
+
+    def __init__(self, doc, unload: bool=True, df_service=None) -> None:
         # Inintialization
         self.doc = doc
-        self.df_service = AllplanBaseElements.DrawingFileService()
+        self.unload = unload
+        self.df_service = df_service
+        self.entry_state: Optional[Dict[int, Any]] = None
+        self.tracked: Optional[TrackedDrawingFileService] = None
 
     def __enter__(self):
-        # Save context and unload all files
-        self.context = self.df_service.GetFileState()
-        self.df_service.UnloadAll(self.doc)
-        # Return DrawingFileService as it is probably going to be useful
-        return self.df_service
-        
+        """
+        Throws:
+            DrawingFileContextError:    A nested context was given another DrawingFileService than the outermost one
+        """
+        shared = self._shared.get(self.doc)
+        if shared is None:
+            # Outermost context, get the state of the drawing files from the service
+            service = self.df_service if self.df_service is not None else AllplanBaseElements.DrawingFileService()
+            tracked = TrackedDrawingFileService(service, {})
+            tracked.state.update(self.file_state(tracked.GetFileState()))
+            shared = self._shared[self.doc] = _Shared(tracked)
+        elif self.df_service is not None and self.df_service is not shared.service \
+                and self.df_service is not shared.service.service:
+            raise DrawingFileContextError("A nested DrawingFileContext has to use the DrawingFileService "
+                                          "of the outermost context!")
+        elif None in shared.service.state.values():
+            # Nested context after a state became unknown, get it from the service again
+            shared.service.state = self.file_state(shared.service.GetFileState())
+
+        # Nested contexts take the tracked state, the service is not asked again
+        shared.count += 1
+        self.tracked = shared.service
+        self.entry_state = dict(self.tracked.state)
+        if self.unload and self.tracked.state:
+            self.tracked.UnloadAll(self.doc)
+        # Return the DrawingFileService as it is probably going to be useful
+        return self.tracked
+
     def __exit__(self, type, value, traceback):
+        # Load and unload only the drawing files changed in the block
+        shared = self._shared[self.doc]
+        try:
+            self.tracked.restore(self.doc, self.entry_state)
+        finally:
+            shared.count -= 1
+            if shared.count == 0:
+                del self._shared[self.doc]
+
+    @staticmethod
+    def file_state(file_state) -> Dict[int, Any]:
+        """
+        Converts the result of GetFileState() to a dictionary
+
+        Parameters:
+            file_state:     Pairs of drawing file index and state number
+        Returns:
+            Drawing file index -> DrawingFileLoadState, entries without a valid state are left out
+        """
         # Get the mappings int -> DrawingFileLoadState
-        state_map =  AllplanBaseElements.DrawingFileLoadState.values
-        # Unload all curretnly active drawing files
-        self.df_service.UnloadAll(self.doc)
-        # For every drawing file in context set the value to the one before the transaction
-        for index, state_val in self.context:
-            # Check if the state is valid, sometimes the state is -1 which does not have a corresponding value
-            # In case an invalid value is given, ignore
-            if state_val not in state_map:
-                continue
-            state = state_map[state_val]
-            self.df_service.LoadFile(self.doc, index, state)
+        state_map = AllplanBaseElements.DrawingFileLoadState.values
+        # Sometimes the state is -1 which does not have a corresponding value, such files are ignored
+        return {index: state_map[state_val] for index, state_val in file_state if state_val in state_map}
 
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the number of service calls made through the context and its block, shared by the nested contexts
 
+        Returns:
+            Dictionary with the number of calls by function name and the total number of calls
+        """
+        calls = dict(self.tracked.calls) if self.tracked is not None else {}
+        calls["total"] = sum(calls.values())
+        return calls
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+import NemAll_Python_BaseElements as AllplanBaseElements
+
+from .AtomicFile import atomic_write
+from .DrawingFileContext import DrawingFileContext
+
+
+# DWG versions accepted by ExportDWG, see Documentation/DrawingFileService.md
+DWG_VERSIONS = (12, 13, 14, 2000, 2004, 2007, 2010, 2013, 2018)
+
+# Version of the manifest file, manifests with another version are ignored
+_MANIFEST_VERSION = 1
+
+
+class DwgExportError(Exception):
+    """
+    Raised when the batch export can not be started
+
+    Attributes:
+        message: str    Message of the exception
+    """
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+
+class ExportResult(NamedTuple):
+    """
+    Result of the export of one drawing file
+
+    Attributes:
+        index: int          Index of the drawing file
+        path: str           Path of the DWG file
+        status: str         One of "exported", "unchanged" (the source hash did not change), "resumed" (exported by
+                            the interrupted run that was resumed) or "failed"
+        seconds: float      Time spent on the file, including loading and hashing
+        error: str          Message of the exception if the export failed, otherwise None
+    """
+    index: int
+    path: str
+    status: str
+    seconds: float
+    error: Optional[str] = None
+
+
+def file_hash(path: str, chunk_size: int=2**20) -> str:
+    """
+    Hashes the content of a file, e.g. to use as source_hash of export_dwg_batch()
+
+    Parameters:
+        path: str           Path of the file
+        chunk_size: int     Number of bytes read at once
+    Returns:
+        Hex digest of the content
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def order_exports(indices: Iterable[int], file_state: Dict[int, Any]) -> List[int]:
+    """
+    Orders the drawing files for the export, so the load state changes as few times as possible
+    The file in the foreground is exported first without loading, the rest by ascending index, duplicates are removed
+
+    Parameters:
+        indices: Iterable[int]          Indexes of the drawing files
+        file_state: Dict[int, Any]      Current drawing file index -> DrawingFileLoadState
+    Returns:
+        Indexes in the export order
+    """
+    foreground = AllplanBaseElements.DrawingFileLoadState.ActiveForeground
+    return sorted(set(indices), key=lambda index: (file_state.get(index) != foreground, index))
+
+
+def export_dwg_batch(doc, indices: Iterable[int], version: int, directory: str, config: Optional[str]=None,
+                     manifest: Optional[str]=None, source_hash: Optional[Callable[[int], str]]=None, resume: bool=True,
+                     file_name: str="drawing_file_{index}.dwg", df_service=None) -> List[ExportResult]:
+    """
+    Exports many drawing files to DWG files, each one into its own file
+
+    The drawing files are loaded one after the other in the foreground inside a DrawingFileContext, so the state
+    of the drawing files is restored afterwards. A JSON manifest in the directory records the hash of every exported
+    DWG file and is saved after every file, hence:
+        - with source_hash, files whose source hash did not change since their last export are skipped
+        - after a crash the same call continues the interrupted run, files it already exported are skipped
+    A skipped file is only trusted if its DWG file still exists with the recorded hash and the same version and config.
+
+    Usage example:
+        results = export_dwg_batch(doc, range(1, 301), 2018, "C:/Export",
+                                   source_hash=lambda index: file_hash(drawing_file_path(index)))
+        for result in results:
+            print(result.index, result.status, f"{result.seconds:.2f} s")
+
+    Parameters:
+        doc: DocumentAdapter            Document adapter
+        indices: Iterable[int]          Indexes of the drawing files to export
+        version: int                    DWG version, one of DWG_VERSIONS (Allplan crashes without a version)
+        directory: str                  Directory of the DWG files, created if it does not exist
+        config: str                     Path of the export config, default = nx_AllFT_AutoCad.cfg in the Allplan usr path
+        manifest: str                   Path of the manifest, default = manifest.json in the directory
+        source_hash: Callable[[int], str]   Optional function returning a hash of the content of a drawing file,
+                                            e.g. file_hash() of the drawing file in the project folder
+        resume: bool                    Should an interrupted run be continued, default = True
+        file_name: str                  Name of the DWG files, formatted with the index
+        df_service:                     Optional DrawingFileService to use, default = a new DrawingFileService
+    Throws:
+        DwgExportError:     The version is not valid
+    Returns:
+        ExportResult of every drawing file in the export order
+    """
+    if version not in DWG_VERSIONS:
+        raise DwgExportError(f"DWG version {version} is not valid, use one of {', '.join(map(str, DWG_VERSIONS))}!")
+    if config is None:
+        # Imported here, so the export can be tested with a stand-in DrawingFileService
+        import NemAll_Python_AllplanSettings as AllplanSettings
+        config = os.path.join(AllplanSettings.AllplanPaths.GetUsrPath(), "nx_AllFT_AutoCad.cfg")
+    os.makedirs(directory, exist_ok=True)
+    if manifest is None:
+        manifest = os.path.join(directory, "manifest.json")
+
+    data = _load_manifest(manifest)
+    run = data.get("run")
+    if not resume or run is None or run["finished"]:
+        run = data["run"] = {"id": uuid.uuid4().hex, "finished": False}
+    files = data["files"]
+
+    results = []
+    foreground = AllplanBaseElements.DrawingFileLoadState.ActiveForeground
+    with DrawingFileContext(doc, unload=False, df_service=df_service) as service:
+        entry_state = dict(service.state)
+        previous = None
+        for index in order_exports(indices, service.state):
+            start = time.perf_counter()
+            path = os.path.join(directory, file_name.format(index=index))
+            entry = files.get(str(index))
+            try:
+                source = source_hash(index) if source_hash is not None else None
+                status = _skip_status(entry, path, version, config, source, run["id"])
+                if status is None:
+                    if service.state.get(index) != foreground:
+                        service.LoadFile(doc, index, foreground)
+                        # Files loaded only for the export are unloaded again, the rest is restored by the context
+                        if previous is not None and previous not in entry_state:
+                            service.UnloadFile(doc, previous)
+                        previous = index
+                    service.ExportDWG(doc, path, config, version)
+                    files[str(index)] = {"path": path, "dwg": file_hash(path), "source": source, "version": version,
+                                         "config": config, "run": run["id"]}
+                    _save_manifest(manifest, data)
+                    status = "exported"
+                results.append(ExportResult(index, path, status, time.perf_counter() - start))
+            except Exception as exception:
+                results.append(ExportResult(index, path, "failed", time.perf_counter() - start, str(exception)))
+
+    run["finished"] = True
+    _save_manifest(manifest, data)
+    return results
+
+
+def _skip_status(entry: Optional[Dict[str, Any]], path: str, version: int, config: str, source: Optional[str],
+                 run_id: str) -> Optional[str]:
+    if entry is None or entry["path"] != path or entry["version"] != version or entry["config"] != config:
+        return None
+    if source is not None and entry["source"] == source:
+        status = "unchanged"
+    elif entry["run"] == run_id:
+        status = "resumed"
+    else:
+        return None
+    # The DWG file could have been deleted or modified since
+    if not os.path.isfile(path) or file_hash(path) != entry["dwg"]:
+        return None
+    return status
+
+
+def _load_manifest(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        data = None
+    if not isinstance(data, dict) or data.get("version") != _MANIFEST_VERSION:
+        data = {"version": _MANIFEST_VERSION, "run": None, "files": {}}
+    return data
+
+
+def _save_manifest(path: str, data: Dict[str, Any]) -> None:
+    with atomic_write(path) as file:
+        json.dump(data, file, indent=1)
@@ -4,16 +4,61 @@
 #                                      #
 ########################################
 
-import NemAll_Python_IFW_Input as AllplanIFW
-import NemAll_Python_BaseElements as AllplanBaseElements
-import NemAll_Python_Geometry as AllplanGeo
+import importlib
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
 
-from BuildingElementPaletteService import BuildingElementPaletteService
-from BuildingElementService import BuildingElementService
+from .DependencyGraph import DependencyGraph, depends_on
+from .PreviewThrottle import PreviewThrottle
+from .PypDescriptor import PypDescriptor, PypDescriptorError, load_descriptor
+from .Tracing import Tracer
 
-import xml.etree.ElementTree as ET
-import os
-from typing import Any, Callable, Dict
+if TYPE_CHECKING:
+    import xml.etree.ElementTree as ET
+    from .BuildScheduler import BuildResult, BuildScheduler
+
+
+class _LazyModule:
+    """
+    Module imported on the first attribute access, it then replaces itself in the globals of this module,
+    so later accesses cost nothing
+    """
+
+    def __init__(self, module_name: str, alias: str):
+        self._module_name   = module_name
+        self._alias         = alias
+
+    def __getattr__(self, name: str) -> Any:
+        module = importlib.import_module(self._module_name)
+        globals()[self._alias] = module
+        return getattr(module, name)
+
+
+# Default startup mode, with lazy startup the pyp file is loaded and the handlers bound when the first event arrives,
+# and the Allplan modules are imported when they are used first, e.g. AllplanIFW only for set_hint()
+LAZY_STARTUP = False
+
+if LAZY_STARTUP:
+    AllplanIFW              = _LazyModule("NemAll_Python_IFW_Input", "AllplanIFW")
+    AllplanBaseElements     = _LazyModule("NemAll_Python_BaseElements", "AllplanBaseElements")
+    AllplanGeo              = _LazyModule("NemAll_Python_Geometry", "AllplanGeo")
+else:
+    import NemAll_Python_IFW_Input as AllplanIFW
+    import NemAll_Python_BaseElements as AllplanBaseElements
+    import NemAll_Python_Geometry as AllplanGeo
+
+
+# Default directory of the compiled pyp descriptors, see PypDescriptor
+PYP_CACHE_DIRECTORY = os.path.join(tempfile.gettempdir(), "PythonParts", "PypCache")
+# Default minimal time between two preview frames in seconds, see PreviewThrottle
+PREVIEW_FRAME_BUDGET = 1 / 30
+# Default time create() waits for a background build in seconds, then the build is run on the main thread
+BUILD_TIMEOUT = 30.0
+# Path of the Chrome trace written when the Interactor is closed, tracing is disabled if it is not set, see Tracing
+TRACE_PATH = os.environ.get("PYTHONPARTS_TRACE")
 
 
 class InteractorError(Exception):
@@ -33,7 +78,12 @@ class Interactor:
     """
 
 
-    def __init__(self, name: str, coord_input, pyp_path, str_table_service, build_ele_list, build_ele_composite, control_props_list, modify_uuid_list) -> None:
+    def __init__(self, name: str, coord_input, pyp_path, str_table_service, build_ele_list, build_ele_composite, control_props_list, modify_uuid_list,
+                 pyp_cache_directory: Optional[str]=PYP_CACHE_DIRECTORY, trace_path: Optional[str]=TRACE_PATH,
+                 lazy_startup: bool=LAZY_STARTUP) -> None:
+        start = time.perf_counter()
+        # Handler latencies, palette updates and build times, only recorded if a trace path is given
+        self.tracer                 = Tracer(trace_path is not None, trace_path)
         # Set path
         self.pyp_path               = pyp_path
         # Check if the name includes pyp
@@ -52,15 +102,18 @@ class Interactor:
         # Set variables
         self.coord_input            = coord_input
         self.str_table_service      = str_table_service
-        self.build_ele_service      = BuildingElementService()        
+        from BuildingElementService import BuildingElementService
+        self.build_ele_service      = BuildingElementService()
         self.build_ele_composite    = build_ele_composite
         self.build_ele_list         = build_ele_list
         self.build_ele              = self.build_ele_list[0]
         self.control_props_list     = control_props_list
         self.modify_uuid_list       = modify_uuid_list
 
-        self.drawing_minmax         = AllplanGeo.MinMax3D()
+        # Geometry objects, created on first use so the startup does not need the Geometry module
+        self._drawing_minmax        = None
         # Create Palette service, and initial show
+        from BuildingElementPaletteService import BuildingElementPaletteService
         self.palette_service        = BuildingElementPaletteService(
                                                 self.build_ele_list, 
                                                 self.build_ele_composite, 
@@ -69,43 +122,166 @@ class Interactor:
                                                 self.pyp_file
                                                 )
         self.palette_service.show_palette(self.pyp_file)
+        self._startup: Dict[str, Optional[float]] = {"show_palette": time.perf_counter() - start}
 
         self.model_ele_list, self.handles_list = [], []
-
-        # Link buttons and other fields to functions
-        self.element_tree = ET.parse(self.pyp_file)
-        root = self.element_tree.getroot()
+        # Results of the depends_on outputs and of the newest background build, merged into the lists by _set_elements()
+        self._output_results: List[Any]     = []
+        self._background_result: Any        = None
+
+        # Palette updates requested inside batch() are deferred and done once at the end of the batch
+        self._batch_depth: int              = 0
+        self._palette_dirty: bool           = False
+        # Values from before the batch, restored if the batch fails
+        self._batch_undo: Dict[str, Any]    = {}
+        self.palette_update_count: int      = 0
+
+        # Link buttons and other fields to functions, see bind()
+        # pyp_cache_directory=None keeps the compiled descriptors in memory only
+        self.pyp_cache_directory                                = pyp_cache_directory
+        self._descriptor: Optional[PypDescriptor]               = None
+        self._element_tree: Optional["ET.ElementTree"]          = None
         # Functions called when an event occurs
-        self.event_functions: Dict[int, Callable] = {}
+        self._event_functions: Optional[Dict[int, Callable]]    = None
         # Functions called when a value is modified
-        self.modify_functions: Dict[int, Callable] = {}
-
-        # ToDo: Add checking of pallette files and #include files
-        for child in root.iter("Parameter"):
-            type_find = child.find("ValueType")
-            if type_find.text in ["Button", "PictureButton", "PictureResourceButton"]:
-                # Events occur when a button is pressed
-                # Get event id and name, and check if the event id has been already used
-                event_id = int(child.find("EventId").text)
-                func_name = child.find("Name").text
-                if event_id in self.event_functions:
-                    raise InteractorError(f"File {self.name}.pyp contains several buttons with EventId={event_id}")
-                # Check if function exists
-                if not hasattr(self, func_name):
-                    raise InteractorError(f"The class {type(self).__name__} does not contain function {func_name}!")
-                # Assign function
-                self.event_functions[event_id] = getattr(self, func_name)
-            else:
-                # For everything else modify_element_property function is called
-                # Check for potential function name
-                func_name = child.find("Name")
-
-                if func_name is None:
-                    continue
-                func_name = func_name.text
-                # Assign function if it exists
-                if hasattr(self, func_name):
-                    self.modify_functions[func_name] = getattr(self, func_name)
+        self._modify_functions: Optional[Dict[str, Callable]]   = None
+        if not lazy_startup:
+            self.bind()
+
+        # Methods decorated with depends_on, only the ones depending on a modified value are called again
+        self.dependency_graph = DependencyGraph.from_object(self)
+        # Background builds, the scheduler is created by the first schedule_build() call
+        self.build_scheduler: Optional["BuildScheduler"] = None
+        self.build_timeout: float                        = BUILD_TIMEOUT
+        # Newest scheduled build (build, args, finish), run on the main thread if create() can't take its result
+        self._scheduled_build: Optional[tuple]           = None
+        # Last error of a build taken by create(), it is reported instead of raised
+        self.build_error: Optional[Exception]            = None
+
+        # Preview, drawn at most once per frame budget from the elements of create_preview(), see draw_preview()
+        # Only drawn by the Interactor if the subclass overrides create_preview() or sets preview_enabled
+        self.preview_enabled: bool              = type(self).create_preview is not Interactor.create_preview
+        self.preview_throttle                   = PreviewThrottle(PREVIEW_FRAME_BUDGET)
+        self.preview_lod: float                 = 0.0
+        self._preview_matrix                    = None
+        self._preview_elements: Optional[list]  = None
+
+        # Allplan shows the palette only after the Interactor was created, hence this is the time to the first palette
+        self._startup["first_palette"] = time.perf_counter() - start
+        self.tracer.record("startup/first_palette", self._startup["first_palette"], "startup", start=start)
+
+    @property
+    def drawing_minmax(self):
+        """
+        Bounding box of the drawing, an empty AllplanGeo.MinMax3D until it is set
+        """
+        if self._drawing_minmax is None:
+            self._drawing_minmax = AllplanGeo.MinMax3D()
+        return self._drawing_minmax
+
+    @drawing_minmax.setter
+    def drawing_minmax(self, value):
+        self._drawing_minmax = value
+
+    @property
+    def preview_matrix(self):
+        """
+        Placement of the preview, the identity AllplanGeo.Matrix3D until it is set
+        """
+        if self._preview_matrix is None:
+            self._preview_matrix = AllplanGeo.Matrix3D()
+        return self._preview_matrix
+
+    @preview_matrix.setter
+    def preview_matrix(self, value):
+        self._preview_matrix = value
+
+    def bind(self) -> None:
+        """
+        Load the descriptor of the pyp file and bind the buttons and value fields to the methods of the same name
+        Called by the constructor, with lazy_startup when the first event arrives or the bindings are used first
+
+        Throws:
+            InteractorError: The pyp file can't be loaded, an EventId is used twice or a button has no method
+        """
+        if self._descriptor is not None:
+            return
+        start = time.perf_counter()
+        # The pyp file (with the pal file and all #include files) is compiled once and cached by its modification time
+        try:
+            descriptor = load_descriptor(self.pyp_file, self.pyp_cache_directory)
+        except PypDescriptorError as err:
+            raise InteractorError(err.message) from err
+        event_functions: Dict[int, Callable] = {}
+        modify_functions: Dict[str, Callable] = {}
+
+        for event_id, func_name in descriptor.buttons:
+            # Events occur when a button is pressed
+            # Check if the event id has been already used
+            if event_id in event_functions:
+                raise InteractorError(f"File {self.name}.pyp contains several buttons with EventId={event_id}")
+            # Check if function exists
+            if not hasattr(self, func_name):
+                raise InteractorError(f"The class {type(self).__name__} does not contain function {func_name}!")
+            # Assign function
+            event_functions[event_id] = getattr(self, func_name)
+
+        # For everything else modify_element_property function is called
+        for func_name in descriptor.values:
+            # Assign function if it exists
+            if hasattr(self, func_name):
+                modify_functions[func_name] = getattr(self, func_name)
+
+        self._descriptor, self._event_functions, self._modify_functions = descriptor, event_functions, modify_functions
+        self._startup["bind"] = time.perf_counter() - start
+        self.tracer.record("startup/bind", self._startup["bind"], "startup", start=start)
+
+    @property
+    def descriptor(self) -> PypDescriptor:
+        """
+        Compiled pyp file with the buttons and value fields
+        """
+        if self._descriptor is None:
+            self.bind()
+        return self._descriptor
+
+    @property
+    def event_functions(self) -> Dict[int, Callable]:
+        """
+        Functions called when a button is pressed, by EventId
+        """
+        if self._event_functions is None:
+            self.bind()
+        return self._event_functions
+
+    @property
+    def modify_functions(self) -> Dict[str, Callable]:
+        """
+        Functions called when a value is modified, by name of the value
+        """
+        if self._modify_functions is None:
+            self.bind()
+        return self._modify_functions
+
+    def startup_stats(self) -> Dict[str, Optional[float]]:
+        """
+        Get the startup times in seconds
+
+        Returns:
+            Dictionary with the times to show the palette, to the first palette (until the Interactor was created)
+            and to bind the handlers (None with lazy_startup until the first event)
+        """
+        return {"show_palette": None, "first_palette": None, "bind": None, **self._startup}
+
+    @property
+    def element_tree(self) -> "ET.ElementTree":
+        """
+        Parsed pyp file, only parsed when needed as the event binding uses the cached descriptor
+        """
+        if self._element_tree is None:
+            import xml.etree.ElementTree as ET
+            self._element_tree = ET.parse(self.pyp_file)
+        return self._element_tree
 
     def get_value(self, key: str):
         if hasattr(self.build_ele, key):
@@ -114,17 +290,208 @@ class Interactor:
 
     def set_value(self, key: str, value):
         if hasattr(self.build_ele, key):
-            getattr(self.build_ele, key).value = value
-            self.palette_service.update_palette(-1, False)
+            prop = getattr(self.build_ele, key)
+            if self._batch_depth and key not in self._batch_undo:
+                self._batch_undo[key] = prop.value
+            prop.value = value
+            self.dependency_graph.invalidate(key)
+            self._preview_elements = None
+            self.update_palette()
             return
         raise InteractorError(f"Key {key} does not exist")
 
+    def set_values(self, values: Dict[str, Any]):
+        """
+        Set several values with only one palette update
+        All the keys are checked first, so either all the values are set or none
+
+        Args:
+            values: dictionary of value names and new values
+
+        Throws:
+            InteractorError: In the case any of the keys does not exist
+        """
+        missing = [key for key in values if not hasattr(self.build_ele, key)]
+        if missing:
+            raise InteractorError(f"Keys {', '.join(missing)} do not exist")
+        with self.batch():
+            for key, value in values.items():
+                self.set_value(key, value)
+
+    @contextmanager
+    def batch(self) -> Iterator["Interactor"]:
+        """
+        Context manager that defers all palette updates until the end of the block, where the palette is updated once
+        If the block raises an exception, the values set in the block are restored
+        Batches can be nested, the palette is updated at the end of the outermost batch
+
+            with self.batch():
+                self.set_value("width", 100)
+                self.set_value("height", 200)
+            # Palette updated once
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            # Restore the values in reverse order of setting, only the outermost batch restores
+            if self._batch_depth == 1:
+                for key, value in reversed(list(self._batch_undo.items())):
+                    getattr(self.build_ele, key).value = value
+            raise
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._batch_undo.clear()
+                if self._palette_dirty:
+                    self._palette_dirty = False
+                    self._update_palette()
+
+    def update_palette(self):
+        """
+        Update the palette, or inside batch() mark it for an update at the end of the batch
+        """
+        if self._batch_depth:
+            self._palette_dirty = True
+        else:
+            self._update_palette()
+
+    def _update_palette(self):
+        self.palette_update_count += 1
+        self.tracer.count("palette_update")
+        with self.tracer.span("palette_update", "palette"):
+            self.palette_service.update_palette(-1, False)
+
     def set_hint(self, hint):
         self.coord_input.InitFirstElementInput(AllplanIFW.InputStringConvert(hint))
 
     def create(self):
+        self.regenerate()
+        # The newest background build is finished before the elements are created
+        if self.build_scheduler is not None:
+            self._finish_build()
         return self.model_ele_list, self.handles_list
 
+    def _finish_build(self):
+        """
+        Take the newest background build, waiting at most build_timeout seconds
+        If it does not finish in time or raised an exception, it is built again on the main thread.
+        Errors are reported and kept in build_error, so creating the elements never fails because of a build
+        """
+        try:
+            if self.collect_build(wait=True, timeout=self.build_timeout) or not self.build_scheduler.busy:
+                return
+            self.tracer.count("build/timeout")
+        except Exception as err:
+            self._report_build_error(err)
+
+        # The late result of the background build is dropped
+        self.build_scheduler.cancel()
+        build, args, finish = self._scheduled_build
+        with self.tracer.span("build/main_thread", "build"):
+            try:
+                value = build(*args)
+                self._background_result = value if finish is None else finish(value)
+            except Exception as err:
+                self._report_build_error(err)
+                self._background_result = None
+        self._set_elements()
+
+    def _report_build_error(self, err: Exception):
+        self.build_error = err
+        self.tracer.count("build/failed")
+        print(f"The build of {self.name} failed: {type(err).__name__}: {err}")
+
+    def schedule_build(self, build: Callable, *args: Any, finish: Optional[Callable]=None) -> int:
+        """
+        Run a build in the background, all older builds are dropped as they are superseded by this one
+        The build should only do the pure Python work (e.g. return a PolyhedronTopology) and call check_cancelled()
+        regularly, the Allplan elements are created from its result by finish on the main thread
+
+        Args:
+            build:  function called with args on a worker thread
+            args:   arguments of the build
+            finish: function called with the result of the build on the main thread, returning a list of model elements
+                    or a tuple of model elements and handles. Without it the build has to return one of those itself
+
+        Returns:
+            Generation of the build
+        """
+        if self.build_scheduler is None:
+            from .BuildScheduler import BuildScheduler
+            self.build_scheduler = BuildScheduler()
+        self._scheduled_build = (build, args, finish)
+        return self.build_scheduler.submit(build, *args, context=finish)
+
+    def collect_build(self, wait: bool=False, timeout: Optional[float]=None) -> bool:
+        """
+        Take the newest finished background build into the model_ele_list and handles_list,
+        it replaces the result of the previous background build, the results of the depends_on outputs are kept
+
+        Args:
+            wait:       wait for the newest scheduled build, otherwise only an already finished build is taken
+            timeout:    maximal number of seconds to wait
+
+        Returns:
+            True if a new result was taken
+        """
+        if self.build_scheduler is None:
+            return False
+        result: Optional["BuildResult"] = self.build_scheduler.wait(timeout) if wait else self.build_scheduler.poll()
+        if result is None:
+            return False
+        finish = result.context
+        self.tracer.record("build/background", result.latency, "build", {"generation": result.generation})
+        with self.tracer.span("build/finish", "build"):
+            self._background_result = result.value if finish is None else finish(result.value)
+            self._set_elements()
+        return True
+
+    def stage(self, name: str) -> Any:
+        """
+        Get the result of a method decorated with depends_on, it is only called again if a dependency changed
+
+        Args:
+            name: name of the method
+
+        Returns:
+            Result of the method
+        """
+        return self.dependency_graph.get(name)
+
+    def regenerate(self) -> bool:
+        """
+        Call the dirty methods decorated with depends_on, and collect the results of all output methods
+        into the model_ele_list and handles_list, together with the result of the newest background build.
+        Without any decorated method the lists are left unchanged.
+        The number of called and reused methods is in dependency_graph.rebuilt and dependency_graph.reused
+
+        Returns:
+            True if any of the methods was called
+        """
+        if not self.dependency_graph.outputs:
+            return False
+        with self.tracer.span("build/regenerate", "build"):
+            results = self.dependency_graph.evaluate_outputs()
+        if not self.dependency_graph.rebuilt:
+            return False
+
+        self._output_results = results
+        self._set_elements()
+        return True
+
+    def _set_elements(self):
+        self._preview_elements = None
+        self.model_ele_list, self.handles_list = [], []
+        for result in (*self._output_results, self._background_result):
+            # Outputs return a list of model elements, or a tuple of model elements and handles
+            if isinstance(result, tuple):
+                elements, handles = result
+                self.model_ele_list.extend(elements)
+                self.handles_list.extend(handles)
+            elif result is not None:
+                self.model_ele_list.extend(result)
+
     def modify_element_property(self, page: int, name: str, value: Any):
         """
         Modify property of element
@@ -134,20 +501,29 @@ class Interactor:
             name:   the name of the property.
             value:  new value for property.
         """
-        # Check if the name of the modified property is a bound to function
-        if name in self.modify_functions:
-            # Get result of the function call
-            ret = self.modify_functions[name](page, name, value)
-            # If the result is not None, assign new values to the element
-            if ret is not None:
-                value = ret
-                self.set_value(name, value)
-
-        print(page, name, value)
-        # Modify property and update pallete
-        update_palette = self.palette_service.modify_element_property(page, name, value)
-        if update_palette:
-            self.palette_service.update_palette(-1, False)
+        # All the palette updates of the handler and the palette service are done once at the end
+        with self.tracer.span(f"modify/{name}", "modify"), self.batch():
+            # Check if the name of the modified property is a bound to function
+            func = self.modify_functions.get(name)
+            if func is not None:
+                # Get result of the function call
+                with self.tracer.span(f"handler/{name}", "handler"):
+                    ret = func(page, name, value)
+                # If the result is not None, assign new values to the element
+                if ret is not None:
+                    value = ret
+                    self.set_value(name, value)
+
+            # Modify property and update pallete
+            if self.palette_service.modify_element_property(page, name, value):
+                self.update_palette()
+
+            # Call only the methods depending on the modified value
+            self.dependency_graph.invalidate(name)
+            self._preview_elements = None
+            self.regenerate()
+            # Take a background build if one finished meanwhile
+            self.collect_build()
         
     def on_cancel_function(self):
         """
@@ -157,18 +533,71 @@ class Interactor:
             True/False for success.
         """
 
+        # Running background builds are stopped and their results dropped
+        if self.build_scheduler is not None:
+            self.build_scheduler.shutdown()
+            self.build_scheduler = None
         self.palette_service.close_palette()
+        # Write the trace of the session, if tracing is enabled
+        self.tracer.flush()
         return True
 
     def on_preview_draw(self):
         """
         Handles the preview draw event
         """
+        self.collect_build()
+        if self.preview_enabled:
+            self.draw_preview(force=True)
 
     def on_mouse_leave(self):
         """
         Handles the mouse leave event
         """
+        # Draw the last frame if it was dropped
+        if self.preview_enabled and self.preview_throttle.pending:
+            self.draw_preview(force=True)
+
+    def create_preview(self, lod: float) -> Any:
+        """
+        Create the elements drawn in the preview, override to draw a coarse level of detail while the mouse moves
+        (overriding it enables the preview, see preview_enabled), e.g. [AllplanBasisElements.ModelElement3D(self.com_prop, mesh.to_polyhedron(lod=lod))]
+        The full detail elements are only created in create(), the preview elements are reused until a value changes
+
+        Args:
+            lod:    preview_lod, the level of detail e.g. for PolyhedronMesh.to_polyhedron(lod=lod)
+
+        Returns:
+            List of model elements, or a tuple of model elements and handles. None draws the model_ele_list
+        """
+        return None
+
+    def draw_preview(self, force: bool=False) -> bool:
+        """
+        Draw the preview elements, at most once per frame budget of the preview_throttle
+        The frames drawn and dropped and the preview latency are counted in preview_throttle.stats()
+
+        Args:
+            force:  draw even if the frame does not fit into the budget
+
+        Returns:
+            True if the preview was drawn, False if the frame was dropped
+        """
+        return self.preview_throttle.draw(self._draw_preview, force)
+
+    def _draw_preview(self):
+        if self._preview_elements is None:
+            with self.tracer.span("build/preview", "build"):
+                result = self.create_preview(self.preview_lod)
+            if result is None:
+                result = self.model_ele_list
+            elif isinstance(result, tuple):
+                result = result[0]
+            self._preview_elements = result
+        if self._preview_elements:
+            with self.tracer.span("preview/draw", "preview"):
+                AllplanBaseElements.DrawElementPreview(self.coord_input.GetInputViewDocument(), self.preview_matrix,
+                                                       self._preview_elements, True, None)
 
     def on_control_event(self, event_id):
         """
@@ -186,9 +615,8 @@ class Interactor:
         if event_id in self.event_functions:
             # Fetch and call the function
             func = self.event_functions[event_id]
-            print(f"Dispatching function: {func.__name__}")
-
-            return func(build_ele, doc)
+            with self.tracer.span(f"event/{func.__name__}", "event", {"event_id": event_id}):
+                return func(build_ele, doc)
         raise InteractorError(f"Function for {event_id=} not specified!")
 
     def process_mouse_msg(self, mouse_msg, pnt, msg_info):
@@ -203,4 +631,7 @@ class Interactor:
         Returns:
             True/False for success.
         """
+        # Redrawn only if the frame fits into the budget, the rest of the mouse messages are dropped
+        if self.preview_enabled:
+            self.draw_preview()
         return True
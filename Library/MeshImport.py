@@ -0,0 +1,412 @@
+import mmap
+import os
+import struct
+import time
+from array import array
+from typing import IO, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class MeshImportError(Exception):
+    """
+    Error class for the mesh importers
+    """
+
+    def __init__(self, message: str, path: str=""):
+        self.message = message
+        self.path = path
+        super().__init__(self.message)
+
+
+class MeshChunk(NamedTuple):
+    """
+    Part of a mesh file yielded by the readers
+
+    Attributes:
+        coordinates: array      Flat x, y, z coordinates of the vertices read in this chunk
+        loops: List[List[int]]  Faces as loops of vertex indexes
+        local: bool             True if the loops index the vertices of this chunk only (STL),
+                                False if they index all the vertices of the file (OBJ, PLY)
+    """
+    coordinates: array
+    loops: List[List[int]]
+    local: bool
+
+
+class ImportStats(NamedTuple):
+    """
+    Result of import_mesh()
+
+    Attributes:
+        vertices: int       Number of vertices read from the file (before welding)
+        faces: int          Number of faces read from the file
+        bytes: int          Size of the file
+        seconds: float      Duration of the import
+    """
+    vertices: int
+    faces: int
+    bytes: int
+    seconds: float
+
+
+def import_mesh(path: str, sink, chunk_size: int=65536, file_format: Optional[str]=None) -> ImportStats:
+    """
+    Streams a STL (binary or ASCII), OBJ or PLY (ASCII or binary) file into a PolyhedronBuilder or PolyhedronMesh
+    The file is read in chunks of chunk_size faces, so only the index map of the vertices is kept besides the result.
+    Create the sink with weld_epsilon > 0, otherwise the triangles of STL files are not connected.
+
+    Usage example:
+        builder = PolyhedronBuilder(weld_epsilon=0.01)
+        import_mesh("part.stl", builder)
+        polyhedron = builder.create()
+
+    Parameters:
+        path: str           Path to the mesh file
+        sink                Object with add_vertices(coordinates) -> indexes and add_face_loops(loops),
+                            e.g. PolyhedronBuilder or PolyhedronMesh
+        chunk_size: int     Number of faces read at once
+        file_format: str    "stl", "obj" or "ply", by default taken from the file extension
+    Throws:
+        MeshImportError:    The file format is not supported or the file is broken
+    Returns:
+        ImportStats with the number of read vertices and faces
+    """
+    file_format = (file_format or os.path.splitext(path)[1][1:]).lower()
+    readers = {"stl": read_stl, "obj": read_obj, "ply": read_ply}
+    if file_format not in readers:
+        raise MeshImportError(f"Mesh format '{file_format}' is not supported!", path)
+
+    start = time.perf_counter()
+    # File vertex index -> sink vertex index, only needed when faces reference vertices from earlier chunks
+    vertex_map = array("i")
+    vertices = faces = 0
+
+    for chunk in readers[file_format](path, chunk_size):
+        indexes = sink.add_vertices(chunk.coordinates) if chunk.coordinates else ()
+        vertices += len(chunk.coordinates) // 3
+        if chunk.local:
+            local_map = indexes
+        else:
+            vertex_map.extend(indexes)
+            local_map = vertex_map
+        if chunk.loops:
+            # Negative indexes would silently wrap around in the index map
+            if not chunk.local and any(min(loop) < 0 for loop in chunk.loops if loop):
+                raise MeshImportError("A face in the file references a negative vertex index!", path)
+            try:
+                sink.add_face_loops([[local_map[vertex] for vertex in loop] for loop in chunk.loops])
+            except IndexError:
+                raise MeshImportError("A face in the file references a vertex that does not exist!", path) from None
+            faces += len(chunk.loops)
+
+    return ImportStats(vertices, faces, os.path.getsize(path), time.perf_counter() - start)
+
+
+def read_stl(path: str, chunk_size: int=65536) -> Iterator[MeshChunk]:
+    """
+    Reads a binary or ASCII STL file in chunks of triangles
+    The binary file is memory mapped, so only one chunk is in memory at once
+
+    Parameters:
+        path: str           Path to the STL file
+        chunk_size: int     Number of triangles in one chunk
+    Throws:
+        MeshImportError:    The file is broken
+    Returns:
+        Generator of MeshChunks, every triangle has its own 3 vertices
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as file:
+        header = file.read(84)
+        # Binary files have an 80 byte header, the triangle count and 50 bytes per triangle.
+        # ASCII files start with "solid", but so do some binary files, hence the size is checked
+        if len(header) == 84 and 84 + 50 * struct.unpack_from("<I", header, 80)[0] == size:
+            yield from _read_binary_stl(file, struct.unpack_from("<I", header, 80)[0], chunk_size)
+            return
+
+    with open(path, "r", errors="replace") as file:
+        yield from _read_ascii_stl(file, chunk_size, path)
+
+
+def _read_binary_stl(file: IO[bytes], count: int, chunk_size: int) -> Iterator[MeshChunk]:
+    if count == 0:
+        return
+    record = struct.Struct("<12fH")
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            for first in range(0, count, chunk_size):
+                last = min(count, first + chunk_size)
+                coordinates = array("d")
+                # Skip the normal (first 3 floats) and the attribute byte count
+                for values in record.iter_unpack(view[84 + 50 * first:84 + 50 * last]):
+                    coordinates.extend(values[3:12])
+                yield MeshChunk(coordinates, _triangles(last - first), True)
+        finally:
+            view.release()
+
+
+def _read_ascii_stl(file: IO[str], chunk_size: int, path: str) -> Iterator[MeshChunk]:
+    coordinates = array("d")
+    for number, line in enumerate(file, 1):
+        line = line.strip()
+        if not line.startswith("vertex"):
+            continue
+        try:
+            coordinates.extend(map(float, line.split()[1:4]))
+        except ValueError:
+            raise MeshImportError(f"Broken vertex in line {number}: {line}", path) from None
+        if len(coordinates) == 9 * chunk_size:
+            yield MeshChunk(coordinates, _triangles(chunk_size), True)
+            coordinates = array("d")
+
+    if len(coordinates) % 9:
+        raise MeshImportError("The last facet of the file does not have 3 vertices!", path)
+    if coordinates:
+        yield MeshChunk(coordinates, _triangles(len(coordinates) // 9), True)
+
+
+def _triangles(count: int) -> List[List[int]]:
+    return [[i, i + 1, i + 2] for i in range(0, 3 * count, 3)]
+
+
+def read_obj(path: str, chunk_size: int=65536) -> Iterator[MeshChunk]:
+    """
+    Reads the vertices ("v") and faces ("f") of a Wavefront OBJ file line by line
+    Texture coordinates, normals, groups and materials are ignored
+
+    Parameters:
+        path: str           Path to the OBJ file
+        chunk_size: int     Number of faces (or vertices) in one chunk
+    Throws:
+        MeshImportError:    The file is broken
+    Returns:
+        Generator of MeshChunks, the loops index all the vertices of the file
+    """
+    coordinates = array("d")
+    loops: List[List[int]] = []
+    vertex_count = 0
+
+    with open(path, "r", errors="replace") as file:
+        for number, line in enumerate(file, 1):
+            if line.startswith("v "):
+                try:
+                    coordinates.extend(map(float, line.split()[1:4]))
+                except ValueError:
+                    raise MeshImportError(f"Broken vertex in line {number}: {line.strip()}", path) from None
+                vertex_count += 1
+            elif line.startswith("f "):
+                loop = []
+                try:
+                    for item in line.split()[1:]:
+                        # "v", "v/vt", "v//vn" or "v/vt/vn", 1-based or negative (relative to the last vertex)
+                        index = int(item.split("/", 1)[0])
+                        vertex = index - 1 if index > 0 else vertex_count + index
+                        if index == 0 or vertex < 0:
+                            raise MeshImportError(f"The face in line {number} references the vertex {index}, "
+                                                  f"which does not exist!", path)
+                        loop.append(vertex)
+                except ValueError:
+                    raise MeshImportError(f"Broken face in line {number}: {line.strip()}", path) from None
+                loops.append(loop)
+            else:
+                continue
+
+            if len(loops) >= chunk_size or len(coordinates) >= 3 * chunk_size:
+                yield MeshChunk(coordinates, loops, False)
+                coordinates, loops = array("d"), []
+
+    if coordinates or loops:
+        yield MeshChunk(coordinates, loops, False)
+
+
+# PLY property types -> struct format characters
+_PLY_TYPES = {
+    "char": "b", "int8": "b", "uchar": "B", "uint8": "B",
+    "short": "h", "int16": "h", "ushort": "H", "uint16": "H",
+    "int": "i", "int32": "i", "uint": "I", "uint32": "I",
+    "float": "f", "float32": "f", "double": "d", "float64": "d",
+}
+
+
+class _PlyElement(NamedTuple):
+    name: str
+    count: int
+    # (name, type, list count type or None)
+    properties: List[Tuple[str, str, Optional[str]]]
+
+
+def read_ply(path: str, chunk_size: int=65536) -> Iterator[MeshChunk]:
+    """
+    Reads the "vertex" and "face" elements of an ASCII or binary PLY file
+    Binary files are memory mapped, other elements and properties are skipped
+
+    Parameters:
+        path: str           Path to the PLY file
+        chunk_size: int     Number of faces (or vertices) in one chunk
+    Throws:
+        MeshImportError:    The file is broken or uses an unknown format
+    Returns:
+        Generator of MeshChunks, the loops index all the vertices of the file
+    """
+    with open(path, "rb") as file:
+        file_format, elements, data_start = _read_ply_header(file, path)
+        if file_format == "ascii":
+            file.seek(data_start)
+            yield from _read_ascii_ply(file, elements, chunk_size, path)
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            endian = "<" if file_format == "binary_little_endian" else ">"
+            yield from _read_binary_ply(mapped, data_start, endian, elements, chunk_size, path)
+
+
+def _read_ply_header(file: IO[bytes], path: str) -> Tuple[str, List[_PlyElement], int]:
+    if file.readline().strip() != b"ply":
+        raise MeshImportError("The file is not a PLY file!", path)
+
+    file_format = ""
+    elements: List[_PlyElement] = []
+    while True:
+        line = file.readline()
+        if not line:
+            raise MeshImportError("The PLY header has no end_header!", path)
+        words = line.decode("ascii", errors="replace").split()
+        if not words or words[0] in ("comment", "obj_info"):
+            continue
+        if words[0] == "end_header":
+            break
+        if words[0] == "format":
+            file_format = words[1]
+        elif words[0] == "element":
+            elements.append(_PlyElement(words[1], int(words[2]), []))
+        elif words[0] == "property" and elements:
+            if words[1] == "list":
+                elements[-1].properties.append((words[4], words[3], words[2]))
+            else:
+                elements[-1].properties.append((words[2], words[1], None))
+
+    if file_format not in ("ascii", "binary_little_endian", "binary_big_endian"):
+        raise MeshImportError(f"Unknown PLY format '{file_format}'!", path)
+    for element in elements:
+        for name, value_type, count_type in element.properties:
+            if value_type not in _PLY_TYPES or (count_type is not None and count_type not in _PLY_TYPES):
+                raise MeshImportError(f"Unknown PLY type in property '{name}' of element '{element.name}'!", path)
+    return file_format, elements, file.tell()
+
+
+def _vertex_positions(element: _PlyElement, path: str) -> Tuple[int, int, int]:
+    names = [name for name, _, _ in element.properties]
+    try:
+        return names.index("x"), names.index("y"), names.index("z")
+    except ValueError:
+        raise MeshImportError("The PLY vertices have no x, y and z properties!", path) from None
+
+
+def _face_position(element: _PlyElement, path: str) -> int:
+    for position, (name, _, count_type) in enumerate(element.properties):
+        if count_type is not None and name in ("vertex_indices", "vertex_index"):
+            return position
+    raise MeshImportError("The PLY faces have no vertex_indices property!", path)
+
+
+def _read_ascii_ply(file: IO[bytes], elements: List[_PlyElement], chunk_size: int, path: str) -> Iterator[MeshChunk]:
+    lines = iter(file)
+    for element in elements:
+        if element.name == "vertex":
+            x, y, z = _vertex_positions(element, path)
+            coordinates = array("d")
+            for row, values in _ply_rows(lines, element, path):
+                try:
+                    coordinates.extend((float(values[x]), float(values[y]), float(values[z])))
+                except (ValueError, IndexError):
+                    raise MeshImportError(f"Broken vertex {row} in the PLY file!", path) from None
+                if len(coordinates) == 3 * chunk_size:
+                    yield MeshChunk(coordinates, [], False)
+                    coordinates = array("d")
+            if coordinates:
+                yield MeshChunk(coordinates, [], False)
+
+        elif element.name == "face":
+            position = _face_position(element, path)
+            loops: List[List[int]] = []
+            for row, values in _ply_rows(lines, element, path):
+                try:
+                    # Skip the values of the properties in front of the vertex list
+                    offset = 0
+                    for _, _, count_type in element.properties[:position]:
+                        offset += 1 + int(values[offset]) if count_type is not None else 1
+                    count = int(values[offset])
+                    loop = [int(value) for value in values[offset + 1:offset + 1 + count]]
+                except (ValueError, IndexError):
+                    raise MeshImportError(f"Broken face {row} in the PLY file!", path) from None
+                if len(loop) != count:
+                    raise MeshImportError(f"The face {row} in the PLY file has less than {count} vertices!", path)
+                loops.append(loop)
+                if len(loops) == chunk_size:
+                    yield MeshChunk(array("d"), loops, False)
+                    loops = []
+            if loops:
+                yield MeshChunk(array("d"), loops, False)
+
+        else:
+            for _ in _ply_rows(lines, element, path):
+                pass
+
+
+def _ply_rows(lines: Iterator[bytes], element: _PlyElement, path: str) -> Iterator[Tuple[int, List[bytes]]]:
+    """
+    Splits the lines of an ASCII PLY element into values
+
+    Throws:
+        MeshImportError:    The file ends before all the rows of the element were read
+    """
+    for row in range(element.count):
+        line = next(lines, None)
+        if line is None:
+            raise MeshImportError(f"The PLY file ends inside the element '{element.name}'!", path)
+        yield row, line.split()
+
+
+def _read_binary_ply(data: mmap.mmap, offset: int, endian: str, elements: List[_PlyElement],
+                     chunk_size: int, path: str) -> Iterator[MeshChunk]:
+    for element in elements:
+        fixed = all(count_type is None for _, _, count_type in element.properties)
+
+        if fixed:
+            row = struct.Struct(endian + "".join(_PLY_TYPES[value_type] for _, value_type, _ in element.properties))
+            end = offset + row.size * element.count
+            if end > len(data):
+                raise MeshImportError(f"The PLY file ends inside the element '{element.name}'!", path)
+            if element.name == "vertex":
+                x, y, z = _vertex_positions(element, path)
+                for first in range(0, element.count, chunk_size):
+                    last = min(element.count, first + chunk_size)
+                    coordinates = array("d")
+                    for values in row.iter_unpack(data[offset + row.size * first:offset + row.size * last]):
+                        coordinates.extend((values[x], values[y], values[z]))
+                    yield MeshChunk(coordinates, [], False)
+            offset = end
+            continue
+
+        # Elements with lists have rows of different sizes, hence they are read one by one
+        position = _face_position(element, path) if element.name == "face" else -1
+        formats = [(struct.Struct(endian + _PLY_TYPES[count_type or value_type]), _PLY_TYPES[value_type] if count_type else None)
+                   for _, value_type, count_type in element.properties]
+        loops: List[List[int]] = []
+        try:
+            for _ in range(element.count):
+                for index, (first_format, item_type) in enumerate(formats):
+                    value = first_format.unpack_from(data, offset)[0]
+                    offset += first_format.size
+                    if item_type is None:
+                        continue
+                    items = struct.Struct(f"{endian}{value}{item_type}")
+                    if index == position:
+                        loops.append(list(items.unpack_from(data, offset)))
+                    offset += items.size
+                if len(loops) == chunk_size:
+                    yield MeshChunk(array("d"), loops, False)
+                    loops = []
+        except struct.error:
+            raise MeshImportError(f"The PLY file ends inside the element '{element.name}'!", path) from None
+        if loops:
+            yield MeshChunk(array("d"), loops, False)
@@ -0,0 +1,257 @@
+from array import array
+from collections import deque
+from typing import Dict, Iterable, NamedTuple, Optional, Sequence
+
+
+class MeshTopologyError(Exception):
+    """
+    Error class for the mesh topology functions
+    """
+
+    def __init__(self, message: str, face: int=-1, edge: Optional[tuple]=None):
+        self.message = message
+        self.face = face
+        self.edge = edge
+        super().__init__(self.message)
+
+
+class FaceTopology(NamedTuple):
+    """
+    Result of orient_face_loops()
+
+    Attributes:
+        edge_start, edge_end    Start and end vertex of every edge by edge index
+        face_offsets            Face i uses face_edges[face_offsets[i]:face_offsets[i + 1]]
+        face_edges              Edge indexes of all faces in loop order, ~index marks an edge used from end to start
+        flipped: int            Number of faces whose loop had to be reversed
+        components: int         Number of connected groups of faces
+    """
+    edge_start: array
+    edge_end: array
+    face_offsets: array
+    face_edges: array
+    flipped: int
+    components: int
+
+
+class PolyhedronTopology(NamedTuple):
+    """
+    Finished topology of a polyhedron, as returned by PolyhedronBuilder.get_topology()
+
+    Attributes:
+        coordinates             Flat x, y, z coordinates of the vertices
+        edge_start, edge_end    Start and end vertex of every edge by edge index
+        face_offsets            Face i uses face_edges[face_offsets[i]:face_offsets[i + 1]]
+        face_edges              Edge indexes of all faces in loop order, ~index marks an edge used from end to start
+        vertex_names            Vertex name -> vertex index, can be empty
+        edge_names              Edge name -> edge index, can be empty
+        polyhedron_type         Value of the AllplanGeo.PolyhedronType the polyhedron was built with, None if unknown
+    """
+    coordinates: array
+    edge_start: array
+    edge_end: array
+    face_offsets: array
+    face_edges: array
+    vertex_names: Dict[str, int]
+    edge_names: Dict[str, int]
+    polyhedron_type: Optional[int] = None
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate memory used by the arrays (without the name tables)
+        """
+        return sum(values.itemsize * len(values) for values in self[:5])
+
+
+def orient_face_loops(loops: Iterable[Sequence[int]], coordinates: Optional[Sequence[float]]=None,
+                      edge_start: Optional[Sequence[int]]=None, edge_end: Optional[Sequence[int]]=None,
+                      face_offsets: Optional[Sequence[int]]=None, face_edges: Optional[Sequence[int]]=None) -> FaceTopology:
+    """
+    Creates the edges of faces given as vertex loops and orients the faces consistently
+
+    Every pair of consecutive vertices in a loop is an edge, edges shared by two faces are created only once
+    (the edges are looked up in a dictionary keyed by the unordered vertex pair, packed into one integer).
+    The orientation of the first face of every connected group is kept and propagated to its neighbours
+    by a breadth first search, so that every shared edge is used once in each direction.
+    Groups sharing an edge with an already existing face are turned to agree with it, as existing faces are never turned.
+    If coordinates are given, every other closed group is additionally turned so that its faces point outwards.
+
+        v3 ______ v2    The loops [v0, v1, v2, v3] and [v0, v3, v2, v1] describe the same face,
+          |      |      with opposite orientations. Any of them can be passed, the faces
+          |      |      are turned so that they agree with their neighbours
+          |______|
+        v0        v1
+
+    Parameters:
+        loops: Iterable[Sequence[int]]      Faces as loops of vertex indexes
+        coordinates: Sequence[float]        Optional flat x, y, z coordinates of the vertices
+        edge_start, edge_end                Optional already existing edges that are reused by the faces
+        face_offsets, face_edges            Optional already existing oriented faces using these edges, see FaceTopology
+    Throws:
+        MeshTopologyError:  A face has less than 3 vertices or uses the same vertex twice in a row
+        MeshTopologyError:  An edge is shared by more than two faces, including the existing ones
+        MeshTopologyError:  The faces can't be oriented consistently (e.g. a Moebius strip)
+    Returns:
+        FaceTopology with all the edges (existing ones first) and the oriented faces (without the existing ones)
+    """
+    starts = array("i", edge_start if edge_start is not None else ())
+    ends   = array("i", edge_end if edge_end is not None else ())
+    edge_map = {}
+    for index in range(len(starts)):
+        a, b = starts[index], ends[index]
+        edge_map[(a << 32) | b if a < b else (b << 32) | a] = index
+
+    # The (at most two) faces using an edge and if they use it from start to end
+    # -1 is no face, existing faces are stored as -2 - face, as they are not part of the result
+    face_0, face_1         = array("i", [-1]) * len(starts), array("i", [-1]) * len(starts)
+    positive_0, positive_1 = array("b", [0]) * len(starts), array("b", [0]) * len(starts)
+    if face_offsets is not None:
+        for face in range(len(face_offsets) - 1):
+            for entry in face_edges[face_offsets[face]:face_offsets[face + 1]]:
+                index = entry if entry >= 0 else ~entry
+                if face_0[index] == -1:
+                    face_0[index], positive_0[index] = -2 - face, entry >= 0
+                elif face_1[index] == -1:
+                    face_1[index], positive_1[index] = -2 - face, entry >= 0
+                else:
+                    raise MeshTopologyError(f"The edge between the vertices {starts[index]} and {ends[index]} is used by "
+                                            f"more than two existing faces!", -1, (starts[index], ends[index]))
+
+    face_offsets = array("i", [0])
+    face_edges   = array("i")
+    volumes = array("d")
+
+    for face, loop in enumerate(loops):
+        count = len(loop)
+        if count < 3:
+            raise MeshTopologyError(f"Face {face} has less than 3 vertices!", face)
+
+        for i in range(count):
+            a, b = loop[i], loop[(i + 1) % count]
+            if a == b:
+                raise MeshTopologyError(f"Face {face} uses the vertex {a} twice in a row!", face, (a, b))
+            key = (a << 32) | b if a < b else (b << 32) | a
+            index = edge_map.get(key)
+            if index is None:
+                index = len(starts)
+                edge_map[key] = index
+                starts.append(a)
+                ends.append(b)
+                face_0.append(-1)
+                face_1.append(-1)
+                positive_0.append(0)
+                positive_1.append(0)
+            positive = starts[index] == a
+
+            if face_0[index] == -1:
+                face_0[index], positive_0[index] = face, positive
+            elif face_1[index] == -1:
+                face_1[index], positive_1[index] = face, positive
+            else:
+                raise MeshTopologyError(f"The edge between the vertices {a} and {b} is used by more than two faces "
+                                        f"({_face_name(face_0[index])}, {_face_name(face_1[index])}, {face})!",
+                                        face, (a, b))
+            face_edges.append(index if positive else ~index)
+        face_offsets.append(len(face_edges))
+
+        if coordinates is not None:
+            volumes.append(_signed_volume(loop, coordinates))
+
+    face_count = len(face_offsets) - 1
+    flip       = array("b", [-1]) * face_count
+    flipped    = 0
+    components = 0
+
+    for seed in range(face_count):
+        if flip[seed] >= 0:
+            continue
+        components += 1
+        flip[seed] = 0
+        group  = [seed]
+        closed = True
+        queue  = deque(group)
+        # Has the group to be turned to agree with the existing faces, None if it shares no edge with them
+        anchor: Optional[bool] = None
+
+        while queue:
+            face = queue.popleft()
+            for slot in range(face_offsets[face], face_offsets[face + 1]):
+                entry = face_edges[slot]
+                index = entry if entry >= 0 else ~entry
+                # Direction in which this face uses the edge after flipping
+                direction = (entry >= 0) != bool(flip[face])
+
+                if face_0[index] == face:
+                    other, other_positive = face_1[index], positive_1[index]
+                else:
+                    other, other_positive = face_0[index], positive_0[index]
+                if other == -1:
+                    closed = False
+                    continue
+                if other == face:
+                    continue
+
+                # The neighbour has to use the shared edge in the opposite direction
+                other_flip = bool(other_positive) == direction
+                if other < -1:
+                    # Existing faces are never turned, so the whole group is turned if they disagree
+                    if anchor is None:
+                        anchor = other_flip
+                    elif anchor != other_flip:
+                        raise MeshTopologyError(f"The face {face} can't be oriented consistently with the existing "
+                                                f"faces!", face, (starts[index], ends[index]))
+                    continue
+                if flip[other] < 0:
+                    flip[other] = other_flip
+                    group.append(other)
+                    queue.append(other)
+                elif bool(flip[other]) != other_flip:
+                    raise MeshTopologyError(f"The faces {face} and {other} can't be oriented consistently, "
+                                            f"the surface is not orientable!", other, (starts[index], ends[index]))
+
+        if anchor:
+            for face in group:
+                flip[face] = not flip[face]
+        # Turn closed groups with coordinates so that the enclosed volume is positive (faces point outwards)
+        elif anchor is None and closed and coordinates is not None:
+            volume = sum(-volumes[face] if flip[face] else volumes[face] for face in group)
+            if volume < 0:
+                for face in group:
+                    flip[face] = not flip[face]
+
+        flipped += sum(flip[face] for face in group)
+
+    # Reverse the loops of the flipped faces, the reversed loop uses every edge in the opposite direction
+    if flipped:
+        for face in range(face_count):
+            if flip[face]:
+                begin, end = face_offsets[face], face_offsets[face + 1]
+                face_edges[begin:end] = array("i", [~entry for entry in reversed(face_edges[begin:end])])
+
+    return FaceTopology(starts, ends, face_offsets, face_edges, flipped, components)
+
+
+def _face_name(face: int) -> str:
+    return str(face) if face >= 0 else f"existing face {-2 - face}"
+
+
+def _signed_volume(loop: Sequence[int], coordinates: Sequence[float]) -> float:
+    """
+    Signed volume of the cone between the origin and the face, fan triangulated from its first vertex
+
+    Parameters:
+        loop: Sequence[int]             Vertex indexes of the face
+        coordinates: Sequence[float]    Flat x, y, z coordinates of the vertices
+    Returns:
+        Six times the signed volume
+    """
+    i = 3 * loop[0]
+    ax, ay, az = coordinates[i], coordinates[i + 1], coordinates[i + 2]
+    volume = 0.0
+    for k in range(1, len(loop) - 1):
+        j, l = 3 * loop[k], 3 * loop[k + 1]
+        bx, by, bz = coordinates[j], coordinates[j + 1], coordinates[j + 2]
+        cx, cy, cz = coordinates[l], coordinates[l + 1], coordinates[l + 2]
+        volume += ax * (by * cz - bz * cy) - ay * (bx * cz - bz * cx) + az * (bx * cy - by * cx)
+    return volume
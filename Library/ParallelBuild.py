@@ -0,0 +1,174 @@
+import multiprocessing
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional, Sequence
+
+from .MeshTopology import PolyhedronTopology
+from .PolyhedronMesh import PolyhedronMesh
+
+
+def build_topology(factory: Callable[..., Any], args: Sequence[Any], validate: bool=True, closed: bool=True) -> PolyhedronTopology:
+    """
+    Calls the factory and turns its mesh into a finished topology, this is the work done in the worker processes
+
+    Parameters:
+        factory: Callable       Function returning a PolyhedronMesh, or a tuple of flat coordinates and vertex loops
+        args: Sequence          Arguments of the factory
+        validate: bool          Should the mesh be checked for problems
+        closed: bool            Should the mesh be closed (a volume), only used by the check
+    Throws:
+        MeshError:          The mesh has problems
+    Returns:
+        PolyhedronTopology of the mesh
+    """
+    mesh = factory(*args)
+    if not isinstance(mesh, PolyhedronMesh):
+        coordinates, loops = mesh
+        mesh = PolyhedronMesh(coordinates, loops)
+    return mesh.to_topology(validate, closed)
+
+
+def python_executable() -> Optional[str]:
+    """
+    Path of the Python interpreter used for the worker processes
+
+    In a normal Python process this is sys.executable. Inside Allplan Python is embedded, sys.executable is the
+    host program, which must not be started as a worker, so the python.exe (or python3) of the embedded
+    installation is searched next to the standard library instead.
+
+    Returns:
+        Path of the interpreter, None if it is embedded and no interpreter was found
+    """
+    names = ("python.exe", "pythonw.exe") if os.name == "nt" else ("python3", "python")
+    if os.path.basename(sys.executable or "").lower().startswith("python"):
+        return sys.executable
+    for directory in (sys.exec_prefix, sys.base_exec_prefix):
+        for subdirectory in ("", "bin", "Scripts"):
+            for name in names:
+                path = os.path.join(directory, subdirectory, name)
+                if os.path.isfile(path):
+                    return path
+    return None
+
+
+def _worker_context() -> Optional[multiprocessing.context.BaseContext]:
+    """
+    Spawn context whose executable is the Python interpreter, None if there is no interpreter to start
+    """
+    executable = python_executable()
+    if executable is None:
+        return None
+    context = multiprocessing.get_context("spawn")
+    if executable != sys.executable:
+        context.set_executable(executable)
+    return context
+
+
+def create_pool(max_workers: Optional[int]=None) -> Optional[ProcessPoolExecutor]:
+    """
+    Creates the process pool used by build_topologies(), e.g. to reuse it for several calls
+
+    Parameters:
+        max_workers: int    Number of worker processes, default = number of CPUs
+    Returns:
+        ProcessPoolExecutor with a spawn context, whose workers are started with python_executable(),
+        None if no interpreter was found
+    """
+    context = _worker_context()
+    if context is None:
+        return None
+    return ProcessPoolExecutor(max_workers or os.cpu_count() or 1, mp_context=context)
+
+
+def _build_chunk(factory: Callable[..., Any], jobs: List[Sequence[Any]], validate: bool, closed: bool) -> List[PolyhedronTopology]:
+    return [build_topology(factory, args, validate, closed) for args in jobs]
+
+
+def build_topologies(factory: Callable[..., Any], jobs: Iterable[Sequence[Any]], max_workers: Optional[int]=None,
+                     executor: Optional[Executor]=None, chunksize: Optional[int]=None, validate: bool=True,
+                     closed: bool=True) -> List[PolyhedronTopology]:
+    """
+    Builds the topologies of many independent solids in parallel, independent of Allplan
+
+    All the pure Python work (generating the vertices, creating the edges shared by the faces, orienting the faces and
+    checking the mesh) is done in worker processes. The results come back as PolyhedronTopology of flat typed arrays,
+    which are pickled as raw bytes, so only a few objects per solid are transferred instead of one per vertex.
+
+    The factory and its arguments are pickled, hence the factory has to be a function defined at the module level,
+    not a lambda or a method. The workers import the module of the factory, which must not need Allplan.
+
+    Parameters:
+        factory: Callable           Function returning a PolyhedronMesh, or a tuple of flat coordinates and vertex loops
+        jobs: Iterable[Sequence]    Arguments of the factory for every solid
+        max_workers: int            Number of worker processes, default = number of CPUs. With 1 the solids are built
+                                    in this process without a pool
+        executor: Executor          Optional executor to use instead of a new pool, e.g. one from create_pool() that is
+                                    reused for several calls. Without it a pool is created by create_pool(), whose workers
+                                    are started with python_executable(), so inside Allplan the python.exe of the embedded
+                                    installation is started instead of Allplan. If no interpreter is found, the solids
+                                    are built in this process without a pool
+        chunksize: int              Number of solids sent to a worker at once, by default the jobs are split into
+                                    4 chunks per worker
+        validate: bool              Should the meshes be checked for problems
+        closed: bool                Should the meshes be closed (volumes), only used by the check
+    Throws:
+        MeshError:          Any of the meshes has problems
+    Returns:
+        Topologies in the order of the jobs
+    """
+    jobs = [tuple(args) for args in jobs]
+    workers = max_workers or os.cpu_count() or 1
+    if executor is None and (workers == 1 or len(jobs) < 2):
+        return _build_chunk(factory, jobs, validate, closed)
+
+    if chunksize is None:
+        chunksize = max(1, -(-len(jobs) // (4 * workers)))
+    chunks = [jobs[i:i + chunksize] for i in range(0, len(jobs), chunksize)]
+
+    def run(pool: Executor) -> List[PolyhedronTopology]:
+        futures = [pool.submit(_build_chunk, factory, chunk, validate, closed) for chunk in chunks]
+        return [topology for future in futures for topology in future.result()]
+
+    if executor is not None:
+        return run(executor)
+    pool = create_pool(min(workers, len(chunks)))
+    if pool is None:
+        return _build_chunk(factory, jobs, validate, closed)
+    with pool:
+        return run(pool)
+
+
+def build_polyhedra(factory: Callable[..., Any], jobs: Iterable[Sequence[Any]], max_workers: Optional[int]=None,
+                    executor: Optional[Executor]=None, chunksize: Optional[int]=None, validate: bool=True, p_type=None) -> list:
+    """
+    Builds the polyhedra of many independent solids, the topologies are built in parallel by build_topologies()
+    and only the Allplan polyhedra are created in this process
+
+    Usage example:
+        # Module level function, e.g. in the same file as the interactor
+        def shaft(x, y, diameter, depth):
+            mesh = PolyhedronMesh()
+            ...
+            return mesh
+
+        polyhedra = build_polyhedra(shaft, [(x, y, 800, 2500) for x, y in positions])
+
+    Parameters:
+        p_type: AllplanGeo.PolyhedronType   Type of the polyhedra, default = tVolume
+        For the other parameters see build_topologies()
+    Throws:
+        MeshError:          Any of the meshes has problems
+        PolyhedronError:    Any of the polyhedra is not valid
+    Returns:
+        List of AllplanGeo.Polyhedron3D in the order of the jobs
+    """
+    # Imported here, so the workers can import this module without Allplan
+    from .PolyhedronBuilder import PolyhedronBuilder
+    import NemAll_Python_Geometry as AllplanGeo
+
+    if p_type is None:
+        p_type = AllplanGeo.PolyhedronType.tVolume
+    topologies = build_topologies(factory, jobs, max_workers, executor, chunksize, validate,
+                                  closed=p_type == AllplanGeo.PolyhedronType.tVolume)
+    return [PolyhedronBuilder.from_topology(topology, p_type).create() for topology in topologies]
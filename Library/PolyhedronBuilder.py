@@ -1,5 +1,10 @@
 import NemAll_Python_Geometry as AllplanGeo
-from typing import Tuple, Dict, List
+from array import array
+from typing import Tuple, Dict, List, Iterable, Optional, Sequence, Union
+
+from .MeshTopology import MeshTopologyError, PolyhedronTopology, orient_face_loops
+from .TopologyFile import load_topology, save_topology
+from .VertexWelder import VertexWelder
 
 class PolyhedronError(Exception):
     """
@@ -21,18 +26,38 @@ class PolyhedronBuilder:
     Note:
         This builder was tested on smaller objects
         It might have problem with large amounts of edges and vertices due to the string dictionary lookup
+        For large meshes use the bulk functions add_vertices(), add_edges() and add_faces() or the
+        from_arrays() constructor, which work with indexes and do not need any names
 
     Hints:
         1) 
         If the number of vertices, edges and faces of a polyhedron is static, 
         create the polyhedron normally, and then check the number of each of the 
         elements by calling get_specs(), and then hard-code the number of elements
+        If even the vertices, edges and faces are static (and only the coordinates are scaled), save the finished
+        builder once with save() and create it with load(), which reads the arrays without any name lookup
+        or loop resolution, optionally scaling or transforming the coordinates
 
         2)
         If the number of parts of the polyhedron is larger than one, and you need it to be one part (to be a volume)
         Print out the parts of the polyhedron by calling builder.polyhedron.GetParts() and check which faces are in seperate parts.
         When you identify which faces are seperate, when creating that face, instead of calling builder.create_face(edge_list) call
         the builder.create_face_inverted(edge_list) function
+
+        3)
+        Instead of declaring the edges and the orientation of the faces by hand, the faces can be added as loops of vertices
+        with add_face_loop(). The edges are created automatically and shared between neighbouring faces, and the faces are
+        turned so that the polyhedron is one consistently oriented part, hence hint 2 is not needed
+
+        4)
+        If the vertices come from generated or imported geometry, the same point is often added several times,
+        which leads to invalid polyhedra or several parts. Create the builder with weld_epsilon > 0, and every vertex
+        closer than weld_epsilon to an existing vertex gets the index of the existing vertex. The number of merged
+        vertices can be checked with merged_count
+
+        5)
+        Prisms, rotational bodies and sweeps along polylines do not have to be built by hand, the functions in the
+        Primitives module compute their vertices, edges and oriented faces, which are added in bulk by from_topology()
     
     Usage example:
         # Create a simple tetrahedron
@@ -64,10 +89,35 @@ class PolyhedronBuilder:
         mod_ele = AllplanBasisElements.ModelElement3D(com_prop, polyhedron)
 
         Another (a bit more complicated) example can be found in the Lichtschacht PythonPart
+
+    Bulk example:
+        # The same tetrahedron, created from arrays (lists, array('d') or NumPy arrays)
+        coordinates = [0, 0, 0,   0, 100, 0,   100, 50, 0,   50, 50, 50]
+        edges = [0, 1,   1, 2,   2, 0,   0, 3,   1, 3,   2, 3]
+        # Faces are loops of edge indexes, the orientation of the edges is resolved by the builder
+        # The loops run counterclockwise seen from outside, so the faces point outwards
+        faces = [[3, 4, 0], [4, 5, 1], [5, 3, 2], [0, 1, 2]]
+
+        builder = PolyhedronBuilder.from_arrays(coordinates, edges, faces)
+        polyhedron = builder.create()
+
+    Face loop example:
+        # The same tetrahedron, only vertices and faces are needed
+        builder = PolyhedronBuilder()
+        builder.add_vertices(coordinates, ["b1", "b2", "b3", "top"])
+
+        # The orientation of the loops does not matter, the faces are oriented by the builder
+        builder.add_face_loop(["b1", "b2", "top"])
+        builder.add_face_loop(["b2", "b3", "top"])
+        builder.add_face_loop(["b3", "b1", "top"])
+        builder.add_face_loop(["b1", "b2", "b3"])
+
+        polyhedron = builder.create()
     """
 
 
-    def __init__(self, p_type:AllplanGeo.PolyhedronType=AllplanGeo.PolyhedronType.tVolume, vertices: int=0, edges: int=0, faces: int=0):
+    def __init__(self, p_type:AllplanGeo.PolyhedronType=AllplanGeo.PolyhedronType.tVolume, vertices: int=0, edges: int=0, faces: int=0,
+                 weld_epsilon: float=0):
         """
         Constructor for the PolyhedronBuilder class
         The vertices, edges and faces arguments are not necessary, but useful for preallocation 
@@ -76,44 +126,81 @@ class PolyhedronBuilder:
         Parameters:
             p_type: AllplanGeo.PolyhedronType   Type of polyhedron being created, default = tVolume
             verices, edges, faces: int          Number of expected vertices, edges and vertices
+            weld_epsilon: float                 Vertices closer than weld_epsilon are merged, default = 0 (no merging)
         """
         # Create Allplan polyhedron and builder encapsulated by this class
         self.polyhedron = AllplanGeo.Polyhedron3D(p_type, vertices, edges, faces, False)
         self.builder = AllplanGeo.Polyhedron3DBuilder(self.polyhedron)
+        self.p_type = p_type
         
         # Vertices and the counter for debugging purposes
         self.vertices: Dict[str, int] = {}
         self.vertex_count: int        = 0
+        # Flat x, y, z coordinates of all vertices
+        self.coordinates              = array("d")
 
         # Edges and edge index
         self.edges: Dict[str, Tuple[int, AllplanGeo.GeometryEdge]]  = {}
         self.index: int = 0
 
+        # Start and end vertex of every edge by edge index, used for orienting the edges of faces
+        self.edge_start = array("i")
+        self.edge_end   = array("i")
+
         # Total face counter
         self.face_count = 0
 
+        # Oriented edges of all created faces, face i uses face_edges[face_offsets[i]:face_offsets[i + 1]]
+        # and ~index marks an edge used from end to start, see get_topology()
+        self.face_offsets = array("i", [0])
+        self.face_edges   = array("i")
+
+        # Faces given as vertex loops, their edges and orientation are resolved in create()
+        # Loop i uses loop_vertices[loop_offsets[i]:loop_offsets[i + 1]]
+        self.loop_offsets  = array("i", [0])
+        self.loop_vertices = array("i")
+
+        # Optional merging of close vertices, and the number of face loops that collapsed because of it
+        self.welder: Optional[VertexWelder] = VertexWelder(weld_epsilon) if weld_epsilon > 0 else None
+        self.collapsed_faces: int           = 0
+
+    @property
+    def merged_count(self) -> int:
+        """
+        Number of added vertices that were merged into an existing vertex
+        """
+        return self.welder.merged_count if self.welder is not None else 0
+
     def add_vertex(self, name: str, x: float, y: float, z: float) -> int:
         """
         Adds vertex with coordinates (x, y, z) to the polyhedron.
         Adds vertex index to the vertices dictionary under the given name
+        When welding, a vertex within weld_epsilon of an existing vertex is not added, the name gets the existing index
 
         Parameters:
             name: str           Name under which the vertex is going to be added to the dictionary
             x, y, z: float      Coordinates of the vertex
         Throws:
             PolyhedronError:    The AppendVertex function returns error
-            PolyhedronError:    Vertex with the same name already exists and was overwritten
+            PolyhedronError:    Vertex with the same name already exists
         Returns:
-            Index of the created vertex
+            Index of the created (or merged) vertex
         """
+        # Check if vertex would be added under the same name
+        if name in self.vertices:
+            raise PolyhedronError(f"Vertex with name '{name}' already exists!")
+
+        if self.welder is not None:
+            index, merged = self.welder.add(x, y, z)
+            if merged:
+                self.vertices[name] = index
+                return index
+
         err, index = self.builder.AppendVertex(AllplanGeo.Point3D(x, y, z))
         if err != AllplanGeo.eGeometryErrorCode.eOK:
             raise PolyhedronError("Error adding vertex to the builder!", err)
         self.vertices[name] = index
-
-        # Check if vertex has been added under the same name
-        if len(self.vertices) == self.vertex_count:
-            raise PolyhedronError(f"Vertex with name '{name}' already exists and was overwritten!")
+        self.coordinates.extend((x, y, z))
         self.vertex_count += 1
         
         return index
@@ -139,6 +226,8 @@ class PolyhedronBuilder:
         if err != AllplanGeo.eGeometryErrorCode.eOK:
             raise PolyhedronError(f"Edge from '{v1}' to '{v2}' can't be added to the polyhedron!", err)
         self.edges[name] = (self.index, edge)
+        self.edge_start.append(edge.GetStartIndex())
+        self.edge_end.append(edge.GetEndIndex())
 
         # Check if edge has been added under the same name
         if len(self.edges) == self.index:
@@ -187,6 +276,7 @@ class PolyhedronBuilder:
         # not invert_start because in the OrientedEdge the flag is for positive/negative direction
         # where positive means from start to end vertex and so on
         face.AppendEdge(AllplanGeo.OrientedEdge(index, not invert_start))
+        oriented = [~index if invert_start else index]
 
 
         for name in edge_list[1:]:
@@ -197,10 +287,12 @@ class PolyhedronBuilder:
             if edge.GetStartIndex() == next_vertex:
                 # Positive direction
                 face.AppendEdge(AllplanGeo.OrientedEdge(index, True))
+                oriented.append(index)
                 next_vertex = edge.GetEndIndex()
             elif edge.GetEndIndex() == next_vertex:
                 # Negative direction
                 face.AppendEdge(AllplanGeo.OrientedEdge(index, False))
+                oriented.append(~index)
                 next_vertex = edge.GetStartIndex()
             else:
                 # The current edge cannot connect to the previous vertex
@@ -218,8 +310,10 @@ class PolyhedronBuilder:
             keys = list(self.vertices.keys())
             first_vertex = keys[vals.index(end_vertex)]
             last_vertex  = keys[vals.index(next_vertex)]                
-            raise PolyhedronError(f"First ({first_edge}) and last edge ({last_edge}) did not connect, the loop started with {first_vertex} and ended with {last_verex}!")
+            raise PolyhedronError(f"First ({first_edge}) and last edge ({last_edge}) did not connect, the loop started with {first_vertex} and ended with {last_vertex}!")
 
+        self.face_edges.extend(oriented)
+        self.face_offsets.append(len(self.face_edges))
         self.face_count += 1
         return face
        
@@ -228,15 +322,501 @@ class PolyhedronBuilder:
         inverted.insert(0, inverted.pop())
         return self.create_face(inverted, True)
 
+    @classmethod
+    def from_arrays(cls, coordinates, edges, faces: Iterable[Sequence[int]],
+                    p_type: AllplanGeo.PolyhedronType=AllplanGeo.PolyhedronType.tVolume,
+                    vertex_names: Optional[Sequence[str]]=None,
+                    edge_names: Optional[Sequence[str]]=None,
+                    weld_epsilon: float=0) -> "PolyhedronBuilder":
+        """
+        Creates a builder from arrays of vertices, edges and faces in one call
+        The polyhedron is preallocated from the lengths of the arrays
+
+        Parameters:
+            coordinates                 Vertex coordinates, see add_vertices()
+            edges                       Pairs of vertex indexes, see add_edges()
+            faces                       Loops of edge indexes, see add_faces()
+            p_type: PolyhedronType      Type of polyhedron being created, default = tVolume
+            vertex_names, edge_names    Optional names of the vertices and edges
+            weld_epsilon: float         Vertices closer than weld_epsilon are merged and the edges renumbered accordingly,
+                                        see _add_welded_edges(). Faces with less than 3 edges left are skipped
+                                        and counted in collapsed_faces
+        Throws:
+            PolyhedronError:    Any of the elements could not be added
+        Returns:
+            Builder containing all the elements, ready for create()
+        """
+        coordinates = _to_array(coordinates, "d", 3)
+        edges       = _to_array(edges, "i", 2)
+        faces       = faces.tolist() if hasattr(faces, "tolist") else faces
+
+        builder = cls(p_type, len(coordinates) // 3, len(edges) // 2, len(faces), weld_epsilon)
+        indexes = builder.add_vertices(coordinates, vertex_names)
+        if builder.welder is None:
+            builder.add_edges(edges, edge_names)
+            builder.add_faces(faces)
+            return builder
+
+        edge_indexes = builder._add_welded_edges(array("i", [indexes[vertex] for vertex in edges]), edge_names)
+        loops = []
+        for loop in faces:
+            loop = [edge_indexes[edge] for edge in loop if edge_indexes[edge] >= 0]
+            if len(loop) < 3:
+                builder.collapsed_faces += 1
+            else:
+                loops.append(loop)
+        builder.add_faces(loops)
+        return builder
+
+    def add_vertices(self, coordinates, names: Optional[Sequence[str]]=None) -> range:
+        """
+        Adds several vertices to the polyhedron at once
+        No names are needed, but if given they are added to the vertices dictionary
+        When welding, vertices within weld_epsilon of an existing vertex are not added, they get the existing index
+
+        Parameters:
+            coordinates             Flat x, y, z coordinates (list, array('d'), NumPy array)
+                                    or a sequence of (x, y, z) triples / NumPy array of shape (n, 3)
+            names: Sequence[str]    Optional names of the vertices, one per vertex
+        Throws:
+            PolyhedronError:    The AppendVertex function returns error
+            PolyhedronError:    The number of coordinates is not divisible by 3
+            PolyhedronError:    The number of names does not match the number of vertices
+            PolyhedronError:    Vertex with the same name already exists, or a name is given twice
+        Returns:
+            Range of the created vertex indexes, or when welding an array with the index of every given vertex
+        """
+        coordinates = _to_array(coordinates, "d", 3)
+        if len(coordinates) % 3:
+            raise PolyhedronError(f"The number of coordinates ({len(coordinates)}) is not divisible by 3!")
+        count = len(coordinates) // 3
+        # The names are checked before anything is added, so a wrong name leaves the builder unchanged
+        if names is not None:
+            _check_names(names, count, self.vertices, "Vertex", "vertices")
+        if self.welder is not None:
+            return self._add_welded_vertices(coordinates, names)
+
+        # Local lookups, as this loop is the hot path for large meshes
+        append_vertex = self.builder.AppendVertex
+        point         = AllplanGeo.Point3D
+        ok            = AllplanGeo.eGeometryErrorCode.eOK
+
+        first = -1
+        for i in range(0, len(coordinates), 3):
+            err, index = append_vertex(point(coordinates[i], coordinates[i + 1], coordinates[i + 2]))
+            if err != ok:
+                raise PolyhedronError(f"Error adding vertex {i // 3} to the builder!", err)
+            if first < 0:
+                first = index
+        if first < 0:
+            first = self.vertex_count
+        self.coordinates.extend(coordinates)
+
+        # Optional name side table
+        if names is not None:
+            self.vertices.update(zip(names, range(first, first + count)))
+
+        self.vertex_count += count
+        return range(first, first + count)
+
+    def _add_welded_vertices(self, coordinates: array, names: Optional[Sequence[str]]) -> array:
+        """
+        Adds several vertices, merging the ones within weld_epsilon of an existing vertex
+
+        Parameters:
+            coordinates: array      Flat x, y, z coordinates
+            names: Sequence[str]    Optional names of the vertices, one per vertex, already checked by add_vertices()
+        Throws:
+            PolyhedronError:    The AppendVertex function returns error
+        Returns:
+            Array with the vertex index of every given vertex
+        """
+        weld          = self.welder.add
+        append_vertex = self.builder.AppendVertex
+        point         = AllplanGeo.Point3D
+        ok            = AllplanGeo.eGeometryErrorCode.eOK
+
+        indexes = array("i")
+        added = 0
+        for i in range(0, len(coordinates), 3):
+            x, y, z = coordinates[i], coordinates[i + 1], coordinates[i + 2]
+            index, merged = weld(x, y, z)
+            if not merged:
+                err, index = append_vertex(point(x, y, z))
+                if err != ok:
+                    raise PolyhedronError(f"Error adding vertex {i // 3} to the builder!", err)
+                self.coordinates.extend((x, y, z))
+                added += 1
+            indexes.append(index)
+
+        if names is not None:
+            self.vertices.update(zip(names, indexes))
+
+        self.vertex_count += added
+        return indexes
+
+    def add_edges(self, edges, names: Optional[Sequence[str]]=None) -> range:
+        """
+        Adds several edges to the polyhedron at once
+        No names are needed, but if given they are added to the edges dictionary
+
+        Parameters:
+            edges                   Flat start, end vertex indexes (list, array('i'), NumPy array)
+                                    or a sequence of (start, end) pairs / NumPy array of shape (n, 2)
+            names: Sequence[str]    Optional names of the edges, one per edge
+        Throws:
+            PolyhedronError:    The AppendEdge function returns error
+            PolyhedronError:    The number of indexes is not divisible by 2
+            PolyhedronError:    The number of names does not match the number of edges
+            PolyhedronError:    Edge with the same name already exists, or a name is given twice
+        Returns:
+            Range of the created edge indexes
+        """
+        edges = _to_array(edges, "i", 2)
+        if len(edges) % 2:
+            raise PolyhedronError(f"The number of edge indexes ({len(edges)}) is not divisible by 2!")
+        count = len(edges) // 2
+        if names is not None:
+            _check_names(names, count, self.edges, "Edge", "edges")
+
+        append_edge   = self.polyhedron.AppendEdge
+        geometry_edge = AllplanGeo.GeometryEdge
+        ok            = AllplanGeo.eGeometryErrorCode.eOK
+
+        first = self.index
+        for i in range(0, len(edges), 2):
+            err = append_edge(geometry_edge(edges[i], edges[i + 1]))
+            if err != ok:
+                raise PolyhedronError(f"Edge from vertex {edges[i]} to {edges[i + 1]} can't be added to the polyhedron!", err)
+        self.edge_start.extend(edges[0::2])
+        self.edge_end.extend(edges[1::2])
+
+        # Optional name side table
+        if names is not None:
+            for offset, name in enumerate(names):
+                index = first + offset
+                self.edges[name] = (index, geometry_edge(self.edge_start[index], self.edge_end[index]))
+
+        self.index += count
+        return range(first, first + count)
+
+    def _add_welded_edges(self, edges: array, names: Optional[Sequence[str]]) -> array:
+        """
+        Adds the edges between welded vertices
+        Edges whose ends were merged into one vertex are dropped (with their names), and edges connecting
+        the same two vertices are added only once, their names all refer to the added edge
+
+        Parameters:
+            edges: array            Flat start, end vertex indexes, already renumbered to the welded vertices
+            names: Sequence[str]    Optional names of the edges, one per edge
+        Throws:
+            PolyhedronError:    The AppendEdge function returns error
+            PolyhedronError:    The number of names does not match the number of edges
+            PolyhedronError:    Edge with the same name already exists, or a name is given twice
+        Returns:
+            Array with the edge index of every given edge, -1 for the dropped edges
+        """
+        if len(edges) % 2:
+            raise PolyhedronError(f"The number of edge indexes ({len(edges)}) is not divisible by 2!")
+        if names is not None:
+            _check_names(names, len(edges) // 2, self.edges, "Edge", "edges")
+
+        # Unordered vertex pair -> edge index
+        pairs: Dict[Tuple[int, int], int] = {}
+        unique, unique_names, merged_names = array("i"), [], []
+        edge_indexes = array("i")
+        for i in range(0, len(edges), 2):
+            start, end = edges[i], edges[i + 1]
+            if start == end:
+                edge_indexes.append(-1)
+                continue
+            key = (start, end) if start < end else (end, start)
+            index = pairs.get(key)
+            if index is None:
+                index = pairs[key] = self.index + len(unique) // 2
+                unique.extend((start, end))
+                if names is not None:
+                    unique_names.append(names[i // 2])
+            elif names is not None:
+                merged_names.append((names[i // 2], index))
+            edge_indexes.append(index)
+
+        self.add_edges(unique, None if names is None else unique_names)
+        for name, index in merged_names:
+            self.edges[name] = (index, AllplanGeo.GeometryEdge(self.edge_start[index], self.edge_end[index]))
+        return edge_indexes
+
+    def add_faces(self, faces: Iterable[Sequence[int]]) -> int:
+        """
+        Adds several faces to the polyhedron at once
+        Every face is a closed loop of edge indexes in loop order, the direction of every edge
+        (including the first one) is resolved from its neighbours, so no invert_start flag is needed
+        To flip the orientation of a face, reverse the order of its edges
+
+        Parameters:
+            faces: Iterable[Sequence[int]]  Edge index loops (lists, arrays or rows of a NumPy array)
+        Throws:
+            PolyhedronError:    The edges of a face do not form a closed loop
+        Returns:
+            Number of created faces
+        """
+        if hasattr(faces, "tolist"):
+            faces = faces.tolist()
+
+        create_face   = self.polyhedron.CreateFace
+        oriented_edge = AllplanGeo.OrientedEdge
+
+        face_edges, face_offsets = self.face_edges, self.face_offsets
+
+        count = 0
+        for loop in faces:
+            face = create_face(len(loop))
+            for index, positive in self._orient_loop(loop):
+                face.AppendEdge(oriented_edge(index, positive))
+                face_edges.append(index if positive else ~index)
+            face_offsets.append(len(face_edges))
+            count += 1
+
+        self.face_count += count
+        return count
+
+    def add_face_loop(self, loop: Sequence[Union[int, str]]) -> None:
+        """
+        Adds a face given as a closed loop of vertices
+        The edges of the face are created in create(), where edges shared with other face loops are created only once
+        and the faces are oriented consistently, so neither the edges nor their direction have to be considered
+        When welding, vertices repeated in a row (merged by welding) are removed from the loop, and loops with less than
+        3 vertices left are skipped and counted in collapsed_faces
+
+        Parameters:
+            loop: Sequence[int | str]   Vertex indexes or names in loop order
+        Throws:
+            KeyError:           A vertex name is not in the vertices dictionary
+        """
+        vertices = self.vertices
+        loop = [vertices[vertex] if isinstance(vertex, str) else vertex for vertex in loop]
+
+        if self.welder is not None:
+            loop = [vertex for i, vertex in enumerate(loop) if vertex != loop[i - 1]]
+            if len(loop) < 3:
+                self.collapsed_faces += 1
+                return
+        self.loop_vertices.extend(loop)
+        self.loop_offsets.append(len(self.loop_vertices))
+
+    def add_face_loops(self, loops: Iterable[Sequence[Union[int, str]]]) -> None:
+        """
+        Adds several faces given as closed loops of vertices, see add_face_loop()
+
+        Parameters:
+            loops: Iterable[Sequence[int | str]]    Vertex loops (lists, arrays or rows of a NumPy array)
+        """
+        if hasattr(loops, "tolist"):
+            loops = loops.tolist()
+        for loop in loops:
+            self.add_face_loop(loop)
+
+    def _create_loop_faces(self) -> None:
+        """
+        Creates the edges and faces of all the added face loops
+        Already existing edges are reused, and the loops are oriented to agree with the already existing faces.
+        The other closed parts are oriented outwards
+
+        Throws:
+            PolyhedronError:    The face loops do not describe a valid surface
+        """
+        try:
+            topology = orient_face_loops(self._face_loops(), self.coordinates, self.edge_start, self.edge_end,
+                                         self.face_offsets, self.face_edges)
+        except MeshTopologyError as err:
+            raise PolyhedronError(err.message) from err
+
+        # Only the edges that do not exist yet are appended
+        first = self.index
+        new_edges = array("i")
+        for index in range(first, len(topology.edge_start)):
+            new_edges.append(topology.edge_start[index])
+            new_edges.append(topology.edge_end[index])
+        self.add_edges(new_edges)
+
+        self.add_oriented_faces(topology.face_offsets, topology.face_edges)
+        self.loop_offsets  = array("i", [0])
+        self.loop_vertices = array("i")
+
+    def _face_loops(self) -> Iterable[array]:
+        """
+        Iterates over the vertex loops added by add_face_loop()
+        """
+        offsets, vertices = self.loop_offsets, self.loop_vertices
+        for loop in range(len(offsets) - 1):
+            yield vertices[offsets[loop]:offsets[loop + 1]]
+
+    def add_oriented_faces(self, face_offsets: Sequence[int], face_edges: Sequence[int]) -> None:
+        """
+        Creates faces from flat arrays of already oriented edges, as returned by MeshTopology.orient_face_loops()
+        No checks are done, the edges have to exist and form closed loops
+
+        Parameters:
+            face_offsets    Face i uses face_edges[face_offsets[i]:face_offsets[i + 1]]
+            face_edges      Edge indexes, ~index marks an edge used from end to start
+        """
+        create_face   = self.polyhedron.CreateFace
+        oriented_edge = AllplanGeo.OrientedEdge
+
+        for face in range(len(face_offsets) - 1):
+            begin, end = face_offsets[face], face_offsets[face + 1]
+            polyhedron_face = create_face(end - begin)
+            for entry in face_edges[begin:end]:
+                if entry >= 0:
+                    polyhedron_face.AppendEdge(oriented_edge(entry, True))
+                else:
+                    polyhedron_face.AppendEdge(oriented_edge(~entry, False))
+
+        # Record the faces, shifted behind the already existing ones
+        base = len(self.face_edges)
+        self.face_edges.extend(face_edges)
+        self.face_offsets.extend(base + offset for offset in face_offsets[1:])
+        self.face_count += len(face_offsets) - 1
+
+    def get_topology(self) -> PolyhedronTopology:
+        """
+        Get the finished topology of the polyhedron as flat arrays, which can be saved or sent to another process
+        and turned back into a builder by from_topology() without any name lookup or loop resolution
+        The added face loops are created first, if there are any
+
+        Throws:
+            PolyhedronError:    The face loops do not describe a valid surface
+        Returns:
+            PolyhedronTopology with the coordinates, edges, oriented faces and the name tables
+        """
+        if len(self.loop_offsets) > 1:
+            self._create_loop_faces()
+        return PolyhedronTopology(self.coordinates, self.edge_start, self.edge_end, self.face_offsets, self.face_edges,
+                                  dict(self.vertices), {name: index for name, (index, _) in self.edges.items()},
+                                  int(self.p_type))
+
+    @classmethod
+    def from_topology(cls, topology: PolyhedronTopology, p_type=None) -> "PolyhedronBuilder":
+        """
+        Creates a builder from a topology returned by get_topology()
+        The polyhedron is preallocated and filled from the arrays, only the names given in the topology are set
+
+        Parameters:
+            topology: PolyhedronTopology    Coordinates, edges and oriented faces
+            p_type: PolyhedronType          Type of polyhedron being created, default = the type saved in the topology,
+                                            or tVolume if it has none
+        Throws:
+            PolyhedronError:    Any of the elements could not be added
+        Returns:
+            Builder containing all the elements, ready for create()
+        """
+        if p_type is None:
+            if topology.polyhedron_type is None:
+                p_type = AllplanGeo.PolyhedronType.tVolume
+            else:
+                p_type = AllplanGeo.PolyhedronType.values[topology.polyhedron_type]
+
+        edge_count = len(topology.edge_start)
+        builder = cls(p_type, len(topology.coordinates) // 3, edge_count, len(topology.face_offsets) - 1)
+
+        edges = array("i", [0]) * (2 * edge_count)
+        edges[0::2] = _to_array(topology.edge_start, "i", 1)
+        edges[1::2] = _to_array(topology.edge_end, "i", 1)
+
+        builder.add_vertices(topology.coordinates)
+        builder.add_edges(edges)
+        builder.add_oriented_faces(topology.face_offsets, _to_array(topology.face_edges, "i", 1))
+
+        # Name tables
+        builder.vertices.update(topology.vertex_names)
+        for name, index in topology.edge_names.items():
+            builder.edges[name] = (index, AllplanGeo.GeometryEdge(builder.edge_start[index], builder.edge_end[index]))
+        return builder
+
+    def save(self, path: str) -> None:
+        """
+        Saves the finished topology (see get_topology()) into a compact binary file, see TopologyFile.save_topology()
+
+        Parameters:
+            path: str   Path of the file, an existing file is replaced
+        Throws:
+            PolyhedronError:    The face loops do not describe a valid surface
+            TopologyFileError:  A name contains a zero character
+        """
+        save_topology(self.get_topology(), path)
+
+    @classmethod
+    def load(cls, path: str, p_type=None, transform: Optional[Sequence[float]]=None, names: bool=True) -> "PolyhedronBuilder":
+        """
+        Creates a builder from a file written by save(), see from_topology()
+
+        Parameters:
+            path: str                   Path of the file
+            p_type: PolyhedronType      Type of polyhedron being created, default = the type it was saved with
+            transform: Sequence[float]  Optional scale factors (sx, sy, sz) or affine matrix applied to the coordinates,
+                                        see TopologyFile.transform_topology()
+            names: bool                 Load the vertex and edge names, default = True
+        Throws:
+            TopologyFileError:  The file can't be read or is no topology file of this version
+            PolyhedronError:    Any of the elements could not be added
+        Returns:
+            Builder containing all the elements, ready for create()
+        """
+        return cls.from_topology(load_topology(path, transform, names, memory_map=True), p_type)
+
+    def _orient_loop(self, loop: Sequence[int]) -> List[Tuple[int, bool]]:
+        """
+        Resolves the direction of every edge in a loop of edge indexes
+
+        Parameters:
+            loop: Sequence[int]     Edge indexes in loop order
+        Throws:
+            PolyhedronError:    The edges do not form a closed loop
+        Returns:
+            List of (edge index, positive direction) tuples
+        """
+        starts, ends = self.edge_start, self.edge_end
+        if len(loop) < 3:
+            raise PolyhedronError(f"Face {list(loop)} has less than 3 edges!")
+
+        # The first edge points towards the vertex it shares with the second edge
+        first, second = loop[0], loop[1]
+        if ends[first] in (starts[second], ends[second]):
+            end_vertex, next_vertex = starts[first], ends[first]
+            oriented = [(first, True)]
+        elif starts[first] in (starts[second], ends[second]):
+            end_vertex, next_vertex = ends[first], starts[first]
+            oriented = [(first, False)]
+        else:
+            raise PolyhedronError(f"The edges {first} and {second} of the face {list(loop)} are not connected!")
+
+        for index in loop[1:]:
+            if starts[index] == next_vertex:
+                oriented.append((index, True))
+                next_vertex = ends[index]
+            elif ends[index] == next_vertex:
+                oriented.append((index, False))
+                next_vertex = starts[index]
+            else:
+                raise PolyhedronError(f"The edge {index} cannot connect to the vertex {next_vertex} of the face {list(loop)}!")
+
+        if next_vertex != end_vertex:
+            raise PolyhedronError(f"The face {list(loop)} is not closed, it starts in vertex {end_vertex} and ends in vertex {next_vertex}!")
+        return oriented
+
     def create(self) -> AllplanGeo.Polyhedron3D:
         """
         Creates polyhedron and checks for validity.
+        The faces added by add_face_loop() are created here
         
         Throws:
+            PolyhedronError: The face loops do not describe a valid surface
             PolyhedronError: The defined polyhedron is not valid
         Returns:
             Created polyhedron
         """
+        if len(self.loop_offsets) > 1:
+            self._create_loop_faces()
         self.builder.Complete()
         if not self.polyhedron.IsValid():
             raise PolyhedronError("Polyhedron not valid!")
@@ -249,4 +829,56 @@ class PolyhedronBuilder:
         Returns:
             Tuple with count of verteces, edges and faces
         """
-        return self.vertex_count, self.index, self.face_count
\ No newline at end of file
+        return self.vertex_count, self.index, self.face_count
+
+
+def _check_names(names: Sequence[str], count: int, table: Dict[str, object], kind: str, plural: str) -> None:
+    """
+    Checks the names of elements added in bulk, before any of them is added
+
+    Parameters:
+        names: Sequence[str]    Names of the new elements
+        count: int              Number of the new elements
+        table: Dict             Name table of the existing elements
+        kind, plural: str       "Vertex" and "vertices" or "Edge" and "edges", used in the messages
+    Throws:
+        PolyhedronError:    The number of names does not match, a name is repeated or already exists
+    """
+    if len(names) != count:
+        raise PolyhedronError(f"Got {len(names)} names for {count} {plural}!")
+    if len(set(names)) != len(names):
+        seen = set()
+        repeated = next(name for name in names if name in seen or seen.add(name))
+        raise PolyhedronError(f"The name '{repeated}' is given to several {plural}!")
+    existing = next((name for name in names if name in table), None)
+    if existing is not None:
+        raise PolyhedronError(f"{kind} with name '{existing}' already exists!")
+
+
+def _to_array(values, typecode: str, width: int) -> array:
+    """
+    Converts flat or nested sequences and NumPy arrays into a flat array of the given type
+
+    Parameters:
+        values          Flat sequence, sequence of tuples, array or NumPy array
+        typecode: str   Type code of the resulting array ("d" for coordinates, "i" for indexes)
+        width: int      Number of values in one element (3 for vertices, 2 for edges)
+    Returns:
+        Flat array with the values
+    """
+    if isinstance(values, array) and values.typecode == typecode:
+        return values
+    # Memory mapped arrays, see TopologyFile.load_topology()
+    if isinstance(values, memoryview) and values.format == typecode:
+        result = array(typecode)
+        result.frombytes(values.cast("B"))
+        return result
+    # NumPy arrays, without importing NumPy
+    if hasattr(values, "ravel"):
+        return array(typecode, values.ravel().tolist())
+    values = list(values)
+    if values and isinstance(values[0], (tuple, list)):
+        if any(len(item) != width for item in values):
+            raise PolyhedronError(f"Every element has to have exactly {width} values!")
+        return array(typecode, [value for item in values for value in item])
+    return array(typecode, values)
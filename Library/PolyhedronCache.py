@@ -0,0 +1,210 @@
+import hashlib
+import os
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+import NemAll_Python_Geometry as AllplanGeo
+
+from .AtomicFile import ignore_cache_errors
+from .MeshTopology import PolyhedronTopology
+from .PolyhedronBuilder import PolyhedronBuilder
+from .TopologyFile import TopologyFileError, load_topology, save_topology
+
+
+class _CacheEntry(NamedTuple):
+    polyhedron: AllplanGeo.Polyhedron3D
+    size: int
+
+
+class PolyhedronCache:
+    """
+    Cache of finished polyhedra, keyed by the parameters they were built from.
+
+    The polyhedra are kept in memory in a least recently used order, and when the memory budget is exceeded
+    the least recently used ones are evicted. If a directory is given, the topology of every built polyhedron is
+    additionally saved there, so it survives restarts of Allplan and is rebuilt without calling the factory.
+
+    The key can be any combination of values (numbers, strings, tuples, arrays, NumPy arrays...),
+    which are hashed into a short string by make_key(). Usually the key are the parameters of the PythonPart
+    the polyhedron depends on, but it can also be the input coordinates and topology itself.
+
+    Note:
+        The returned polyhedron is shared between all the calls with the same key, so do not modify it
+
+    Usage example:
+        # Once, e.g. in the constructor of the interactor
+        self.cache = PolyhedronCache(max_bytes=64 * 2**20, directory=os.path.join(pyp_path, "cache"))
+
+        # Every time the geometry is needed
+        def build():
+            builder = PolyhedronBuilder()
+            ...
+            return builder
+
+        key = PolyhedronCache.make_key("Lichtschacht", width, height, depth)
+        polyhedron = self.cache.get_or_create(key, build)
+        print(self.cache.stats())
+    """
+
+    def __init__(self, max_bytes: int=64 * 2**20, directory: Optional[str]=None):
+        """
+        Constructor for the PolyhedronCache class
+
+        Parameters:
+            max_bytes: int      Memory budget of the in-memory cache (size of the topology arrays), default = 64 MB
+            directory: str      Optional directory for the on-disk cache, created if it does not exist
+        """
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self.size: int = 0
+
+        # Counters
+        self.hits: int      = 0
+        self.disk_hits: int = 0
+        self.misses: int    = 0
+        self.evictions: int = 0
+
+    @staticmethod
+    def make_key(*values: Any) -> str:
+        """
+        Hashes the given values into a key
+        Arrays, bytes and NumPy arrays are hashed by their content, everything else by its repr()
+
+        Parameters:
+            values: Any     Values the polyhedron depends on
+        Returns:
+            Hex digest of the values
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        for value in values:
+            if isinstance(value, (bytes, bytearray, memoryview)):
+                digest.update(b"b%d:" % len(value))
+                digest.update(value)
+            elif isinstance(value, array):
+                digest.update(b"a%s%d:" % (value.typecode.encode(), len(value)))
+                digest.update(value.tobytes())
+            elif hasattr(value, "tobytes") and hasattr(value, "dtype"):
+                digest.update(f"n{value.dtype}{value.shape}:".encode())
+                digest.update(value.tobytes())
+            else:
+                text = repr(value).encode()
+                digest.update(b"r%d:" % len(text))
+                digest.update(text)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[AllplanGeo.Polyhedron3D]:
+        """
+        Get the polyhedron saved under the key from memory or the disk
+
+        Parameters:
+            key: str    Key created by make_key()
+        Returns:
+            Cached polyhedron, None if there is none
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.polyhedron
+
+        topology = self._load(key)
+        if topology is not None:
+            polyhedron = PolyhedronBuilder.from_topology(topology).create()
+            self._store(key, polyhedron, topology.nbytes)
+            self.disk_hits += 1
+            return polyhedron
+
+        self.misses += 1
+        return None
+
+    def get_or_create(self, key: str, factory: Callable[[], PolyhedronBuilder]) -> AllplanGeo.Polyhedron3D:
+        """
+        Get the polyhedron saved under the key, or build it and save it if there is none
+
+        Parameters:
+            key: str                                Key created by make_key()
+            factory: Callable[[], PolyhedronBuilder]  Function returning a filled builder, called only on a miss
+        Throws:
+            PolyhedronError:    The built polyhedron is not valid
+        Returns:
+            Cached or newly built polyhedron
+        """
+        polyhedron = self.get(key)
+        if polyhedron is not None:
+            return polyhedron
+
+        builder = factory()
+        polyhedron = builder.create()
+        topology = builder.get_topology()
+        self._store(key, polyhedron, topology.nbytes)
+        self._save(key, topology)
+        return polyhedron
+
+    def clear(self, disk: bool=False) -> None:
+        """
+        Removes all polyhedra from memory, and optionally from the disk
+
+        Parameters:
+            disk: bool  Should the files in the directory be removed as well
+        """
+        self._entries.clear()
+        self.size = 0
+        if disk and self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith(".topology"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the counters of the cache
+
+        Returns:
+            Dictionary with hits, disk_hits, misses, evictions, entries and size in bytes
+        """
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "size": self.size,
+        }
+
+    def _store(self, key: str, polyhedron: AllplanGeo.Polyhedron3D, size: int) -> None:
+        # Polyhedra larger than the whole budget are not kept in memory
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= old.size
+        self._entries[key] = _CacheEntry(polyhedron, size)
+        self.size += size
+
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= evicted.size
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.topology")
+
+    def _save(self, key: str, topology: PolyhedronTopology) -> None:
+        if self.directory is None:
+            return
+        # The polyhedron is kept in memory anyway
+        with ignore_cache_errors():
+            save_topology(topology, self._path(key))
+
+    def _load(self, key: str) -> Optional[PolyhedronTopology]:
+        if self.directory is None:
+            return None
+        # Missing or damaged files and files of another version are rebuilt
+        try:
+            return load_topology(self._path(key))
+        except TopologyFileError:
+            return None
@@ -0,0 +1,559 @@
+from array import array
+from math import floor
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .MeshTopology import FaceTopology, PolyhedronTopology, orient_face_loops
+from .VertexWelder import VertexWelder
+
+
+class MeshError(Exception):
+    """
+    Error class for PolyhedronMesh, contains all the problems found by the check
+    """
+
+    def __init__(self, message: str, problems: Optional[List["MeshProblem"]]=None):
+        self.message = message
+        self.problems = problems or []
+        super().__init__(self.message)
+
+
+class MeshProblem(NamedTuple):
+    """
+    Problem found by PolyhedronMesh.check()
+
+    Attributes:
+        kind: str               One of "face", "open_edge", "non_manifold_edge", "non_manifold_vertex",
+                                "orientation", "unused_vertex", "euler"
+        message: str            Description of the problem with vertex names
+        vertices: Tuple[int]    Offending vertex indexes (one vertex or the two vertices of an edge)
+        face: int               Offending face index, -1 if the problem is not bound to one face
+    """
+    kind: str
+    message: str
+    vertices: Tuple[int, ...] = ()
+    face: int = -1
+
+
+class PolyhedronMesh:
+    """
+    Compact mesh of vertices and faces given as vertex loops, independent of Allplan.
+    The coordinates and faces are saved in flat arrays, names of the vertices are optional.
+
+    The mesh can be checked for problems before anything is sent to Allplan, which is cheaper than
+    finding out that the polyhedron is not valid after it has been built, and tells where the problem is.
+    All the checks are done in linear time.
+
+    Usage example:
+        mesh = PolyhedronMesh()
+        mesh.add_vertex(0, 0, 0, "b1")
+        mesh.add_vertex(0, 100, 0, "b2")
+        mesh.add_vertex(100, 50, 0, "b3")
+        mesh.add_vertex(50, 50, 50, "top")
+
+        mesh.add_faces([[0, 1, 3], [1, 2, 3], [2, 0, 3], [0, 2, 1]])
+
+        # Get the list of problems, or raise a MeshError containing them
+        problems = mesh.check()
+        mesh.validate()
+
+        # Checks, orients and creates the Allplan polyhedron
+        polyhedron = mesh.to_polyhedron()
+
+        # Coarse polyhedron for the preview, details smaller than 50 mm are merged
+        preview = mesh.to_polyhedron(lod=50)
+    """
+
+    __slots__ = ("coordinates", "face_offsets", "face_vertices", "vertex_names", "welder")
+
+    def __init__(self, coordinates: Optional[Sequence[float]]=None, faces: Optional[Iterable[Sequence[int]]]=None,
+                 vertex_names: Optional[Sequence[str]]=None, weld_epsilon: float=0):
+        """
+        Constructor for the PolyhedronMesh class
+
+        Parameters:
+            coordinates: Sequence[float]        Optional flat x, y, z coordinates of the vertices
+            faces: Iterable[Sequence[int]]      Optional faces as loops of vertex indexes
+            vertex_names: Sequence[str]         Optional names of the vertices, used in the problem messages
+            weld_epsilon: float                 Vertices closer than weld_epsilon are merged, default = 0 (no merging)
+        """
+        self.coordinates   = array("d")
+        self.face_offsets  = array("i", [0])
+        self.face_vertices = array("i")
+        self.vertex_names: Optional[List[str]] = None
+        self.welder: Optional[VertexWelder]    = VertexWelder(weld_epsilon) if weld_epsilon > 0 else None
+
+        if coordinates is not None:
+            self.add_vertices(coordinates, vertex_names)
+        if faces is not None:
+            self.add_faces(faces)
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.coordinates) // 3
+
+    @property
+    def face_count(self) -> int:
+        return len(self.face_offsets) - 1
+
+    @property
+    def merged_count(self) -> int:
+        """
+        Number of added vertices that were merged into an existing vertex
+        """
+        return self.welder.merged_count if self.welder is not None else 0
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate memory used by the arrays of the mesh
+        """
+        return sum(values.itemsize * len(values) for values in (self.coordinates, self.face_offsets, self.face_vertices))
+
+    def add_vertex(self, x: float, y: float, z: float, name: Optional[str]=None) -> int:
+        """
+        Adds vertex with coordinates (x, y, z)
+
+        Parameters:
+            x, y, z: float      Coordinates of the vertex
+            name: str           Optional name of the vertex
+        Returns:
+            Index of the vertex
+        """
+        if self.welder is not None:
+            index, merged = self.welder.add(x, y, z)
+            if merged:
+                return index
+        index = self.vertex_count
+        self.coordinates.extend((x, y, z))
+        self._add_names([name] if name is not None else None, index, 1)
+        return index
+
+    def add_vertices(self, coordinates: Sequence[float], names: Optional[Sequence[str]]=None) -> range:
+        """
+        Adds several vertices at once
+        When welding, the names of merged vertices are ignored
+
+        Parameters:
+            coordinates         Flat x, y, z coordinates (list, array('d'), NumPy array)
+            names               Optional names of the vertices
+        Throws:
+            MeshError:          The number of coordinates is not divisible by 3
+        Returns:
+            Range of the vertex indexes, or when welding an array with the index of every given vertex
+        """
+        if hasattr(coordinates, "ravel"):
+            coordinates = coordinates.ravel().tolist()
+        if len(coordinates) % 3:
+            raise MeshError(f"The number of coordinates ({len(coordinates)}) is not divisible by 3!")
+        if self.welder is not None:
+            first = self.vertex_count
+            indexes = self.welder.add_vertices(coordinates)
+            self.coordinates.extend(self.welder.coordinates[3 * first:])
+            if names is not None:
+                if len(names) != len(indexes):
+                    raise MeshError(f"Got {len(names)} names for {len(indexes)} vertices!")
+                self._add_names([name for name, index in zip(names, indexes) if index >= first], first, self.vertex_count - first)
+            else:
+                self._add_names(None, first, self.vertex_count - first)
+            return indexes
+        first = self.vertex_count
+        self.coordinates.extend(coordinates)
+        self._add_names(names, first, len(coordinates) // 3)
+        return range(first, self.vertex_count)
+
+    def add_face(self, loop: Sequence[int]) -> int:
+        """
+        Adds a face given as a loop of vertex indexes
+
+        Parameters:
+            loop: Sequence[int]     Vertex indexes in loop order
+        Returns:
+            Index of the face
+        """
+        self.face_vertices.extend(loop)
+        self.face_offsets.append(len(self.face_vertices))
+        return self.face_count - 1
+
+    def add_faces(self, loops: Iterable[Sequence[int]]) -> range:
+        """
+        Adds several faces given as loops of vertex indexes
+        When welding, vertices repeated in a row are removed and loops with less than 3 vertices left are skipped
+
+        Parameters:
+            loops: Iterable[Sequence[int]]  Vertex loops (lists, arrays or rows of a NumPy array)
+        Returns:
+            Range of the face indexes
+        """
+        if hasattr(loops, "tolist"):
+            loops = loops.tolist()
+        first = self.face_count
+        face_vertices, face_offsets = self.face_vertices, self.face_offsets
+        welding = self.welder is not None
+        for loop in loops:
+            if welding:
+                loop = [vertex for i, vertex in enumerate(loop) if vertex != loop[i - 1]]
+                if len(loop) < 3:
+                    continue
+            face_vertices.extend(loop)
+            face_offsets.append(len(face_vertices))
+        return range(first, self.face_count)
+
+    # Same interface as PolyhedronBuilder, so both can be filled by the same code (e.g. MeshImport)
+    add_face_loops = add_faces
+
+    def face(self, index: int) -> array:
+        """
+        Vertex loop of the face with the given index
+        """
+        return self.face_vertices[self.face_offsets[index]:self.face_offsets[index + 1]]
+
+    def faces(self) -> Iterator[array]:
+        """
+        Iterates over the vertex loops of all faces
+        """
+        face_vertices, face_offsets = self.face_vertices, self.face_offsets
+        for face in range(len(face_offsets) - 1):
+            yield face_vertices[face_offsets[face]:face_offsets[face + 1]]
+
+    def vertex_name(self, index: int) -> str:
+        """
+        Name of the vertex if it has one, otherwise its index as a string
+        """
+        if self.vertex_names is not None and 0 <= index < len(self.vertex_names) and self.vertex_names[index] is not None:
+            return f"'{self.vertex_names[index]}'"
+        return str(index)
+
+    def check(self, closed: bool=True, genus: Optional[int]=None, orientation: bool=True) -> List[MeshProblem]:
+        """
+        Checks the mesh for problems, without changing it
+
+        Following checks are done:
+            - every face has at least 3 vertices, all of them exist and no vertex is repeated in a row
+            - every edge is used by two faces (closedness, only if closed is True)
+            - no edge is used by more than two faces and the faces around every vertex form a single fan (manifoldness)
+            - the faces sharing an edge use it in opposite directions (orientation, only if orientation is True)
+            - every vertex is used by a face
+            - the Euler characteristic V - E + F is 2 * (components - genus) (only for closed meshes)
+
+        Parameters:
+            closed: bool    Should the mesh be closed (a volume)
+            genus: int      Expected total number of handles (e.g. 1 for a torus), if not given any even
+                            Euler characteristic that is not larger than 2 * components is accepted
+            orientation: bool   Check the orientation of the faces, skipped before orient() fixes it
+        Returns:
+            List of found problems, empty if the mesh is valid
+        """
+        problems: List[MeshProblem] = []
+        name = self.vertex_name
+        vertex_count = self.vertex_count
+        face_vertices, face_offsets = self.face_vertices, self.face_offsets
+
+        # Faces, the edges (unordered vertex pair -> edge index) and the directed uses of the edges
+        edge_map = {}
+        directed = {}
+        edge_faces: List[List[int]] = []
+        # Slots in face_vertices of both edge vertices (smaller vertex first) for every use of the edge
+        edge_slots: List[List[int]] = []
+        used = array("b", [0]) * vertex_count
+
+        for face in range(len(face_offsets) - 1):
+            begin, end = face_offsets[face], face_offsets[face + 1]
+            count = end - begin
+            if count < 3:
+                problems.append(MeshProblem("face", f"Face {face} has less than 3 vertices!", (), face))
+                continue
+            loop = face_vertices[begin:end]
+            if any(vertex < 0 or vertex >= vertex_count for vertex in loop):
+                problems.append(MeshProblem("face", f"Face {face} uses a vertex that does not exist!", (), face))
+                continue
+
+            for i in range(count):
+                a, b = loop[i], loop[(i + 1) % count]
+                used[a] = 1
+                if a == b:
+                    problems.append(MeshProblem("face", f"Face {face} uses the vertex {name(a)} twice in a row!", (a,), face))
+                    continue
+
+                slots = (begin + i, begin + (i + 1) % count) if a < b else (begin + (i + 1) % count, begin + i)
+                key = (a, b) if a < b else (b, a)
+                index = edge_map.get(key)
+                if index is None:
+                    edge_map[key] = len(edge_faces)
+                    edge_faces.append([face])
+                    edge_slots.append(list(slots))
+                else:
+                    edge_faces[index].append(face)
+                    edge_slots[index].extend(slots)
+
+                if not orientation:
+                    continue
+                other = directed.get((a, b))
+                if other is not None:
+                    problems.append(MeshProblem("orientation", f"The faces {other} and {face} both use the edge from {name(a)} "
+                                                f"to {name(b)} in the same direction!", (a, b), face))
+                else:
+                    directed[(a, b)] = face
+
+        for (a, b), index in edge_map.items():
+            faces = edge_faces[index]
+            if len(faces) == 1 and closed:
+                problems.append(MeshProblem("open_edge", f"The edge between {name(a)} and {name(b)} is only used by "
+                                            f"face {faces[0]}, the mesh is not closed!", (a, b), faces[0]))
+            elif len(faces) > 2:
+                problems.append(MeshProblem("non_manifold_edge", f"The edge between {name(a)} and {name(b)} is used by "
+                                            f"{len(faces)} faces {faces}!", (a, b), faces[2]))
+
+        for vertex in range(vertex_count):
+            if not used[vertex]:
+                problems.append(MeshProblem("unused_vertex", f"The vertex {name(vertex)} is not used by any face!", (vertex,)))
+
+        # The vertex and Euler checks only make sense on a mesh without broken faces and edges
+        if problems:
+            return problems
+
+        problems.extend(self._check_vertex_fans(edge_slots))
+        if closed and not problems:
+            components = self._count_components(edge_faces)
+            euler = vertex_count - len(edge_map) + self.face_count
+            if genus is not None and euler != 2 * (components - genus):
+                problems.append(MeshProblem("euler", f"The Euler characteristic is {euler}, expected {2 * (components - genus)} "
+                                            f"for {components} parts with {genus} handles!"))
+            elif genus is None and (euler % 2 or euler > 2 * components):
+                problems.append(MeshProblem("euler", f"The Euler characteristic {euler} is not possible for a closed "
+                                            f"surface with {components} parts!"))
+        return problems
+
+    def validate(self, closed: bool=True, genus: Optional[int]=None, orientation: bool=True) -> None:
+        """
+        Checks the mesh and raises an error if any problem was found, see check()
+
+        Throws:
+            MeshError:  The mesh has problems, the error contains all of them
+        """
+        problems = self.check(closed, genus, orientation)
+        if problems:
+            shown = "\n".join(problem.message for problem in problems[:10])
+            more  = f"\n... and {len(problems) - 10} more" if len(problems) > 10 else ""
+            raise MeshError(f"The mesh has {len(problems)} problem(s):\n{shown}{more}", problems)
+
+    def orient(self) -> FaceTopology:
+        """
+        Orients the faces consistently (and closed parts outwards) by reversing the loops where needed
+
+        Throws:
+            MeshTopologyError:  The mesh is not manifold or not orientable
+        Returns:
+            FaceTopology with the edges and the oriented faces
+        """
+        topology = orient_face_loops(self.faces(), self.coordinates)
+        if topology.flipped:
+            # Rebuild the vertex loops from the oriented edges
+            starts, ends = topology.edge_start, topology.edge_end
+            self.face_vertices = array("i", [starts[entry] if entry >= 0 else ends[~entry] for entry in topology.face_edges])
+        return topology
+
+    def decimate(self, cell_size: float) -> "PolyhedronMesh":
+        """
+        Creates a coarse copy of the mesh (level of detail) for previews by vertex clustering
+        All vertices in the same cell of a uniform grid are merged into one vertex at their mean, faces left with less than
+        3 vertices are removed, as are pairs of faces collapsed onto each other. The faces keep their orientation, and
+        faces using an edge in the same direction as an earlier face are removed, so every edge is used at most twice.
+
+        Note:
+            The result is only meant to be drawn, collapsed details can leave holes so it is not always a closed volume
+
+        Parameters:
+            cell_size: float    Size of the grid cells, details smaller than that disappear
+        Throws:
+            ValueError:         cell_size is not larger than 0
+        Returns:
+            New decimated mesh without vertex names
+        """
+        if not cell_size > 0:
+            raise ValueError(f"The cell size has to be larger than 0, got {cell_size}!")
+
+        coordinates = self.coordinates
+        cells: Dict[Tuple[int, int, int], int] = {}
+        sums = array("d")
+        counts = array("i")
+        cluster_of = array("i", [0]) * self.vertex_count
+        for vertex in range(self.vertex_count):
+            x, y, z = coordinates[3 * vertex], coordinates[3 * vertex + 1], coordinates[3 * vertex + 2]
+            key = (floor(x / cell_size), floor(y / cell_size), floor(z / cell_size))
+            cluster = cells.get(key)
+            if cluster is None:
+                cluster = cells[key] = len(counts)
+                sums.extend((x, y, z))
+                counts.append(1)
+            else:
+                sums[3 * cluster] += x
+                sums[3 * cluster + 1] += y
+                sums[3 * cluster + 2] += z
+                counts[cluster] += 1
+            cluster_of[vertex] = cluster
+
+        # Sorted vertices of the face -> loop, two faces collapsed onto each other cancel out
+        loops: Dict[Tuple[int, ...], List[int]] = {}
+        for face in self.faces():
+            loop = [cluster_of[vertex] for vertex in face]
+            loop = [vertex for i, vertex in enumerate(loop) if vertex != loop[i - 1]]
+            if len(set(loop)) < 3:
+                continue
+            key = tuple(sorted(loop))
+            if loops.pop(key, None) is None:
+                loops[key] = loop
+
+        # Only the clusters used by the remaining faces are kept
+        index_of: Dict[int, int] = {}
+        directed = set()
+        mesh = PolyhedronMesh()
+        for loop in loops.values():
+            edges = [(vertex, loop[(i + 1) % len(loop)]) for i, vertex in enumerate(loop)]
+            if len(set(loop)) != len(loop) or not directed.isdisjoint(edges):
+                continue
+            directed.update(edges)
+            for cluster in loop:
+                if cluster not in index_of:
+                    index_of[cluster] = len(index_of)
+                    count = counts[cluster]
+                    mesh.coordinates.extend((sums[3 * cluster] / count, sums[3 * cluster + 1] / count, sums[3 * cluster + 2] / count))
+            mesh.add_face([index_of[cluster] for cluster in loop])
+        return mesh
+
+    def to_builder(self, p_type=None, validate: bool=True, lod: float=0):
+        """
+        Checks and orients the mesh and creates a PolyhedronBuilder containing all of its elements
+
+        Parameters:
+            p_type: AllplanGeo.PolyhedronType   Type of the polyhedron, default = tVolume
+            validate: bool                      Should the mesh be checked for problems first
+            lod: float                          Level of detail for previews, if larger than 0 the builder is created from
+                                                decimate(lod) without validation (as faces if it is not a closed volume
+                                                and no p_type is given), default = 0 (full detail)
+        Throws:
+            MeshError:          The mesh has problems
+        Returns:
+            PolyhedronBuilder ready for create()
+        """
+        # Imported here, so the mesh can be used without Allplan
+        from .PolyhedronBuilder import PolyhedronBuilder
+        import NemAll_Python_Geometry as AllplanGeo
+
+        if lod > 0:
+            mesh = self.decimate(lod)
+            # Details collapsed by the decimation can open the volume, then the preview is created from faces
+            if p_type is None and mesh.check():
+                p_type = AllplanGeo.PolyhedronType.tFaces
+            return mesh.to_builder(p_type, validate=False)
+
+        if p_type is None:
+            p_type = AllplanGeo.PolyhedronType.tVolume
+        topology = self.to_topology(validate, closed=p_type == AllplanGeo.PolyhedronType.tVolume)
+        return PolyhedronBuilder.from_topology(topology, p_type)
+
+    def to_topology(self, validate: bool=True, closed: bool=True) -> PolyhedronTopology:
+        """
+        Checks and orients the mesh and creates the finished topology, without Allplan
+        The topology consists only of flat arrays, so it is cheap to pickle (e.g. from a worker process, see ParallelBuild)
+        and is turned into a polyhedron with PolyhedronBuilder.from_topology()
+        Wrongly oriented faces are not a problem, they are reversed by orient()
+
+        Parameters:
+            validate: bool      Should the mesh be checked for problems first
+            closed: bool        Should the mesh be closed (a volume), only used by the check
+        Throws:
+            MeshError:          The mesh has problems
+            MeshTopologyError:  The mesh is not orientable, or not manifold (only without validation)
+        Returns:
+            PolyhedronTopology of the mesh
+        """
+        if validate:
+            # The orientation is checked by orient(), which reverses the faces where needed
+            self.validate(closed, orientation=False)
+        topology = self.orient()
+        names = self.vertex_names
+        vertex_names = {name: index for index, name in enumerate(names) if name is not None} if names is not None else {}
+        return PolyhedronTopology(self.coordinates, topology.edge_start, topology.edge_end,
+                                  topology.face_offsets, topology.face_edges, vertex_names, {})
+
+    def to_polyhedron(self, p_type=None, validate: bool=True, lod: float=0):
+        """
+        Checks and orients the mesh and creates the Allplan polyhedron, see to_builder()
+
+        Returns:
+            Created AllplanGeo.Polyhedron3D
+        """
+        return self.to_builder(p_type, validate, lod).create()
+
+    def _add_names(self, names: Optional[Sequence[str]], first: int, count: int) -> None:
+        """
+        Adds vertex names to the name side table, which is only created when the first name is given
+        """
+        if names is None:
+            if self.vertex_names is not None:
+                self.vertex_names.extend([None] * count)
+            return
+        if len(names) != count:
+            raise MeshError(f"Got {len(names)} names for {count} vertices!")
+        if self.vertex_names is None:
+            self.vertex_names = [None] * first
+        self.vertex_names.extend(names)
+
+    def _check_vertex_fans(self, edge_slots: List[List[int]]) -> List[MeshProblem]:
+        """
+        Checks that the faces around every vertex are connected through edges containing that vertex.
+        Every face corner (slot in face_vertices) is joined with the corner of the neighbouring face on the shared edge,
+        a vertex with more than one group of corners is a point where separate fans touch.
+
+        Parameters:
+            edge_slots: List[List[int]]     Corner slots of the smaller and the larger vertex for every use of every edge
+        """
+        face_vertices = self.face_vertices
+        # Corner slot in face_vertices -> parent slot, union find with path halving
+        parent = array("i", range(len(face_vertices)))
+
+        def find(slot: int) -> int:
+            while parent[slot] != slot:
+                parent[slot] = parent[parent[slot]]
+                slot = parent[slot]
+            return slot
+
+        for slots in edge_slots:
+            if len(slots) != 4:
+                continue
+            for corner in (0, 1):
+                first, second = find(slots[corner]), find(slots[corner + 2])
+                if first != second:
+                    parent[first] = second
+
+        roots = {}
+        problems = []
+        for slot, vertex in enumerate(face_vertices):
+            root = find(slot)
+            known = roots.setdefault(vertex, root)
+            if known != root and known >= 0:
+                problems.append(MeshProblem("non_manifold_vertex", f"Separate groups of faces touch in the vertex "
+                                            f"{self.vertex_name(vertex)}!", (vertex,)))
+                roots[vertex] = -1
+        return problems
+
+    def _count_components(self, edge_faces: List[List[int]]) -> int:
+        """
+        Number of groups of faces connected through edges
+        """
+        parent = array("i", range(self.face_count))
+
+        def find(face: int) -> int:
+            while parent[face] != face:
+                parent[face] = parent[parent[face]]
+                face = parent[face]
+            return face
+
+        components = self.face_count
+        for faces in edge_faces:
+            for other in faces[1:]:
+                first, second = find(faces[0]), find(other)
+                if first != second:
+                    parent[first] = second
+                    components -= 1
+        return components
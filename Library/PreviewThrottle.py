@@ -0,0 +1,108 @@
+import time
+from typing import Callable, Dict, Optional
+
+
+class PreviewThrottle:
+    """
+    Limits how often the preview is redrawn, independent of Allplan.
+
+    Allplan sends a mouse message for every pixel the mouse moves, which is far more often than the preview can
+    be drawn. A frame is only drawn when at least frame_budget seconds (or the duration of the last frame, if it
+    was slower) passed since the last drawn frame, all the frames in between are dropped.
+    The latency of a frame is the time from the first dropped request until the frame was drawn,
+    so it shows how long the preview lagged behind the mouse.
+
+    Counters:
+        frames_drawn, frames_dropped    Number of drawn and dropped frames
+        last_latency, max_latency       Latency of the last drawn frame and the largest latency in seconds
+        total_latency                   Sum of the latencies of all drawn frames, see mean_latency
+
+    Usage example:
+        throttle = PreviewThrottle(1 / 30)
+        # On every mouse message, draw_preview is only called when the frame fits into the budget
+        throttle.draw(draw_preview)
+        # When the preview has to be up to date, e.g. when the mouse stops
+        throttle.draw(draw_preview, force=True)
+    """
+
+    def __init__(self, frame_budget: float=1 / 30, clock: Callable[[], float]=time.perf_counter):
+        """
+        Constructor for the PreviewThrottle class
+
+        Parameters:
+            frame_budget: float     Minimal time between two drawn frames in seconds, default = 1/30 (30 frames per second)
+            clock: Callable         Function returning the current time in seconds
+        """
+        self.frame_budget = frame_budget
+        self.clock        = clock
+
+        self._last_start: Optional[float]    = None
+        self._last_duration: float           = 0.0
+        # Time of the first request that was dropped since the last drawn frame
+        self._pending_since: Optional[float] = None
+
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Resets the counters
+        """
+        self.frames_drawn: int      = 0
+        self.frames_dropped: int    = 0
+        self.last_latency: float    = 0.0
+        self.max_latency: float     = 0.0
+        self.total_latency: float   = 0.0
+
+    @property
+    def pending(self) -> bool:
+        """
+        Was a frame dropped since the last drawn frame, so the preview is out of date
+        """
+        return self._pending_since is not None
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.frames_drawn if self.frames_drawn else 0.0
+
+    def draw(self, function: Callable[[], None], force: bool=False) -> bool:
+        """
+        Calls the function drawing the preview, if the frame fits into the budget
+
+        Parameters:
+            function: Callable  Function drawing the preview
+            force: bool         Draw the frame regardless of the budget
+        Returns:
+            True if the frame was drawn, False if it was dropped
+        """
+        now = self.clock()
+        if not force and self._last_start is not None and now - self._last_start < max(self.frame_budget, self._last_duration):
+            self.frames_dropped += 1
+            if self._pending_since is None:
+                self._pending_since = now
+            return False
+
+        function()
+
+        end = self.clock()
+        latency = end - (now if self._pending_since is None else self._pending_since)
+        self._last_start, self._last_duration, self._pending_since = now, end - now, None
+        self.frames_drawn += 1
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_latency += latency
+        return True
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get the counters of the throttle
+
+        Returns:
+            Dictionary with frames_drawn, frames_dropped, last_latency, mean_latency and max_latency
+        """
+        return {
+            "frames_drawn": self.frames_drawn,
+            "frames_dropped": self.frames_dropped,
+            "last_latency": self.last_latency,
+            "mean_latency": self.mean_latency,
+            "max_latency": self.max_latency,
+        }
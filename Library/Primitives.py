@@ -0,0 +1,387 @@
+import math
+from array import array
+from typing import List, Optional, Sequence, Tuple
+
+from .MeshTopology import PolyhedronTopology, _signed_volume
+
+
+class PrimitiveError(Exception):
+    """
+    Error class for the primitive generators
+    """
+
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+
+def regular_polygon(sides: int, radius: float, x: float=0, y: float=0, rotation: float=0) -> array:
+    """
+    Creates the corner points of a regular polygon, counterclockwise
+
+    Parameters:
+        sides: int          Number of corners
+        radius: float       Distance of the corners from the center
+        x, y: float         Center of the polygon
+        rotation: float     Angle of the first corner in radians, default = 0 (on the x axis)
+    Returns:
+        Flat x, y coordinates of the corners
+    """
+    if sides < 3:
+        raise PrimitiveError(f"A polygon needs at least 3 sides, got {sides}!")
+    step = 2 * math.pi / sides
+    points = array("d", [0.0]) * (2 * sides)
+    points[0::2] = array("d", [x + radius * math.cos(rotation + i * step) for i in range(sides)])
+    points[1::2] = array("d", [y + radius * math.sin(rotation + i * step) for i in range(sides)])
+    return points
+
+
+def prism(profile, height: float, z: float=0) -> PolyhedronTopology:
+    """
+    Creates a vertical prism from a closed polygon in the xy plane
+
+    Usage example:
+        topology = prism(regular_polygon(6, 500), 2000)
+        polyhedron = PolyhedronBuilder.from_topology(topology).create()
+
+    Parameters:
+        profile             Flat x, y coordinates or (x, y) pairs of the polygon, without repeating the first point
+        height: float       Height of the prism, negative extrudes downwards
+        z: float            Height of the bottom polygon
+    Throws:
+        PrimitiveError:     The profile has less than 3 points or the height is 0
+    Returns:
+        PolyhedronTopology of the closed prism, with outward oriented faces
+    """
+    points = _to_points(profile, 2)
+    count = len(points) // 2
+    if count < 3:
+        raise PrimitiveError(f"The profile of a prism needs at least 3 points, got {count}!")
+    if height == 0:
+        raise PrimitiveError("The height of a prism can not be 0!")
+
+    coordinates = array("d", [0.0]) * (6 * count)
+    for ring, ring_z in enumerate((z, z + height)):
+        offset = 3 * count * ring
+        coordinates[offset:offset + 3 * count:3] = points[0::2]
+        coordinates[offset + 1:offset + 3 * count:3] = points[1::2]
+        coordinates[offset + 2:offset + 3 * count:3] = array("d", [ring_z]) * count
+    return _grid_topology(coordinates, 2, count, closed_path=False, closed_profile=True)
+
+
+def ngon_prism(sides: int, radius: float, height: float, x: float=0, y: float=0, z: float=0) -> PolyhedronTopology:
+    """
+    Creates a vertical prism with a regular polygon as the base, e.g. an approximated shaft
+
+    Parameters:
+        sides: int          Number of sides
+        radius: float       Distance of the corners from the axis
+        height: float       Height of the prism
+        x, y, z: float      Center of the bottom polygon
+    Returns:
+        PolyhedronTopology of the closed prism, with outward oriented faces
+    """
+    return prism(regular_polygon(sides, radius, x, y), height, z)
+
+
+def revolve(profile, segments: int, angle: float=2 * math.pi, origin: Sequence[float]=(0, 0, 0),
+            axis: Sequence[float]=(0, 0, 1), closed_profile: bool=False, epsilon: float=1e-9) -> PolyhedronTopology:
+    """
+    Creates a rotational body by revolving a profile around an axis (lathe)
+
+    The profile is given as (radius, height) pairs in a plane through the axis. For a full revolution
+    an open profile is closed by the axis: end points on the axis become one vertex (e.g. a sphere or a cone),
+    end points away from the axis get a flat cap (e.g. a cylinder from [(r, 0), (r, h)]).
+    A partial revolution needs a closed profile away from the axis to be a volume, otherwise it is a surface.
+
+    Usage example:
+        # Cone with a cylindrical foot, 4096 segments
+        topology = revolve([(0, 0), (400, 0), (400, 300), (0, 1200)], 4096)
+        polyhedron = PolyhedronBuilder.from_topology(topology).create()
+
+    Parameters:
+        profile                 Flat radius, height values or (radius, height) pairs
+        segments: int           Number of segments around the axis
+        angle: float            Angle of the revolution in radians, default = full revolution
+        origin: Sequence        Point on the axis
+        axis: Sequence          Direction of the axis, the revolution is counterclockwise around it
+        closed_profile: bool    Is the profile closed (e.g. a torus from a circle), the first point is not repeated
+        epsilon: float          Radius up to which a point is on the axis
+    Throws:
+        PrimitiveError:     The profile or the number of segments is not valid
+    Returns:
+        PolyhedronTopology with outward oriented faces (for volumes)
+    """
+    points = _to_points(profile, 2)
+    count = len(points) // 2
+    if count < (3 if closed_profile else 2):
+        raise PrimitiveError(f"The profile has too few points ({count})!")
+    if segments < 3:
+        raise PrimitiveError(f"A revolution needs at least 3 segments, got {segments}!")
+    full = abs(abs(angle) - 2 * math.pi) <= 1e-12
+    on_axis = [abs(points[2 * j]) <= epsilon for j in range(count)]
+    poles = (False, False)
+    if full and not closed_profile:
+        poles = (on_axis[0], on_axis[-1])
+        if any(on_axis[1:-1]) or (count == 2 and all(poles)):
+            raise PrimitiveError("Only the end points of the profile can lie on the axis!")
+    elif any(on_axis):
+        raise PrimitiveError("The profile can not touch the axis, unless it is an open profile revolved fully!")
+
+    u, v, w = _axis_frame(axis)
+    ox, oy, oz = origin
+    rings = segments if full else segments + 1
+
+    # Radial direction of every ring, the coordinates are filled profile point after profile point
+    cosines = [math.cos(angle * ring / segments) for ring in range(rings)]
+    sines = [math.sin(angle * ring / segments) for ring in range(rings)]
+    coordinates = array("d", [0.0]) * (3 * rings * count)
+    for j in range(count):
+        r, h = points[2 * j], points[2 * j + 1]
+        for k, base in enumerate((ox, oy, oz)):
+            center, ru, rv = base + h * w[k], r * u[k], r * v[k]
+            coordinates[3 * j + k::3 * count] = array("d", [center + ru * c + rv * s for c, s in zip(cosines, sines)])
+    return _grid_topology(coordinates, rings, count, closed_path=full, closed_profile=closed_profile, poles=poles)
+
+
+def sweep(profile, path, closed_path: bool=False, closed_profile: bool=True) -> PolyhedronTopology:
+    """
+    Creates a body by sweeping a profile along a polyline, with mitered corners
+
+    The profile x axis is horizontal and its y axis points upwards as far as possible, perpendicular to the first segment.
+    The profile is carried along the path without twisting, at the corners it lies in the bisecting plane, hence
+    the side faces stay planar. A closed path should lie in a plane, otherwise the profile is twisted at the closure.
+
+    Usage example:
+        # Rectangular beam along a bent path
+        topology = sweep([(-100, -200), (100, -200), (100, 200), (-100, 200)], [(0, 0, 0), (5000, 0, 0), (5000, 3000, 1000)])
+        polyhedron = PolyhedronBuilder.from_topology(topology).create()
+
+    Parameters:
+        profile                 Flat x, y coordinates or (x, y) pairs of the profile, without repeating the first point
+        path                    Flat x, y, z coordinates or (x, y, z) triples of the polyline, without repeating the first point
+        closed_path: bool       Is the path closed (e.g. a ring beam)
+        closed_profile: bool    Is the profile closed, otherwise the result is a surface
+    Throws:
+        PrimitiveError:     The profile or the path is not valid
+    Returns:
+        PolyhedronTopology with outward oriented faces (for volumes)
+    """
+    points = _to_points(profile, 2)
+    path = _to_points(path, 3)
+    count, rings = len(points) // 2, len(path) // 3
+    if count < (3 if closed_profile else 2):
+        raise PrimitiveError(f"The profile has too few points ({count})!")
+    if rings < (3 if closed_path else 2):
+        raise PrimitiveError(f"The path has too few points ({rings})!")
+
+    segments = rings if closed_path else rings - 1
+    directions = []
+    for i in range(segments):
+        j = (i + 1) % rings
+        direction = _normalize(path[3 * j] - path[3 * i], path[3 * j + 1] - path[3 * i + 1], path[3 * j + 2] - path[3 * i + 2])
+        if direction is None:
+            raise PrimitiveError(f"The points {i} and {j} of the path are the same!")
+        directions.append(direction)
+
+    # Frame of every segment, carried from segment to segment by the smallest rotation
+    up = (0.0, 0.0, 1.0) if abs(directions[0][2]) < 0.999 else (1.0, 0.0, 0.0)
+    frames = []
+    y_axis = _normalize(*(up[k] - _dot(up, directions[0]) * directions[0][k] for k in range(3)))
+    for i, direction in enumerate(directions):
+        if i > 0:
+            y_axis = _rotate(y_axis, directions[i - 1], direction)
+        frames.append((_cross(y_axis, direction), y_axis))
+
+    coordinates = array("d")
+    xs, ys = points[0::2], points[1::2]
+    for ring in range(rings):
+        # The profile is placed with the frame of the incoming segment and moved along it to the bisecting plane
+        incoming = ring - 1 if ring > 0 or closed_path else 0
+        incoming %= segments
+        outgoing = ring if ring < segments else segments - 1
+        d = directions[incoming]
+        bisector = _normalize(*(d[k] + directions[outgoing][k] for k in range(3)))
+        if bisector is None:
+            raise PrimitiveError(f"The path turns back at point {ring}!")
+        x_axis, y_axis = frames[incoming]
+        cosine = _dot(d, bisector)
+        px, py, pz = path[3 * ring:3 * ring + 3]
+        for x, y in zip(xs, ys):
+            ox, oy, oz = (x * x_axis[k] + y * y_axis[k] for k in range(3))
+            shift = -(ox * bisector[0] + oy * bisector[1] + oz * bisector[2]) / cosine
+            coordinates.extend((px + ox + shift * d[0], py + oy + shift * d[1], pz + oz + shift * d[2]))
+    return _grid_topology(coordinates, rings, count, closed_path=closed_path, closed_profile=closed_profile)
+
+
+def _grid_topology(coordinates: array, rings: int, count: int, closed_path: bool, closed_profile: bool,
+                   poles: Tuple[bool, bool]=(False, False)) -> PolyhedronTopology:
+    """
+    Creates the topology of rings of profile points connected by quads
+
+    The edges and the face loops are computed from the grid indexes with array slices, so no edge lookup
+    or face orientation is needed. Open directions are capped by one face, when the other direction is closed.
+    The profile end points marked as poles are merged into one vertex (the quads next to them become triangles).
+
+    Parameters:
+        coordinates: array      Flat x, y, z coordinates, ring after ring
+        rings: int              Number of rings (along the path)
+        count: int              Number of points in every ring (along the profile)
+        closed_path: bool       Is the last ring connected to the first
+        closed_profile: bool    Is the last point of every ring connected to the first
+        poles: Tuple[bool]      Merge the first / last profile point of all rings, only for open profiles
+    Returns:
+        PolyhedronTopology with consistently oriented faces, outward for volumes
+    """
+    # Vertex index of every grid point
+    vertex = array("i", range(rings * count))
+    if any(poles):
+        keep = array("b", [1]) * (rings * count)
+        for column, pole in zip((0, count - 1), poles):
+            if pole:
+                vertex[column::count] = array("i", [column]) * rings
+                keep[column + count::count] = array("b", [0]) * (rings - 1)
+        renumber, index = array("i", [0]) * len(vertex), 0
+        for point in range(len(vertex)):
+            renumber[point] = index
+            index += keep[point]
+        vertex = array("i", [renumber[point] for point in vertex])
+        coordinates = array("d", [value for point in range(len(keep)) if keep[point]
+                                  for value in coordinates[3 * point:3 * point + 3]])
+
+    # Profile edges P(i, j) from (i, j) to (i, j + 1), ring after ring
+    profile_count = count if closed_profile else count - 1
+    path_count = rings if closed_path else rings - 1
+    edge_start = array("i", [0]) * (rings * profile_count)
+    edge_end = array("i", [0]) * (rings * profile_count)
+    for j in range(profile_count):
+        edge_start[j::profile_count] = vertex[j::count]
+        edge_end[j::profile_count] = vertex[(j + 1) % count::count]
+
+    # Path edges Q(i, j) from (i, j) to (i + 1, j), column after column, not for the poles
+    path_edge = [-1] * count
+    for column in range(count):
+        if (column == 0 and poles[0]) or (column == count - 1 and poles[1]):
+            continue
+        path_edge[column] = len(edge_start)
+        line = vertex[column::count]
+        edge_start.extend(line[:path_count])
+        edge_end.extend(line[1:] + line[:1] if closed_path else line[1:])
+
+    # Sides of the faces, column after column, all faces of a column have the same number of sides
+    columns = []
+    for j in range(profile_count):
+        next_j = (j + 1) % count
+        sides = [array("i", range(j, j + path_count * profile_count, profile_count))]
+        if path_edge[next_j] >= 0:
+            sides.append(array("i", range(path_edge[next_j], path_edge[next_j] + path_count)))
+        sides.append(array("i", range(~(profile_count + j), ~((path_count + 1) * profile_count + j), -profile_count)))
+        if closed_path:
+            sides[-1][-1] = ~j
+        if path_edge[j] >= 0:
+            sides.append(array("i", range(~path_edge[j], ~(path_edge[j] + path_count), -1)))
+        columns.append(sides)
+
+    caps: List[List[int]] = []
+    if closed_profile and not closed_path:
+        caps.append([~j for j in reversed(range(profile_count))])
+        caps.append([(rings - 1) * profile_count + j for j in range(profile_count)])
+    elif closed_path and not closed_profile:
+        if path_edge[0] >= 0:
+            caps.append([path_edge[0] + ring for ring in range(path_count)])
+        if path_edge[-1] >= 0:
+            caps.append([~(path_edge[-1] + ring) for ring in reversed(range(path_count))])
+
+    # Volumes are turned outwards
+    inverted = (closed_path or closed_profile) and \
+        _grid_volume(coordinates, vertex, rings, count, path_count, profile_count, caps, edge_start, edge_end) < 0
+
+    face_offsets, face_edges = array("i", [0]), array("i")
+    for sides in columns:
+        if inverted:
+            sides = [array("i", [~entry for entry in side]) for side in reversed(sides)]
+        size = len(sides)
+        block = array("i", [0]) * (size * path_count)
+        for offset, side in enumerate(sides):
+            block[offset::size] = side
+        face_offsets.extend(range(len(face_edges) + size, len(face_edges) + len(block) + 1, size))
+        face_edges.extend(block)
+    for cap in caps:
+        face_edges.extend([~entry for entry in reversed(cap)] if inverted else cap)
+        face_offsets.append(len(face_edges))
+
+    return PolyhedronTopology(coordinates, edge_start, edge_end, face_offsets, face_edges, {}, {})
+
+
+def _grid_volume(coordinates: array, vertex: array, rings: int, count: int, path_count: int, profile_count: int,
+                 caps: List[List[int]], edge_start: array, edge_end: array) -> float:
+    """
+    Six times the signed volume enclosed by the grid faces and the caps, as created by _grid_topology()
+    The quads are split into two triangles, the triangles at the poles have one triangle of zero volume
+    """
+    points = list(zip(coordinates[0::3], coordinates[1::3], coordinates[2::3]))
+    volume = 0.0
+    for ring in range(path_count):
+        row, next_row = ring * count, ((ring + 1) % rings) * count
+        for j in range(profile_count):
+            next_j = (j + 1) % count
+            ax, ay, az = points[vertex[row + j]]
+            bx, by, bz = points[vertex[row + next_j]]
+            cx, cy, cz = points[vertex[next_row + next_j]]
+            dx, dy, dz = points[vertex[next_row + j]]
+            volume += ax * (by * cz - bz * cy) - ay * (bx * cz - bz * cx) + az * (bx * cy - by * cx)
+            volume += ax * (cy * dz - cz * dy) - ay * (cx * dz - cz * dx) + az * (cx * dy - cy * dx)
+    for cap in caps:
+        loop = [edge_start[entry] if entry >= 0 else edge_end[~entry] for entry in cap]
+        volume += _signed_volume(loop, coordinates)
+    return volume
+
+
+def _to_points(values, width: int) -> array:
+    # Flat or nested sequences and NumPy arrays, without importing NumPy
+    if hasattr(values, "ravel"):
+        values = values.ravel().tolist()
+    values = list(values)
+    if values and isinstance(values[0], (tuple, list)):
+        if any(len(item) != width for item in values):
+            raise PrimitiveError(f"Every point has to have exactly {width} values!")
+        values = [value for item in values for value in item]
+    if len(values) % width:
+        raise PrimitiveError(f"The number of coordinates ({len(values)}) is not divisible by {width}!")
+    return array("d", values)
+
+
+def _axis_frame(axis: Sequence[float]) -> Tuple[Tuple[float, ...], Tuple[float, ...], Tuple[float, ...]]:
+    # Right handed frame u, v, w with w along the axis
+    w = _normalize(*axis)
+    if w is None:
+        raise PrimitiveError("The axis can not be a zero vector!")
+    helper = (1.0, 0.0, 0.0) if abs(w[0]) < 0.9 else (0.0, 1.0, 0.0)
+    u = _normalize(*_cross(helper, w))
+    return u, _cross(w, u), w
+
+
+def _normalize(x: float, y: float, z: float) -> Optional[Tuple[float, float, float]]:
+    length = math.sqrt(x * x + y * y + z * z)
+    if length <= 1e-12:
+        return None
+    return x / length, y / length, z / length
+
+
+def _dot(a: Sequence[float], b: Sequence[float]) -> float:
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def _cross(a: Sequence[float], b: Sequence[float]) -> Tuple[float, float, float]:
+    return a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0]
+
+
+def _rotate(vector: Sequence[float], start: Sequence[float], end: Sequence[float]) -> Tuple[float, float, float]:
+    # Smallest rotation taking the unit vector start to the unit vector end, applied to the vector
+    k = _cross(start, end)
+    c = _dot(start, end)
+    if c <= -1 + 1e-12:
+        raise PrimitiveError("The path turns back on itself!")
+    kx = _cross(k, vector)
+    scale = _dot(k, vector) / (1 + c)
+    return tuple(c * vector[i] + kx[i] + scale * k[i] for i in range(3))
@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .AtomicFile import atomic_write, ignore_cache_errors
+
+
+# Version of the files saved on the disk, files with another version are ignored
+_DISK_VERSION = 1
+
+# Value types of the parameters that create an event when clicked
+BUTTON_TYPES = ("Button", "PictureButton", "PictureResourceButton")
+
+_INCLUDE = re.compile(rb"^\s*#include\s+[<\"]?([^>\"\r\n]+?)[>\"]?\s*$")
+_DECLARATION = re.compile(rb"^\s*<\?xml[^>]*\?>")
+
+
+class PypDescriptorError(Exception):
+    """
+    Error class for the pyp descriptor
+    """
+
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+
+class PypDescriptor(NamedTuple):
+    """
+    Everything the Interactor needs from a pyp file, compiled once by load_descriptor()
+
+    Attributes:
+        path: str                           Path of the pyp file
+        files: Tuple[Tuple[str, int, int]]  (path, modification time in ns, size) of the pyp file, the pal file and
+                                            all included files, used to check if the descriptor is up to date
+        buttons: Tuple[Tuple[int, str]]     (EventId, Name) of all the buttons
+        values: Tuple[str]                  Names of all the other parameters
+    """
+    path: str
+    files: Tuple[Tuple[str, int, int], ...]
+    buttons: Tuple[Tuple[int, str], ...]
+    values: Tuple[str, ...]
+
+    def is_current(self) -> bool:
+        """
+        Check if none of the files the descriptor was compiled from has changed
+        """
+        for path, mtime, size in self.files:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return False
+            if stat.st_mtime_ns != mtime or stat.st_size != size:
+                return False
+        return True
+
+
+# (Path of the pyp file, search paths) -> compiled descriptor
+_memory_cache: Dict[Tuple[str, Tuple[str, ...]], PypDescriptor] = {}
+
+
+def load_descriptor(pyp_file: str, cache_directory: Optional[str]=None, search_paths: Sequence[str]=()) -> PypDescriptor:
+    """
+    Get the compiled descriptor of a pyp file
+    The descriptor is taken from the memory, then from the cache directory, and only if both are missing
+    or any of the files changed since, the pyp file is parsed again
+
+    Parameters:
+        pyp_file: str               Path to the pyp file
+        cache_directory: str        Optional directory where the compiled descriptors are saved
+        search_paths: Sequence[str] Additional directories in which the #include files are searched
+    Throws:
+        PypDescriptorError:     The pyp file or an included file can't be read or parsed
+    Returns:
+        Compiled PypDescriptor
+    """
+    path = os.path.abspath(pyp_file)
+    # The search paths decide which #include files are found, so they are part of the key
+    key = (path, tuple(os.path.abspath(search_path) for search_path in search_paths))
+
+    descriptor = _memory_cache.get(key)
+    if descriptor is not None and descriptor.is_current():
+        return descriptor
+
+    descriptor = _load(key, cache_directory)
+    if descriptor is None or not descriptor.is_current():
+        descriptor = compile_descriptor(path, search_paths)
+        _save(key, descriptor, cache_directory)
+
+    _memory_cache[key] = descriptor
+    return descriptor
+
+
+def compile_descriptor(pyp_file: str, search_paths: Sequence[str]=()) -> PypDescriptor:
+    """
+    Parses the pyp file with all its #include files, and the pal file if there is one
+
+    Parameters:
+        pyp_file: str               Path to the pyp file
+        search_paths: Sequence[str] Additional directories in which the #include files are searched
+    Throws:
+        PypDescriptorError:     The pyp file or an included file can't be read or parsed
+    Returns:
+        Compiled PypDescriptor
+    """
+    # Only imported when a pyp file is compiled, a cached descriptor is loaded without the XML parser
+    import xml.etree.ElementTree as ET
+
+    path = os.path.abspath(pyp_file)
+    files: List[Tuple[str, int, int]] = []
+    sources = [path]
+    # The palette can be separated into a pal file with the same name
+    pal_file = os.path.splitext(path)[0] + ".pal"
+    if os.path.exists(pal_file):
+        sources.append(pal_file)
+
+    buttons: List[Tuple[int, str]] = []
+    values: List[str] = []
+    seen_values = set()
+    for source in sources:
+        text = read_pyp(source, files, search_paths)
+        try:
+            root = ET.fromstring(text)
+        except ET.ParseError as err:
+            raise PypDescriptorError(f"The file {source} (with its #include files) can't be parsed: {err}") from None
+
+        for parameter in root.iter("Parameter"):
+            name = parameter.findtext("Name")
+            if parameter.findtext("ValueType") in BUTTON_TYPES:
+                event_id = parameter.findtext("EventId")
+                if name is None or event_id is None:
+                    raise PypDescriptorError(f"A button in {source} has no Name or EventId!")
+                buttons.append((int(event_id), name.strip()))
+            elif name is not None and name.strip() not in seen_values:
+                seen_values.add(name.strip())
+                values.append(name.strip())
+
+    return PypDescriptor(path, tuple(files), tuple(buttons), tuple(values))
+
+
+def read_pyp(path: str, files: Optional[List[Tuple[str, int, int]]]=None, search_paths: Sequence[str]=(),
+             _stack: Tuple[str, ...]=()) -> bytes:
+    """
+    Reads a pyp file and replaces every "#include <file>" line with the content of the file
+    Included files are searched relative to the including file first, then in the search paths
+
+    Parameters:
+        path: str                           Path to the file
+        files: List[Tuple[str, int, int]]   Optional list to which (path, mtime, size) of every read file is added
+        search_paths: Sequence[str]         Additional directories in which the #include files are searched
+    Throws:
+        PypDescriptorError:     A file can't be read, is not found or includes itself
+    Returns:
+        Content of the file with all the includes resolved
+    """
+    if path in _stack:
+        raise PypDescriptorError(f"The file {path} includes itself: {' -> '.join(_stack + (path,))}")
+    try:
+        with open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            content = file.read()
+    except OSError as err:
+        raise PypDescriptorError(f"The file {path} can't be read: {err}") from None
+    if files is not None:
+        files.append((path, stat.st_mtime_ns, stat.st_size))
+
+    # Most files have no includes, then the content is returned unchanged
+    if b"#include" not in content:
+        return content
+
+    lines = content.splitlines(keepends=True)
+    for number, line in enumerate(lines):
+        match = _INCLUDE.match(line)
+        if match is None:
+            continue
+        name = match.group(1).decode("utf-8").strip().replace("\\", os.sep)
+        included = _find_include(name, os.path.dirname(path), search_paths)
+        if included is None:
+            raise PypDescriptorError(f"The file {name} included in {path} (line {number + 1}) does not exist!")
+        # The XML declaration of the included file would break the including file
+        lines[number] = _DECLARATION.sub(b"", read_pyp(included, files, search_paths, _stack + (path,)), 1)
+    return b"".join(lines)
+
+
+def _find_include(name: str, directory: str, search_paths: Sequence[str]) -> Optional[str]:
+    for base in (directory, *search_paths):
+        candidate = os.path.abspath(os.path.join(base, name))
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def _cache_path(key: Tuple[str, Tuple[str, ...]], cache_directory: str) -> str:
+    path, search_paths = key
+    digest = hashlib.blake2b("\0".join((path, *search_paths)).encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(cache_directory, f"{os.path.splitext(os.path.basename(path))[0]}_{digest}.json")
+
+
+def _save(key: Tuple[str, Tuple[str, ...]], descriptor: PypDescriptor, cache_directory: Optional[str]) -> None:
+    if cache_directory is None:
+        return
+    with ignore_cache_errors():
+        os.makedirs(cache_directory, exist_ok=True)
+        with atomic_write(_cache_path(key, cache_directory)) as file:
+            json.dump({"version": _DISK_VERSION, "descriptor": descriptor}, file)
+
+
+def _load(key: Tuple[str, Tuple[str, ...]], cache_directory: Optional[str]) -> Optional[PypDescriptor]:
+    if cache_directory is None:
+        return None
+    try:
+        with open(_cache_path(key, cache_directory), "r", encoding="utf-8") as file:
+            data = json.load(file)
+        if data["version"] != _DISK_VERSION:
+            return None
+        pyp, files, buttons, values = data["descriptor"]
+        return PypDescriptor(pyp, tuple(tuple(item) for item in files), tuple(tuple(item) for item in buttons), tuple(values))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
@@ -0,0 +1,247 @@
+import mmap
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .AtomicFile import atomic_write
+from .MeshTopology import PolyhedronTopology
+
+
+# Signature of the files, the line break detects files damaged by a text mode transfer
+MAGIC = b"PPTOPO\r\n"
+# Version of the format, files with another version are rejected
+VERSION = 2
+
+# Signature, version, flags, polyhedron type (-1 if unknown), vertex, edge, face, face edge, vertex name and edge name count,
+# vertex and edge name table size in bytes
+_HEADER = struct.Struct("<8sHHi8Q")
+# The arrays are stored little endian, as on all the platforms Allplan runs on
+_SWAP = sys.byteorder != "little"
+
+
+class TopologyFileError(Exception):
+    """
+    Error class for the topology file functions
+    """
+
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+
+def save_topology(topology: PolyhedronTopology, path: str) -> None:
+    """
+    Saves a finished topology into a compact binary file, which is loaded by load_topology()
+
+    The file starts with a header of 80 bytes (signature, version, polyhedron type and counts), followed by the raw arrays:
+    the coordinates as float64, the edge starts and ends, face offsets and face edges as int32, the indexes of
+    the named vertices and edges as int32, and the vertex and edge names as UTF-8 separated by zero bytes.
+    The arrays start at multiples of their item size, so they can be used directly from a memory mapped file.
+
+    Parameters:
+        topology: PolyhedronTopology    Topology, e.g. from PolyhedronBuilder.get_topology() or the Primitives
+        path: str                       Path of the file, an existing file is replaced
+    Throws:
+        TopologyFileError:  The arrays of the topology do not fit together, or a name contains a zero character
+    """
+    coordinates  = _typed(topology.coordinates, "d")
+    edge_start   = _typed(topology.edge_start, "i")
+    edge_end     = _typed(topology.edge_end, "i")
+    face_offsets = _typed(topology.face_offsets, "i")
+    face_edges   = _typed(topology.face_edges, "i")
+
+    if len(coordinates) % 3:
+        raise TopologyFileError(f"The number of coordinates ({len(coordinates)}) is not divisible by 3!")
+    if len(edge_start) != len(edge_end):
+        raise TopologyFileError(f"Got {len(edge_start)} edge starts and {len(edge_end)} edge ends!")
+    if not face_offsets or face_offsets[-1] != len(face_edges):
+        raise TopologyFileError("The face offsets do not end with the number of face edges!")
+
+    vertex_indexes, vertex_names = _name_table(topology.vertex_names)
+    edge_indexes, edge_names     = _name_table(topology.edge_names)
+
+    polyhedron_type = -1 if topology.polyhedron_type is None else topology.polyhedron_type
+    header = _HEADER.pack(MAGIC, VERSION, 0, polyhedron_type, len(coordinates) // 3, len(edge_start), len(face_offsets) - 1,
+                          len(face_edges), len(vertex_indexes), len(edge_indexes), len(vertex_names), len(edge_names))
+
+    with atomic_write(path, binary=True) as file:
+        file.write(header)
+        for values in (coordinates, edge_start, edge_end, face_offsets, face_edges, vertex_indexes, edge_indexes):
+            if _SWAP:
+                values = array(values.typecode, values)
+                values.byteswap()
+            values.tofile(file)
+        file.write(vertex_names)
+        file.write(edge_names)
+
+
+def load_topology(path: str, transform: Optional[Sequence[float]]=None, names: bool=True,
+                  memory_map: bool=False) -> PolyhedronTopology:
+    """
+    Loads a topology saved by save_topology()
+    The arrays are read as a whole, no dictionary lookup, loop resolution or orientation is done
+
+    Parameters:
+        path: str                   Path of the file
+        transform: Sequence[float]  Optional transformation of the coordinates, see transform_topology()
+        names: bool                 Load the name tables, with False they are empty, default = True
+        memory_map: bool            Map the file instead of reading it, the arrays are then read-only memoryviews
+                                    into the file (except the transformed coordinates), which keep it open
+                                    until they are released, default = False
+    Throws:
+        TopologyFileError:  The file can't be read, is no topology file, has another version or is truncated
+    Returns:
+        PolyhedronTopology, which can be passed to PolyhedronBuilder.from_topology()
+    """
+    try:
+        with open(path, "rb") as file:
+            if memory_map and not _SWAP:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                buffer = file.read()
+    except (OSError, ValueError) as err:
+        raise TopologyFileError(f"The topology file {path} can't be read: {err}") from None
+
+    view = memoryview(buffer)
+    if len(view) < _HEADER.size:
+        raise TopologyFileError(f"The file {path} is too short for a topology file!")
+    (magic, version, _, polyhedron_type, vertex_count, edge_count, face_count, face_edge_count,
+     vertex_name_count, edge_name_count, vertex_name_size, edge_name_size) = _HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise TopologyFileError(f"The file {path} is not a topology file!")
+    if version != VERSION:
+        raise TopologyFileError(f"The topology file {path} has version {version}, only version {VERSION} is supported!")
+
+    size = (_HEADER.size + 24 * vertex_count + 4 * (2 * edge_count + face_count + 1 + face_edge_count
+            + vertex_name_count + edge_name_count) + vertex_name_size + edge_name_size)
+    if len(view) != size:
+        raise TopologyFileError(f"The topology file {path} has {len(view)} bytes instead of {size}!")
+
+    offset = _HEADER.size
+
+    def section(typecode: str, count: int):
+        nonlocal offset
+        end = offset + count * (8 if typecode == "d" else 4)
+        part = view[offset:end]
+        offset = end
+        if memory_map and not _SWAP:
+            return part.cast(typecode)
+        values = array(typecode)
+        values.frombytes(part)
+        if _SWAP:
+            values.byteswap()
+        return values
+
+    coordinates    = section("d", 3 * vertex_count)
+    edge_start     = section("i", edge_count)
+    edge_end       = section("i", edge_count)
+    face_offsets   = section("i", face_count + 1)
+    face_edges     = section("i", face_edge_count)
+    vertex_indexes = section("i", vertex_name_count)
+    edge_indexes   = section("i", edge_name_count)
+
+    vertex_names: Dict[str, int] = {}
+    edge_names: Dict[str, int]   = {}
+    if names:
+        vertex_names = _read_names(view[offset:offset + vertex_name_size], vertex_indexes, path)
+        edge_names   = _read_names(view[offset + vertex_name_size:size], edge_indexes, path)
+
+    topology = PolyhedronTopology(coordinates, edge_start, edge_end, face_offsets, face_edges, vertex_names, edge_names,
+                                  None if polyhedron_type < 0 else polyhedron_type)
+    if transform is not None:
+        topology = transform_topology(topology, transform)
+    return topology
+
+
+def transform_topology(topology: PolyhedronTopology, transform: Sequence[float]) -> PolyhedronTopology:
+    """
+    Transforms the coordinates of a topology, e.g. to scale a part with a fixed topology
+    If the transformation mirrors the coordinates, the faces are reversed so the volume stays oriented outwards
+
+    Parameters:
+        topology: PolyhedronTopology    Topology to transform, it is not changed
+        transform: Sequence[float]      Either 3 scale factors (sx, sy, sz), or the first 3 rows of an affine matrix
+                                        (12 values, row by row), or a 4x4 matrix (16 values, row by row)
+    Throws:
+        TopologyFileError:  The transformation has a wrong number of values, or is singular
+    Returns:
+        New topology with the transformed coordinates, the other arrays are shared unless the faces are reversed
+    """
+    matrix = _affine(transform)
+    (a, b, c, d), (e, f, g, h), (i, j, k, l) = matrix[0:4], matrix[4:8], matrix[8:12]
+    determinant = a * (f * k - g * j) - b * (e * k - g * i) + c * (e * j - f * i)
+    if determinant == 0:
+        raise TopologyFileError("The transformation is singular!")
+
+    xs, ys, zs = topology.coordinates[0::3], topology.coordinates[1::3], topology.coordinates[2::3]
+    coordinates = array("d", bytes(8 * len(topology.coordinates)))
+    if b == c == e == g == i == j == 0:
+        # Scaling and translation, every axis on its own
+        coordinates[0::3] = array("d", [a * x + d for x in xs])
+        coordinates[1::3] = array("d", [f * y + h for y in ys])
+        coordinates[2::3] = array("d", [k * z + l for z in zs])
+    else:
+        coordinates[0::3] = array("d", [a * x + b * y + c * z + d for x, y, z in zip(xs, ys, zs)])
+        coordinates[1::3] = array("d", [e * x + f * y + g * z + h for x, y, z in zip(xs, ys, zs)])
+        coordinates[2::3] = array("d", [i * x + j * y + k * z + l for x, y, z in zip(xs, ys, zs)])
+
+    face_edges = topology.face_edges
+    if determinant < 0:
+        # A mirrored volume is inside out, every loop is walked backwards with all its edges reversed
+        offsets, reversed_edges = topology.face_offsets, array("i", [~entry for entry in face_edges])
+        face_edges = array("i", reversed_edges)
+        for face in range(len(offsets) - 1):
+            begin, end = offsets[face], offsets[face + 1]
+            face_edges[begin:end] = reversed_edges[end - 1:begin - 1 if begin else None:-1]
+    return topology._replace(coordinates=coordinates, face_edges=face_edges)
+
+
+def _affine(transform: Sequence[float]) -> List[float]:
+    """
+    Converts the transform argument into the first 3 rows of an affine matrix
+    """
+    values = [float(value) for value in transform]
+    if len(values) == 3:
+        return [values[0], 0, 0, 0,   0, values[1], 0, 0,   0, 0, values[2], 0]
+    if len(values) == 12:
+        return values
+    if len(values) == 16:
+        if values[12:16] != [0, 0, 0, 1]:
+            raise TopologyFileError("The last row of the transformation matrix has to be 0, 0, 0, 1!")
+        return values[:12]
+    raise TopologyFileError(f"The transformation has {len(values)} values instead of 3, 12 or 16!")
+
+
+def _typed(values, typecode: str) -> array:
+    """
+    Converts the values into an array of the given type, arrays of the right type are not copied
+    """
+    if isinstance(values, array) and values.typecode == typecode:
+        return values
+    if isinstance(values, memoryview) and values.format == typecode:
+        result = array(typecode)
+        result.frombytes(values.cast("B"))
+        return result
+    return array(typecode, values)
+
+
+def _name_table(names: Dict[str, int]) -> Tuple[array, bytes]:
+    """
+    Converts a name table into the indexes and the names separated by zero bytes
+    """
+    if not names:
+        return array("i"), b""
+    text = "\0".join(names)
+    if text.count("\0") != len(names) - 1:
+        raise TopologyFileError("Names containing a zero character can't be saved!")
+    return array("i", names.values()), text.encode("utf-8")
+
+
+def _read_names(data: memoryview, indexes: Sequence[int], path: str) -> Dict[str, int]:
+    if not len(indexes):
+        return {}
+    names = bytes(data).decode("utf-8").split("\0")
+    if len(names) != len(indexes):
+        raise TopologyFileError(f"The name table of the topology file {path} is damaged!")
+    return dict(zip(names, indexes))
@@ -0,0 +1,258 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .AtomicFile import atomic_write
+
+
+class LatencyHistogram:
+    """
+    Histogram of durations with logarithmic buckets, a bucket covers durations up to twice of the previous one.
+
+    Bucket 0 holds durations up to 1 µs, bucket i durations up to 2^i µs, so 32 buckets cover more than an hour.
+    """
+
+    BUCKETS = 32
+
+    def __init__(self):
+        self.buckets: List[int] = [0] * self.BUCKETS
+        self.count: int   = 0
+        self.total: float = 0.0
+        self.max: float   = 0.0
+
+    def add(self, seconds: float) -> None:
+        microseconds = int(seconds * 1e6)
+        self.buckets[min(microseconds.bit_length(), self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Upper bound of the bucket containing the given fraction of the durations, in seconds
+
+        Parameters:
+            fraction: float     e.g. 0.5 for the median, 0.99 for the 99th percentile
+        """
+        if not self.count:
+            return 0.0
+        needed, seen = fraction * self.count, 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= needed:
+                return min((1 << bucket) / 1e6, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Summary of the histogram, the buckets are keyed by their upper bound in µs and only the used ones are listed
+        """
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.mean,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+            "buckets_us": {str(1 << bucket): count for bucket, count in enumerate(self.buckets) if count},
+        }
+
+
+class _NullSpan:
+    # Returned by disabled tracers, entering and exiting does nothing
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, type, value, traceback) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "category", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, category: str, args: Optional[Dict[str, Any]]):
+        self.tracer   = tracer
+        self.name     = name
+        self.category = category
+        self.args     = args
+
+    def __enter__(self) -> "_Span":
+        self.start = self.tracer.clock()
+        return self
+
+    def __exit__(self, type, value, traceback) -> None:
+        self.tracer.record(self.name, self.tracer.clock() - self.start, self.category, self.args, self.start)
+
+
+class Tracer:
+    """
+    Opt-in tracing of the hot paths, independent of Allplan.
+
+    Spans measure how long a block takes, the durations are collected in a LatencyHistogram per name
+    and the last max_events spans are kept as events for a Chrome trace (chrome://tracing or https://ui.perfetto.dev).
+    Counters count how often something happened. When the tracer is disabled, span() returns a shared object
+    that does nothing and count() returns at once, so the instrumentation can stay in the hot paths.
+
+    Usage example:
+        tracer = Tracer(enabled=True, path="C:/Temp/part_trace.json")
+        with tracer.span("handler/width", "handler"):
+            ...
+        tracer.count("palette_update")
+        print(tracer.summary()["histograms"]["handler/width"]["p99"])
+        tracer.flush()  # writes the Chrome trace to the path
+    """
+
+    def __init__(self, enabled: bool=False, path: Optional[str]=None, max_events: int=100000,
+                 clock: Callable[[], float]=time.perf_counter):
+        """
+        Constructor for the Tracer class
+
+        Parameters:
+            enabled: bool       Is the tracing enabled, default = False
+            path: str           Optional path of the Chrome trace written by flush()
+            max_events: int     Number of spans kept as trace events, the older ones are dropped (the histograms keep all)
+            clock: Callable     Function returning the current time in seconds
+        """
+        self.enabled    = enabled
+        self.path       = path
+        self.clock      = clock
+        self.origin     = clock()
+        self.pid        = os.getpid()
+
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.counters: Dict[str, int]                = {}
+        self.events: Deque[Tuple[str, str, float, float, int, Optional[Dict[str, Any]]]] = deque(maxlen=max_events)
+
+    def enable(self, path: Optional[str]=None) -> None:
+        """
+        Enables the tracing, optionally setting the path of the Chrome trace
+        """
+        self.enabled = True
+        if path is not None:
+            self.path = path
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        """
+        Drops all recorded histograms, counters and events
+        """
+        self.histograms.clear()
+        self.counters.clear()
+        self.events.clear()
+        self.origin = self.clock()
+
+    def span(self, name: str, category: str="", args: Optional[Dict[str, Any]]=None):
+        """
+        Context manager measuring the duration of the block
+
+        Parameters:
+            name: str           Name of the histogram and the trace event, e.g. "handler/width"
+            category: str       Category of the trace event, e.g. "handler", "palette", "build"
+            args: dict          Optional arguments shown with the trace event
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, args)
+
+    def record(self, name: str, seconds: float, category: str="", args: Optional[Dict[str, Any]]=None,
+               start: Optional[float]=None) -> None:
+        """
+        Records a duration measured elsewhere, e.g. the latency of a background build
+
+        Parameters:
+            name: str           Name of the histogram and the trace event
+            seconds: float      Duration
+            category: str       Category of the trace event
+            args: dict          Optional arguments shown with the trace event
+            start: float        Start time on the clock, default = now - seconds
+        """
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.add(seconds)
+        if start is None:
+            start = self.clock() - seconds
+        self.events.append((name, category, start, seconds, threading.get_ident(), args))
+
+    def count(self, name: str, value: int=1) -> None:
+        """
+        Increments a counter, e.g. the number of palette updates
+        """
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Get the histograms and counters
+
+        Returns:
+            Dictionary with the histograms (see LatencyHistogram.to_dict()) by name and the counters
+        """
+        return {
+            "histograms": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+            "counters": dict(self.counters),
+        }
+
+    def slowest(self, count: int=10) -> List[Tuple[str, float]]:
+        """
+        Names with the largest total duration, e.g. to find out which handler causes the lag
+
+        Returns:
+            List of the name and the total duration in seconds, slowest first
+        """
+        totals = sorted(((name, histogram.total) for name, histogram in self.histograms.items()),
+                        key=lambda item: item[1], reverse=True)
+        return totals[:count]
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """
+        Get the recorded events in the Chrome trace event format, with the summary in the metadata
+        """
+        events = []
+        for name, category, start, seconds, thread, args in self.events:
+            event = {"name": name, "cat": category or "default", "ph": "X", "pid": self.pid, "tid": thread,
+                     "ts": (start - self.origin) * 1e6, "dur": seconds * 1e6}
+            if args:
+                event["args"] = args
+            events.append(event)
+        for name, value in self.counters.items():
+            events.append({"name": name, "ph": "C", "pid": self.pid, "tid": 0,
+                           "ts": (self.clock() - self.origin) * 1e6, "args": {name: value}})
+        return {"traceEvents": events, "displayTimeUnit": "ms", "metadata": self.summary()}
+
+    def write(self, path: str) -> None:
+        """
+        Writes the Chrome trace (with the summary in the metadata) as a JSON file
+        """
+        with atomic_write(path) as file:
+            json.dump(self.chrome_trace(), file, default=str)
+
+    def flush(self) -> bool:
+        """
+        Writes the Chrome trace to the path given in the constructor or enable(), if tracing is enabled
+
+        Returns:
+            True if the file was written
+        """
+        if not self.enabled or self.path is None:
+            return False
+        self.write(self.path)
+        return True
@@ -0,0 +1,113 @@
+from array import array
+from math import floor
+from typing import Dict, List, Tuple
+
+
+class VertexWelder:
+    """
+    Merges vertices that are closer than epsilon into one vertex, independent of Allplan.
+
+    The vertices are saved in a uniform grid (spatial hash) with the cell size 2 * epsilon, so for every new vertex
+    only the vertices in the (at most 8) cells touched by the cube of size epsilon around it have to be compared,
+    which makes a lookup O(1) on average.
+    A vertex is merged into the first vertex found within epsilon, the merged vertex keeps the coordinates of
+    the vertex that was added first.
+
+    Usage example:
+        welder = VertexWelder(0.001)
+        welder.add(0, 0, 0)         # -> (0, False)
+        welder.add(1, 0, 0)         # -> (1, False)
+        welder.add(0.0001, 0, 0)    # -> (0, True)
+        welder.merged_count         # -> 1
+    """
+
+    __slots__ = ("epsilon", "coordinates", "merged_count", "_cells", "_epsilon_squared", "_cell_size")
+
+    def __init__(self, epsilon: float):
+        """
+        Constructor for the VertexWelder class
+
+        Parameters:
+            epsilon: float      Maximal distance of two vertices that are merged, has to be larger than 0
+        Throws:
+            ValueError:         epsilon is not larger than 0
+        """
+        if not epsilon > 0:
+            raise ValueError(f"The weld epsilon has to be larger than 0, got {epsilon}!")
+        self.epsilon          = epsilon
+        self.coordinates      = array("d")
+        self.merged_count     = 0
+        self._cells: Dict[Tuple[int, int, int], List[int]] = {}
+        self._epsilon_squared = epsilon * epsilon
+        self._cell_size       = 2 * epsilon
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.coordinates) // 3
+
+    def find(self, x: float, y: float, z: float) -> int:
+        """
+        Finds a vertex within epsilon of the point (x, y, z)
+
+        Parameters:
+            x, y, z: float      Coordinates of the point
+        Returns:
+            Index of the found vertex, -1 if there is none
+        """
+        coordinates, cells, limit = self.coordinates, self._cells, self._epsilon_squared
+        epsilon, size = self.epsilon, self._cell_size
+        # The neighbours are in the cells between (x - epsilon) and (x + epsilon), which are one or two cells per axis
+        x0, x1 = floor((x - epsilon) / size), floor((x + epsilon) / size)
+        y0, y1 = floor((y - epsilon) / size), floor((y + epsilon) / size)
+        z0, z1 = floor((z - epsilon) / size), floor((z + epsilon) / size)
+
+        for i in ((x0,) if x0 == x1 else (x0, x1)):
+            for j in ((y0,) if y0 == y1 else (y0, y1)):
+                for k in ((z0,) if z0 == z1 else (z0, z1)):
+                    cell = cells.get((i, j, k))
+                    if cell is None:
+                        continue
+                    for index in cell:
+                        dx = coordinates[3 * index] - x
+                        dy = coordinates[3 * index + 1] - y
+                        dz = coordinates[3 * index + 2] - z
+                        if dx * dx + dy * dy + dz * dz <= limit:
+                            return index
+        return -1
+
+    def add(self, x: float, y: float, z: float) -> Tuple[int, bool]:
+        """
+        Adds the point (x, y, z), or merges it with an existing vertex within epsilon
+
+        Parameters:
+            x, y, z: float      Coordinates of the point
+        Returns:
+            Tuple of the vertex index and a flag if the point was merged into an existing vertex
+        """
+        index = self.find(x, y, z)
+        if index >= 0:
+            self.merged_count += 1
+            return index, True
+
+        index = len(self.coordinates) // 3
+        self.coordinates.extend((x, y, z))
+        size = self._cell_size
+        key = (floor(x / size), floor(y / size), floor(z / size))
+        cell = self._cells.get(key)
+        if cell is None:
+            self._cells[key] = [index]
+        else:
+            cell.append(index)
+        return index, False
+
+    def add_vertices(self, coordinates) -> array:
+        """
+        Adds several points at once
+
+        Parameters:
+            coordinates         Flat x, y, z coordinates
+        Returns:
+            Array with the vertex index of every point
+        """
+        add = self.add
+        return array("i", [add(coordinates[i], coordinates[i + 1], coordinates[i + 2])[0] for i in range(0, len(coordinates) - 2, 3)])